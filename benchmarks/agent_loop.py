@@ -0,0 +1,190 @@
+"""
+End-to-End Agent Loop Benchmark for Penelope
+Drives PenelopeAgent.chat through scripted multi-tool scenarios against the
+fake Messages API (benchmarks.fake_model_server) in a scratch workspace, and
+reports per-turn latency, model request time, tool time, loop overhead,
+tokens and peak memory. No network or API key is needed.
+
+Usage:
+    python -m benchmarks.agent_loop [--runs 5] [--latency 0.0] [--scenario edit]
+                                    [--output results.json] [--max-overhead-ms 50]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.fake_model_server import FakeModelServer, ScriptedModel
+from benchmarks.stats import summarize
+
+DEFAULT_MAX_OVERHEAD_MS = 50.0
+
+WORKSPACE_FILES = {
+    "README.md": "# Demo project\n\nA small package used by the agent benchmark.\n",
+    "src/app.py": "from util import greet\n\n\ndef main():\n    print(greet('world'))\n\n\nif __name__ == '__main__':\n    main()\n",
+    "src/util.py": "def greet(name):\n    return 'Hello, ' + name\n\n\ndef shout(name):\n    return greet(name).upper()\n",
+    "tests/test_util.py": "from util import greet\n\n\ndef test_greet():\n    assert greet('x') == 'Hello, x'\n",
+}
+
+def _tool(name: str, thought: str = "", **params) -> dict:
+    return {"tool": name, "thought": thought, "params": params}
+
+SCENARIOS = [
+    {"name": "explore", "query": "Explain what this project does.", "steps": [
+        _tool("list_dir", "See the layout", path="."),
+        _tool("read_file", "Read the readme", path="README.md"),
+        _tool("grep_search", "Find functions", pattern="def ", path="src"),
+        {"text": "It is a tiny greeting package with a CLI entry point in src/app.py."},
+    ]},
+    {"name": "edit", "query": "Make greet use an f-string and check the syntax.", "steps": [
+        _tool("read_file", "Look at util.py", path="src/util.py"),
+        _tool("replace_text", "Switch to an f-string", path="src/util.py",
+              old_text="'Hello, ' + name", new_text="f'Hello, {name}'"),
+        _tool("run_command", "Compile to check syntax", command=f'"{sys.executable}" -m py_compile src/util.py'),
+        {"text": "greet now uses an f-string and the file compiles."},
+    ]},
+    {"name": "write", "query": "Add a CHANGELOG.", "steps": [
+        _tool("write_file", "Create the changelog", path="CHANGELOG.md", content="# Changelog\n\n- Initial release\n" * 20),
+        _tool("read_file", "Verify", path="CHANGELOG.md"),
+        {"text": "Added CHANGELOG.md."},
+    ]},
+    {"name": "rate_limited", "query": "List the tests.", "steps": [
+        dict(_tool("list_dir", "List tests", path="tests"), rate_limit=1),
+        {"text": "There is one test module, tests/test_util.py."},
+    ]},
+    {"name": "long_loop", "query": "Read every source file twice.", "steps": [
+        _tool("read_file", "Read", path=path) for path in ["src/app.py", "src/util.py", "tests/test_util.py"] * 3
+    ] + [{"text": "Read all files."}]},
+]
+
+def make_workspace(root: Path):
+    for rel, content in WORKSPACE_FILES.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+def _fake_api_environment(base_url: str) -> dict:
+    """Point the agent at the fake server with a single dummy key; returns the previous values"""
+    names = ["ANTHROPIC_BASE_URL", "ANTHROPIC_API_KEY"] + [f"ANTHROPIC_API_KEY_{i}" for i in range(1, 6)]
+    previous = {name: os.environ.get(name) for name in names}
+    for name in names:
+        os.environ.pop(name, None)
+    os.environ["ANTHROPIC_BASE_URL"] = base_url
+    os.environ["ANTHROPIC_API_KEY"] = "sk-ant-benchmark"
+    return previous
+
+def _restore_environment(previous: dict):
+    for name, value in previous.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+def run_turn(agent, query: str, trace_memory: bool = False) -> dict:
+    """One chat turn with model request and tool timings (tracemalloc slows the turn, so it is opt-in)"""
+    model_ms, tool_ms = [], []
+    create = agent.client.messages.create
+
+    def timed_create(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return create(*args, **kwargs)
+        finally:
+            model_ms.append((time.perf_counter() - started) * 1000)
+
+    def on_event(event, data):
+        if event == "tool_result":
+            tool_ms.append(data["seconds"] * 1000)
+
+    agent.client.messages.create = timed_create
+    agent.on_event = on_event
+    agent.history = []
+    usage_before = dict(agent.usage)
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        agent.chat(query)
+    finally:
+        wall_ms = (time.perf_counter() - started) * 1000
+        peak = 0
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        agent.client.messages.create = create
+        agent.on_event = None
+    return {
+        "wall_ms": wall_ms,
+        "model_ms": sum(model_ms),
+        "tool_ms": sum(tool_ms),
+        "overhead_ms": wall_ms - sum(model_ms) - sum(tool_ms),
+        "requests": len(model_ms),
+        "tool_calls": len(tool_ms),
+        "input_tokens": agent.usage["input_tokens"] - usage_before["input_tokens"],
+        "output_tokens": agent.usage["output_tokens"] - usage_before["output_tokens"],
+        "peak_kb": peak / 1024,
+    }
+
+def run_benchmark(runs: int = 5, latency: float = 0.0, scenarios: list = None) -> dict:
+    from penelope.core.agent import PenelopeAgent
+
+    selected = [s for s in SCENARIOS if not scenarios or s["name"] in scenarios]
+    server = FakeModelServer(ScriptedModel(selected, latency)).start()
+    previous_env = _fake_api_environment(server.base_url)
+    workspace = Path(tempfile.mkdtemp(prefix="penelope-agent-bench-"))
+    results = {"runs": runs, "latency_s": latency, "python": sys.version.split()[0], "scenarios": {}}
+    try:
+        agent = PenelopeAgent()
+        agent.working_dir = str(workspace)
+        for scenario in selected:
+            turns = []
+            # The first run warms imports and connections and is discarded; the last one measures memory
+            for run in range(runs + 2):
+                shutil.rmtree(workspace, ignore_errors=True)
+                make_workspace(workspace)
+                turns.append(run_turn(agent, scenario["query"], trace_memory=run == runs + 1))
+            memory_turn, turns = turns[-1], turns[1:-1]
+            results["scenarios"][scenario["name"]] = {
+                key: summarize([t[key] for t in turns]) for key in ("wall_ms", "model_ms", "tool_ms", "overhead_ms")
+            }
+            results["scenarios"][scenario["name"]]["peak_kb"] = round(memory_turn["peak_kb"], 1)
+            for key in ("requests", "tool_calls", "input_tokens", "output_tokens"):
+                results["scenarios"][scenario["name"]][key] = turns[-1][key]
+    finally:
+        _restore_environment(previous_env)
+        server.stop()
+        shutil.rmtree(workspace, ignore_errors=True)
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Penelope agent loop benchmark against a fake model server")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per scenario")
+    parser.add_argument("--latency", type=float, default=0.0, help="Fake model latency per request (seconds)")
+    parser.add_argument("--scenario", action="append", help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--output", "-o", help="Write results as JSON")
+    parser.add_argument("--max-overhead-ms", type=float, default=DEFAULT_MAX_OVERHEAD_MS,
+                        help="Fail when the median per-turn loop overhead exceeds this")
+    args = parser.parse_args(argv)
+
+    results = run_benchmark(args.runs, args.latency, args.scenario)
+    ok = True
+    for name, data in results["scenarios"].items():
+        overhead = data["overhead_ms"]["p50"]
+        within = overhead <= args.max_overhead_ms
+        ok = ok and within
+        print(f"{name:14} wall p50 {data['wall_ms']['p50']:8.1f} ms  model {data['model_ms']['p50']:8.1f} ms  "
+              f"tools {data['tool_ms']['p50']:7.1f} ms  overhead {overhead:6.1f} ms  "
+              f"{data['requests']} requests, {data['input_tokens']}/{data['output_tokens']} tokens, "
+              f"peak {data['peak_kb']:.0f} KB{'' if within else '  OVER BUDGET'}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
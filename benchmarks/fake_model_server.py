@@ -0,0 +1,196 @@
+"""
+Fake Anthropic Messages API for Penelope
+Deterministic local stand-in for POST /v1/messages. Replies are scripted per
+scenario; the scenario is picked by the first user message of a request and
+the step by how many assistant messages the conversation already has, so
+the server is stateless apart from rate-limit attempt counters.
+
+Script format (JSON): {"scenarios": [{"query": "...", "steps": [step, ...]}], "latency": 0.0}
+    {"text": "..."}                                  final answer
+    {"tool": "read_file", "params": {...}, "thought": "..."}
+                                                     tool call (Penelope's JSON protocol, or a
+                                                     tool_use block when the request has tools)
+    any step may add "latency": seconds, "rate_limit": N (answer the first N attempts with 429)
+    and "output_tokens": N
+
+Point the agent at it with ANTHROPIC_BASE_URL=http://127.0.0.1:<port>.
+
+Usage:
+    python -m benchmarks.fake_model_server --script scenarios.json [--port 8787] [--latency 0.05]
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = {"text": "Done."}
+
+def estimate_tokens(value) -> int:
+    """Rough token count (4 characters per token) for usage reporting"""
+    text = value if isinstance(value, str) else json.dumps(value)
+    return max(1, len(text) // 4)
+
+def _message_text(message: dict) -> str:
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+
+class ScriptedModel:
+    """Maps a Messages API request to its scripted step"""
+
+    def __init__(self, scenarios: list = None, latency: float = 0.0):
+        self.scenarios = {s["query"]: s["steps"] for s in (scenarios or [])}
+        self.latency = latency
+        self.requests = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, latency: float = None):
+        with open(path, encoding="utf-8") as f:
+            script = json.load(f)
+        return cls(script.get("scenarios", []), script.get("latency", 0.0) if latency is None else latency)
+
+    def step_for(self, body: dict) -> tuple:
+        """(step, attempt number, attempt key) for a request"""
+        messages = body.get("messages", [])
+        first_user = next((_message_text(m) for m in messages if m.get("role") == "user"), "")
+        steps = self.scenarios.get(first_user.strip(), [])
+        index = sum(1 for m in messages if m.get("role") == "assistant")
+        step = steps[index] if index < len(steps) else DEFAULT_REPLY
+        key = (hashlib.sha1(first_user.encode("utf-8")).hexdigest(), index)
+        with self._lock:
+            self.requests += 1
+            attempt = self._attempts.get(key, 0) + 1
+            self._attempts[key] = attempt
+        return step, attempt, key
+
+    def answered(self, key: tuple):
+        """Reset the attempt counter so a replayed conversation is rate limited again"""
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def content_for(self, step: dict, native_tools: bool) -> tuple:
+        """(content blocks, stop_reason)"""
+        if "tool" not in step:
+            return [{"type": "text", "text": step.get("text", "")}], "end_turn"
+        if native_tools:
+            block = {"type": "tool_use", "id": "toolu_" + hashlib.sha1(json.dumps(step).encode()).hexdigest()[:20],
+                     "name": step["tool"], "input": step.get("params", {})}
+            return [block], "tool_use"
+        call = {"thought": step.get("thought", ""), "action": step["tool"], "params": step.get("params", {})}
+        return [{"type": "text", "text": json.dumps(call)}], "end_turn"
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, status: int, payload: dict, headers: dict = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        if self.path.split("?")[0].rstrip("/") != "/v1/messages":
+            return self._json(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+        model = self.server.model
+        step, attempt, key = model.step_for(body)
+        time.sleep(step.get("latency", model.latency))
+        if attempt <= step.get("rate_limit", 0):
+            return self._json(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Scripted rate limit"}},
+                              {"retry-after": "0", "retry-after-ms": "1"})
+        model.answered(key)
+
+        content, stop_reason = model.content_for(step, bool(body.get("tools")))
+        usage = {"input_tokens": estimate_tokens(body.get("system", "")) + estimate_tokens(body.get("messages", [])),
+                 "output_tokens": step.get("output_tokens") or estimate_tokens(content),
+                 "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        message = {"id": f"msg_fake_{model.requests:06d}", "type": "message", "role": "assistant",
+                   "model": body.get("model", "fake"), "content": content, "stop_reason": stop_reason,
+                   "stop_sequence": None, "usage": usage}
+        if body.get("stream"):
+            return self._stream(message)
+        self._json(200, message)
+
+    def _stream(self, message: dict):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+
+        def send(event: str, data: dict):
+            self.wfile.write(f"event: {event}\ndata: {json.dumps(dict(data, type=event))}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        usage = message["usage"]
+        send("message_start", {"message": dict(message, content=[], stop_reason=None,
+                                               usage=dict(usage, output_tokens=1))})
+        for index, block in enumerate(message["content"]):
+            if block["type"] == "text":
+                send("content_block_start", {"index": index, "content_block": {"type": "text", "text": ""}})
+                text = block["text"]
+                for start in range(0, len(text), self.server.chunk_chars):
+                    send("content_block_delta", {"index": index, "delta": {"type": "text_delta",
+                                                                           "text": text[start:start + self.server.chunk_chars]}})
+            else:
+                send("content_block_start", {"index": index, "content_block": dict(block, input={})})
+                send("content_block_delta", {"index": index, "delta": {"type": "input_json_delta",
+                                                                       "partial_json": json.dumps(block["input"])}})
+            send("content_block_stop", {"index": index})
+        send("message_delta", {"delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                               "usage": {"output_tokens": usage["output_tokens"]}})
+        send("message_stop", {})
+        self.close_connection = True
+
+class FakeModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, model: ScriptedModel, port: int = 0, chunk_chars: int = 16):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.model = model
+        self.chunk_chars = chunk_chars
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeModelServer":
+        """Serve from a daemon thread"""
+        threading.Thread(target=self.serve_forever, daemon=True, name="fake-model-server").start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Anthropic Messages API with scripted replies")
+    parser.add_argument("--script", help="Scenario script (JSON)")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency", type=float, default=None, help="Seconds of latency per request")
+    args = parser.parse_args(argv)
+
+    model = ScriptedModel.from_file(args.script, args.latency) if args.script else ScriptedModel(latency=args.latency or 0.0)
+    server = FakeModelServer(model, args.port)
+    print(f"Fake Messages API on {server.base_url} ({len(model.scenarios)} scenarios)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
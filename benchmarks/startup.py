@@ -0,0 +1,98 @@
+"""
+Startup Benchmark for Penelope
+Measures the import time of the CLI entry points with `python -X importtime`
+and fails when it exceeds a budget or when modules that should be loaded
+lazily (the Anthropic SDK, tool implementations, rich Markdown) are
+imported at startup
+
+Usage:
+    python -m benchmarks.startup [--budget-ms 250] [--runs 5] [--module penelope.cli]
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PENELOPE_ROOT = Path(__file__).parent.parent
+DEFAULT_MODULES = ["penelope.cli", "penelope.main"]
+DEFAULT_BUDGET_MS = 250.0
+
+# Must not be imported just by loading an entry point
+LAZY_MODULES = [
+    "anthropic", "httpx", "penelope.core.agent",
+    "penelope.tools.ide_tools", "penelope.tools.android_studio_tools",
+    "penelope.tools.terminal_tools", "rich.markdown", "pyautogui", "win32gui"
+]
+
+_IMPORTTIME_RE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+def measure_import(module: str) -> dict:
+    """Import a module in a fresh interpreter and parse -X importtime output"""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(PENELOPE_ROOT),
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+
+    module_ms = next((cum / 1000 for name, _, cum, depth in entries if name == module and depth == 0), None)
+    errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+    return {
+        "module": module,
+        "ok": result.returncode == 0,
+        "error": "\n".join(errors[-5:]),
+        "import_ms": module_ms,
+        "wall_ms": wall_ms,
+        "modules": {name for name, _, _, _ in entries},
+        "entries": entries,
+    }
+
+def check_module(module: str, runs: int, budget_ms: float, top: int = 10) -> bool:
+    measurements = [measure_import(module) for _ in range(runs)]
+    failed = [m for m in measurements if not m["ok"]]
+    if failed:
+        print(f"[!] import {module} failed:\n{failed[0]['error']}")
+        return False
+
+    import_ms = statistics.median(m["import_ms"] or 0.0 for m in measurements)
+    wall_ms = statistics.median(m["wall_ms"] for m in measurements)
+    within_budget = import_ms <= budget_ms
+    eager = [name for name in LAZY_MODULES if name != module and name in measurements[0]["modules"]]
+
+    print(f"{module}: import {import_ms:.1f} ms (budget {budget_ms:.0f} ms), "
+          f"interpreter wall {wall_ms:.1f} ms, median of {runs} runs "
+          f"-> {'OK' if within_budget else 'OVER BUDGET'}")
+    slowest = sorted(measurements[0]["entries"], key=lambda e: e[1], reverse=True)[:top]
+    for name, self_us, cumulative_us, depth in slowest:
+        print(f"    {self_us / 1000:8.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+    if eager:
+        print(f"[!] {module} eagerly imports modules that should be lazy: {', '.join(eager)}")
+    return within_budget and not eager
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Penelope startup import-time benchmark")
+    parser.add_argument("--module", action="append", help="Module to import (repeatable)")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per module (median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="Import time budget per module")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.module or DEFAULT_MODULES:
+        ok = check_module(module, args.runs, args.budget_ms) and ok
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""Summary statistics shared by the benchmarks"""
+import statistics
+
+def percentile(values: list, pct: float) -> float:
+    """Linear-interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+def summarize(values: list, digits: int = 3) -> dict:
+    """min/mean/p50/p90/p95/p99/max of a list of measurements"""
+    if not values:
+        return {}
+    summary = {"n": len(values), "min": min(values), "mean": statistics.fmean(values)}
+    for pct in (50, 90, 95, 99):
+        summary[f"p{pct}"] = percentile(values, pct)
+    summary["max"] = max(values)
+    return {key: round(value, digits) if isinstance(value, float) else value for key, value in summary.items()}
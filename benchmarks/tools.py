@@ -0,0 +1,176 @@
+"""
+Tool Micro-Benchmarks for Penelope
+Times the file, search and terminal tools against a synthetic workspace
+(benchmarks.workspace) and writes JSON with timing percentiles and peak
+memory per benchmark. `compare` flags regressions between two result files.
+
+Usage:
+    python -m benchmarks.tools run [--size small|medium|large] [--repeat 10] [--output results.json]
+                                   [--workspace DIR] [--only grep_search]
+                                   [--files N] [--depth N] [--fanout N] [--min-kb KB] [--max-kb KB]
+                                   [--binary-ratio R] [--node-modules-files N] [--seed N]
+    python -m benchmarks.tools compare base.json new.json [--threshold 0.15] [--min-ms 1.0]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.stats import summarize
+from benchmarks.workspace import MARKER, PRESETS, load_or_generate
+
+DEFAULT_THRESHOLD = 0.15  # 15% slower p50 (or more peak memory) is a regression
+DEFAULT_MIN_MS = 1.0      # ignore differences smaller than this; timer noise dominates
+
+def _benchmarks(root: Path, manifest: dict) -> dict:
+    """name -> zero-argument callable, run with the workspace as working directory"""
+    from penelope.tools.file_tools import read_file, write_file, replace_text, list_dir
+    from penelope.tools.terminal_tools import grep_search, run_command
+    from penelope.tools.search_tools import search_files
+    from penelope.tools.outline_tools import outline_file
+    from penelope.tools.pack_tools import read_many
+
+    sample = manifest["sample_file"]
+    modules = sorted(str(p.relative_to(root)) for p in root.joinpath("src").rglob("module_*.py"))[:10]
+    scratch = root / "bench_scratch.py"
+    scratch.write_text("value = 'alpha'\n" * 2000, encoding="utf-8")
+    toggle = {"alpha": "omega", "omega": "alpha"}
+    state = {"current": "alpha"}
+
+    def replace_round_trip():
+        old = state["current"]
+        result = replace_text(str(scratch), f"'{old}'", f"'{toggle[old]}'")
+        state["current"] = toggle[old]
+        return result
+
+    return {
+        "list_dir_root": lambda: list_dir("."),
+        "list_dir_deep": lambda: list_dir(str(Path(sample).parent)),
+        "read_file": lambda: read_file(sample),
+        "outline_file": lambda: outline_file(sample),
+        "read_many_10": lambda: read_many(modules, 4000, "cache"),
+        "write_file_64kb": lambda: write_file("bench_written.txt", "x" * 65536),
+        "replace_text": replace_round_trip,
+        "grep_search_literal": lambda: grep_search(MARKER, "."),
+        "grep_search_regex": lambda: grep_search(r"def \w+_cache\(", "src"),
+        "search_files_literal": lambda: search_files(MARKER, "."),
+        "search_files_extension": lambda: search_files(r"class \w+Worker", ".", ".py"),
+        "run_command_echo": lambda: run_command("echo penelope"),
+        "run_command_python": lambda: run_command(f'"{sys.executable}" -c "pass"'),
+    }
+
+def _measure(func, repeat: int) -> dict:
+    func()  # warm-up: imports, page cache, regex cache
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": summarize(timings), "peak_kb": round(peak / 1024, 1), "output_chars": len(output or "")}
+
+def run_benchmarks(size: str = "small", repeat: int = 10, workspace: str = None, only: list = None,
+                   **overrides) -> dict:
+    """Run the benchmarks; overrides replace the size preset's workspace parameters"""
+    root = Path(workspace or Path(tempfile.gettempdir()) / f"penelope-bench-{size}")
+    started = time.perf_counter()
+    manifest = load_or_generate(root, size, **overrides)
+    setup_s = time.perf_counter() - started
+
+    results = {"size": size, "repeat": repeat, "workspace": manifest, "setup_s": round(setup_s, 2),
+               "python": sys.version.split()[0], "platform": platform.platform(terse=True),
+               "created": time.strftime("%Y-%m-%d %H:%M:%S"), "benchmarks": {}}
+    previous = os.getcwd()
+    os.chdir(root)
+    try:
+        for name, func in _benchmarks(root, manifest).items():
+            if only and name not in only:
+                continue
+            results["benchmarks"][name] = _measure(func, repeat)
+            data = results["benchmarks"][name]
+            print(f"{name:24} p50 {data['ms']['p50']:9.2f} ms  p95 {data['ms']['p95']:9.2f} ms  "
+                  f"peak {data['peak_kb']:9.1f} KB", flush=True)
+    finally:
+        os.chdir(previous)
+    return results
+
+def compare_results(base: dict, new: dict, threshold: float = DEFAULT_THRESHOLD, min_ms: float = DEFAULT_MIN_MS) -> tuple:
+    """(report lines, regression count) comparing p50 time and peak memory per benchmark"""
+    lines, regressions = [], 0
+    if base.get("workspace") != new.get("workspace"):
+        lines.append("[!] Workspaces differ; timings are not directly comparable")
+    lines.append(f"{'benchmark':24} {'base p50':>10} {'new p50':>10} {'change':>8}  {'base KB':>9} {'new KB':>9}")
+    for name in sorted(set(base["benchmarks"]) | set(new["benchmarks"])):
+        old, cur = base["benchmarks"].get(name), new["benchmarks"].get(name)
+        if not old or not cur:
+            lines.append(f"{name:24} {'only in ' + ('new' if cur else 'base'):>30}")
+            continue
+        old_ms, new_ms = old["ms"]["p50"], cur["ms"]["p50"]
+        change = (new_ms - old_ms) / old_ms if old_ms else 0.0
+        flags = []
+        if change > threshold and new_ms - old_ms > min_ms:
+            flags.append("SLOWER")
+        elif change < -threshold and old_ms - new_ms > min_ms:
+            flags.append("faster")
+        if old["peak_kb"] and (cur["peak_kb"] - old["peak_kb"]) / old["peak_kb"] > threshold and cur["peak_kb"] - old["peak_kb"] > 64:
+            flags.append("MORE MEMORY")
+        regressions += sum(1 for f in flags if f.isupper())
+        lines.append(f"{name:24} {old_ms:10.2f} {new_ms:10.2f} {change:+8.1%}  {old['peak_kb']:9.1f} {cur['peak_kb']:9.1f}"
+                     + (f"  {' '.join(flags)}" if flags else ""))
+    lines.append(f"{regressions} regression(s) (threshold {threshold:.0%}, noise floor {min_ms} ms)")
+    return lines, regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Penelope tool micro-benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="Run the benchmarks")
+    run.add_argument("--size", choices=sorted(PRESETS), default="small")
+    run.add_argument("--repeat", type=int, default=10)
+    run.add_argument("--workspace", help="Directory for the synthetic workspace (reused when parameters match)")
+    run.add_argument("--only", action="append", help="Benchmark to run (repeatable)")
+    run.add_argument("--output", "-o", help="Write results as JSON")
+    workspace = run.add_argument_group("workspace", "override the --size preset")
+    workspace.add_argument("--files", type=int, help="Source and binary files under src/")
+    workspace.add_argument("--depth", type=int, help="Directory depth under src/")
+    workspace.add_argument("--fanout", type=int, help="Subdirectories per directory")
+    workspace.add_argument("--min-kb", type=float, help="Smallest file size")
+    workspace.add_argument("--max-kb", type=float, help="Largest file size")
+    workspace.add_argument("--binary-ratio", type=float, help="Share of binary files (0-1)")
+    workspace.add_argument("--node-modules-files", type=int, help="Files in the node_modules tree")
+    workspace.add_argument("--seed", type=int, help="Random seed")
+    compare = sub.add_parser("compare", help="Compare two result files")
+    compare.add_argument("base")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare.add_argument("--min-ms", type=float, default=DEFAULT_MIN_MS)
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        overrides = {name: getattr(args, name) for name in ("files", "depth", "fanout", "min_kb", "max_kb",
+                                                            "binary_ratio", "node_modules_files", "seed")}
+        try:
+            results = run_benchmarks(args.size, args.repeat, args.workspace, args.only, **overrides)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+            print(f"Results written to {args.output}")
+        return 0
+
+    base = json.loads(Path(args.base).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.new).read_text(encoding="utf-8"))
+    lines, regressions = compare_results(base, new, args.threshold, args.min_ms)
+    print("\n".join(lines))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Synthetic Workspaces for Penelope Benchmarks
+Generates deterministic source trees of configurable size: file count,
+directory depth and fan-out, file sizes, a share of binary files and a
+node_modules-like tree that well-behaved tools should skip. A directory is
+only ever deleted (to regenerate it) when its manifest shows it was created
+here.
+"""
+import json
+import random
+import shutil
+from pathlib import Path
+
+PRESETS = {
+    "small": {"files": 200, "depth": 2, "fanout": 4, "min_kb": 1, "max_kb": 8, "binary_ratio": 0.05, "node_modules_files": 200},
+    "medium": {"files": 2000, "depth": 3, "fanout": 6, "min_kb": 1, "max_kb": 16, "binary_ratio": 0.05, "node_modules_files": 3000},
+    "large": {"files": 10000, "depth": 4, "fanout": 8, "min_kb": 1, "max_kb": 32, "binary_ratio": 0.05, "node_modules_files": 20000},
+}
+
+MARKER = "PENELOPE_BENCH_MARKER"  # appears in roughly one file in ten, for search benchmarks
+MANIFEST = "workspace.json"
+GENERATOR = "penelope-bench-workspace"  # recorded in the manifest; marks directories safe to delete
+
+_WORDS = ("value", "result", "config", "handler", "request", "session", "buffer", "index",
+          "parse", "render", "update", "client", "stream", "token", "cache", "worker")
+
+def _source_text(rng: random.Random, size: int, with_marker: bool) -> str:
+    lines = []
+    length = 0
+    while length < size:
+        a, b, c = rng.choice(_WORDS), rng.choice(_WORDS), rng.choice(_WORDS)
+        kind = rng.random()
+        if kind < 0.15:
+            line = f"def {a}_{b}({c}, *args, **kwargs):"
+        elif kind < 0.2:
+            line = f"class {a.title()}{b.title()}:"
+        elif kind < 0.25:
+            line = f"    # TODO: {a} {b} {c}"
+        else:
+            line = f"    {a}_{b} = {c}({rng.randint(0, 9999)}, '{b}')"
+        lines.append(line)
+        length += len(line) + 1
+    if with_marker:
+        lines.insert(rng.randrange(len(lines) + 1), f"    # {MARKER}")
+    return "\n".join(lines) + "\n"
+
+def _directories(root: Path, depth: int, fanout: int) -> list:
+    dirs = [root]
+    frontier = [root]
+    for level in range(depth):
+        frontier = [parent / f"pkg{level}_{i}" for parent in frontier for i in range(fanout)]
+        dirs.extend(frontier)
+    return dirs
+
+def generate_workspace(root, files: int = 200, depth: int = 2, fanout: int = 4, min_kb: float = 1,
+                       max_kb: float = 8, binary_ratio: float = 0.05, node_modules_files: int = 200,
+                       seed: int = 0) -> dict:
+    """Create a synthetic workspace under root; returns its manifest"""
+    rng = random.Random(seed)
+    root = Path(root)
+    dirs = _directories(root / "src", depth, fanout)
+    total_bytes = 0
+    binaries = 0
+    for i in range(files):
+        directory = dirs[i % len(dirs)]
+        directory.mkdir(parents=True, exist_ok=True)
+        size = int(rng.uniform(min_kb, max_kb) * 1024)
+        if rng.random() < binary_ratio:
+            data = rng.randbytes(size)
+            (directory / f"blob_{i}.bin").write_bytes(data)
+            binaries += 1
+        else:
+            data = _source_text(rng, size, with_marker=i % 10 == 0).encode("utf-8")
+            (directory / f"module_{i}.py").write_bytes(data)
+        total_bytes += len(data)
+
+    modules = root / "node_modules"
+    for i in range(node_modules_files):
+        package = modules / f"package-{i % max(1, node_modules_files // 10)}" / "lib"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"index_{i}.js").write_text(f"module.exports = function f{i}() {{ return '{MARKER}'; }};\n",
+                                               encoding="utf-8")
+
+    (root / "README.md").write_text("# Synthetic benchmark workspace\n", encoding="utf-8")
+    manifest = {"generator": GENERATOR, "files": files, "depth": depth, "fanout": fanout, "min_kb": min_kb, "max_kb": max_kb,
+                "binary_ratio": binary_ratio, "node_modules_files": node_modules_files, "seed": seed,
+                "binary_files": binaries, "total_bytes": total_bytes,
+                "sample_file": str(next(root.joinpath("src").rglob("module_*.py")).relative_to(root))}
+    (root / MANIFEST).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return manifest
+
+def load_or_generate(root, preset: str = "small", **overrides) -> dict:
+    """Reuse a workspace generated with the same parameters, otherwise (re)generate it"""
+    params = dict(PRESETS[preset], **{k: v for k, v in overrides.items() if v is not None})
+    root = Path(root)
+    try:
+        manifest = json.loads((root / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = None
+    if isinstance(manifest, dict) and manifest.get("generator") == GENERATOR:
+        if all(manifest.get(k) == v for k, v in params.items()):
+            return manifest
+        shutil.rmtree(root)
+    elif root.exists() and any(root.iterdir()):
+        raise ValueError(f"{root} is not empty and was not generated as a benchmark workspace; "
+                         f"refusing to replace it (choose another --workspace)")
+    return generate_workspace(root, **params)
@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from penelope.tools.file_tools import read_file, write_file, list_dir, replace_text
 from penelope.tools.terminal_tools import run_command, grep_search
 from penelope.tools.search_tools import search_files
+from penelope.core.response_cache import MODES as RESPONSE_CACHE_MODES, configure as configure_response_cache, create_message
 import anthropic
 
 class WindowChecker:
@@ -270,7 +271,8 @@ IMPORTANT: Use Windows paths and commands. For Android Studio, the path is typic
         max_iterations = 15
         for iteration in range(max_iterations):
             try:
-                response = self.client.messages.create(
+                response = create_message(
+                    self.client,
                     model=self.model,
                     system="""You are an autonomous AI that fixes application opening issues. You analyze why apps don't open and implement fixes completely independently.
 You have access to file manipulation tools. Use them to read code, understand the problem, and implement fixes.
@@ -530,8 +532,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Autonomous App Control Cycle")
     parser.add_argument("--app", help="App name to open", default="android studio")
     parser.add_argument("--max-iterations", type=int, default=10, help="Maximum iterations")
+    parser.add_argument("--response-cache", choices=RESPONSE_CACHE_MODES,
+                        help="Cache model responses on disk: read (read-through), record or replay")
     
     args = parser.parse_args()
+    if args.response_cache:
+        configure_response_cache(args.response_cache)
     
     success = run_app_control_cycle(
         app_name=args.app,
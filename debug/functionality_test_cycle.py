@@ -16,6 +16,7 @@ from dotenv import load_dotenv
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from penelope.core.agent import PenelopeAgent
+from penelope.core.response_cache import MODES as RESPONSE_CACHE_MODES, configure as configure_response_cache
 
 class FunctionalityTester:
     """Tests all Penelope functionality systematically"""
@@ -250,8 +251,12 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Penelope Functionality Test Cycle")
     parser.add_argument("--max-iterations", type=int, default=3, help="Maximum iterations")
+    parser.add_argument("--response-cache", choices=RESPONSE_CACHE_MODES,
+                        help="Cache model responses on disk: read (read-through), record or replay")
     
     args = parser.parse_args()
+    if args.response_cache:
+        configure_response_cache(args.response_cache)
     
     success = run_test_cycle(max_iterations=args.max_iterations)
     sys.exit(0 if success else 1)
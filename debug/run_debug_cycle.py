@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from penelope.tools.file_tools import read_file, write_file, list_dir, replace_text
 from penelope.tools.terminal_tools import run_command, grep_search
 from penelope.tools.search_tools import search_files
+from penelope.core.response_cache import MODES as RESPONSE_CACHE_MODES, configure as configure_response_cache, create_message
 import anthropic
 
 class AutonomousDebugger:
@@ -115,7 +116,8 @@ Start by reading the relevant files mentioned in the crash log, then implement t
         max_iterations = 15
         for iteration in range(max_iterations):
             try:
-                response = self.client.messages.create(
+                response = create_message(
+                    self.client,
                     model=self.model,
                     system="""You are an autonomous debugging AI. You analyze crashes and fix bugs completely independently.
 You have access to file manipulation tools. Use them to read code, understand the problem, and implement fixes.
@@ -234,10 +236,40 @@ Always be thorough - read the relevant files first, then make precise fixes.""",
         finally:
             os.chdir(original_cwd)
 
-def run_penelope(query: str, penelope_dir: Path) -> tuple[bool, str, str]:
-    """Runs Penelope with a query and returns success status and output"""
+def _run_penelope_daemon(query: str, penelope_dir: Path) -> Optional[tuple]:
+    """Run the query in a fresh session of a running `penelope serve` daemon, if any"""
+    from penelope.server.client import request, daemon_available
+
+    if not daemon_available():
+        return None
+    lines = []
+    def on_event(event):
+        if event.get("event") == "tool":
+            lines.append(f"[*] Tool: {event.get('name')} | {event.get('thought', '')}")
+
+    request({"op": "reset", "session": "debug-cycle"})
+    result = request({"op": "chat", "query": query, "session": "debug-cycle", "cwd": str(penelope_dir)}, on_event)
+    if result.get("event") == "error":
+        return False, "\n".join(lines), result.get("error", "")
+    return True, "\n".join(lines + [result.get("text", "")]), ""
+
+def run_penelope(query: str, penelope_dir: Path, use_daemon: bool = None) -> tuple[bool, str, str]:
+    """Runs Penelope with a query and returns success status and output
+
+    With use_daemon (default: PENELOPE_USE_DAEMON=1) the query goes to a running
+    daemon instead of a fresh interpreter. The daemon keeps already-imported
+    code, so restart it after the cycle patches Penelope's own modules.
+    """
     print(f"[*] Starting Penelope with query: {query}")
     
+    if use_daemon is None:
+        use_daemon = os.getenv("PENELOPE_USE_DAEMON", "").lower() in ("1", "true", "yes")
+    if use_daemon:
+        result = _run_penelope_daemon(query, penelope_dir)
+        if result is not None:
+            return result
+        print("[!] No Penelope daemon running, starting a new process")
+    
     cmd = [
         sys.executable,
         "run_penelope.py",
@@ -348,8 +380,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Autonomous Penelope Debug Cycle")
     parser.add_argument("--query", help="Test query to give Penelope", default=None)
     parser.add_argument("--max-iterations", type=int, default=10, help="Maximum iterations")
+    parser.add_argument("--response-cache", choices=RESPONSE_CACHE_MODES,
+                        help="Cache model responses on disk: read (read-through), record or replay")
     
     args = parser.parse_args()
+    if args.response_cache:
+        configure_response_cache(args.response_cache)
     
     success = run_debug_cycle(
         max_iterations=args.max_iterations,
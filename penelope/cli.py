@@ -1,19 +1,17 @@
 """
 Penelope Command Line Interface
 Provides a comprehensive CLI with subcommands for different operations
+
+Heavy imports (the agent and Anthropic SDK, rich Markdown/Table, the crash
+logger) are deferred to the commands that need them so simple subcommands
+start fast. Check with: python -m benchmarks.startup
 """
 import click
 import os
 import json
 from pathlib import Path
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from rich.box import DOUBLE
-from rich.table import Table
 from dotenv import load_dotenv
-from penelope.core.agent import PenelopeAgent
 import sys
 import importlib.util
 
@@ -29,10 +27,16 @@ def _import_crash_logger():
     spec.loader.exec_module(crash_logger_module)
     return crash_logger_module.log_crash
 
-log_crash = _import_crash_logger()
+def log_crash(exception: Exception, context: str = "General"):
+    """Log a crash, loading crash_logger on first use"""
+    return _import_crash_logger()(exception, context)
 
 def _get_prompt_box():
     """Create styled prompt box"""
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.box import DOUBLE
+
     prompt_label = Text("You", style="bold white")
     prompt_box = Panel(
         prompt_label,
@@ -51,21 +55,59 @@ def _get_prompt_box():
 
 @click.group()
 @click.version_option(version="1.0.0")
-def cli():
+@click.option('--profile', is_flag=True, help='Profile the whole run')
+@click.option('--profile-mode', type=click.Choice(['cprofile', 'sample']),
+              help='Profiler for --profile: cProfile (default) or the sampling profiler')
+@click.option('--profile-output', type=click.Path(dir_okay=False), help='Where to write the profile')
+@click.option('--profile-tools', help='Profile only these tools, e.g. grep_search or "*" for all')
+@click.pass_context
+def cli(ctx, profile, profile_mode, profile_output, profile_tools):
     """Penelope AI Assistant - Command Line Interface"""
-    pass
+    if profile_tools:
+        from penelope.tools.registry import enable_tool_profiling
+        enable_tool_profiling(profile_tools)
+    if profile or profile_mode or profile_output:
+        from penelope.tools.profile_tools import RunProfiler
+
+        profiler = RunProfiler(profile_mode or "cprofile", profile_output).start()
+
+        def report():
+            summary = profiler.stop()
+            click.echo(f"\n{summary}\n\nProfile written to {profiler.output}", err=True)
+        ctx.call_on_close(report)
 
 # ============================================================================
 # CHAT COMMAND
 # ============================================================================
 
+def _attach_session(agent, session_id, resume_latest):
+    """Persist the conversation; returns the session id (None when PENELOPE_SESSIONS=0)"""
+    if os.getenv("PENELOPE_SESSIONS", "1") == "0" and not (session_id or resume_latest):
+        return None
+    from penelope.core.session_store import get_store
+
+    store = get_store()
+    if resume_latest and not session_id:
+        session_id = store.latest_session()
+    resumed = bool(session_id) and store.exists(session_id)
+    session_id = agent.attach_session(store, session_id)
+    if resumed:
+        console.print(f"[dim]Resumed session {session_id} ({len(agent.history)} messages loaded)[/]")
+    return session_id
+
 @cli.command()
 @click.argument('query', required=False)
 @click.option('--interactive', '-i', is_flag=True, help='Start interactive chat mode')
-def chat(query, interactive):
+@click.option('--session', '-s', 'session_id', help='Resume (or create) a saved session by id')
+@click.option('--resume', '-r', is_flag=True, help='Resume the most recent session')
+def chat(query, interactive, session_id, resume):
     """Chat with Penelope AI Assistant"""
+    from rich.markdown import Markdown
+    from penelope.core.agent import PenelopeAgent
+
     try:
         agent = PenelopeAgent()
+        session_id = _attach_session(agent, session_id, resume)
     except Exception as e:
         console.print(f"[bold red]Error:[/] {e}")
         return
@@ -97,6 +139,80 @@ def chat(query, interactive):
                 log_path = log_crash(e, f"Chat Input: {user_input}")
                 console.print(f"\n[bold red]Crash gedetecteerd![/] Log opgeslagen in: [cyan]{log_path}[/]")
                 console.print(f"[red]{type(e).__name__}: {str(e)}[/]")
+                if session_id:
+                    console.print(f"[dim]Session saved; resume with: penelope chat --session {session_id}[/]")
+
+@cli.command()
+@click.option('--limit', '-n', default=20, help='Number of sessions to show')
+@click.option('--delete', 'delete_id', help='Delete a saved session')
+def sessions(limit, delete_id):
+    """List saved chat sessions"""
+    import time
+    from rich.table import Table
+    from penelope.core.session_store import get_store
+
+    store = get_store()
+    if delete_id:
+        store.delete(delete_id)
+        console.print(f"Deleted session {delete_id}")
+        return
+    table = Table(title="Saved Penelope Sessions")
+    table.add_column("Session", style="cyan")
+    table.add_column("Updated", style="green")
+    table.add_column("Messages", justify="right")
+    table.add_column("Title")
+    for session in store.list_sessions(limit):
+        updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["updated"]))
+        table.add_row(session["id"], updated, str(session["messages"]), session["title"] or "")
+    console.print(table)
+
+@cli.command()
+@click.argument('input_file', type=click.Path(exists=True, dir_okay=False))
+@click.option('--output', '-o', help='Results JSONL (default: <input>.results.jsonl)')
+@click.option('--workers', '-w', default=4, help='Concurrent agents')
+@click.option('--timeout', '-t', default=300.0, help='Per-item timeout in seconds')
+@click.option('--restart', is_flag=True, help='Discard previous results instead of resuming')
+@click.option('--retry-failed', is_flag=True, help='Re-run items whose previous result was an error or timeout')
+def batch(input_file, output, workers, timeout, restart, retry_failed):
+    """Run queries from a JSONL file with concurrent agents"""
+    from penelope.core.batch import run_batch
+
+    def show(record):
+        style = "green" if record["status"] == "ok" else "red"
+        tokens = record.get("usage", {})
+        console.print(f"[{style}]{record['status']:>7}[/] {record['id']} ({record['seconds']:.1f}s, "
+                      f"{tokens.get('input_tokens', 0)} in / {tokens.get('output_tokens', 0)} out tokens)"
+                      + (f" {record['error']}" if record.get("error") else ""))
+
+    try:
+        totals = run_batch(input_file, output, workers, timeout, restart, retry_failed, on_result=show)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/] {e}")
+        return
+    console.print(f"[bold]Batch done:[/] {totals.get('ok', 0)} ok, {totals.get('error', 0)} errors, "
+                  f"{totals.get('timeout', 0)} timeouts, {totals['skipped']} skipped of {totals['total']} "
+                  f"in {totals['seconds']:.1f}s; {totals.get('input_tokens', 0)} input / "
+                  f"{totals.get('output_tokens', 0)} output tokens")
+    console.print(f"Results: [cyan]{totals['output']}[/]")
+
+@cli.command()
+@click.option('--prune', is_flag=True, help='Remove expired entries and enforce the size limit')
+@click.option('--clear', is_flag=True, help='Remove every cached response')
+def cache(prune, clear):
+    """Show the model response cache (enable with PENELOPE_RESPONSE_CACHE=read|record|replay)"""
+    from penelope.core.response_cache import ResponseCache, get_response_cache
+
+    store = get_response_cache() or ResponseCache()
+    if clear:
+        console.print(f"Removed {store.clear()} cached responses")
+        return
+    if prune:
+        console.print(f"Removed {store.prune()} expired or evicted responses")
+    info = store.describe()
+    mode = os.getenv("PENELOPE_RESPONSE_CACHE") or "off"
+    console.print(f"[bold]Response cache[/] ({mode}): {info['directory']}")
+    console.print(f"{info['entries']} entries, {info['bytes'] / 1024 / 1024:.1f} of "
+                  f"{info['max_bytes'] / 1024 / 1024:.0f} MB, TTL {info['ttl'] / 3600:g}h")
 
 # ============================================================================
 # IDE COMMANDS
@@ -148,8 +264,12 @@ def vscode(action, path, command):
 @click.option('--path', '-p', default='.', help='Repository path')
 @click.option('--message', '-m', help='Commit message')
 @click.option('--files', '-f', help='Files to add')
+@click.option('--file', 'file_path', help='File (show_file_at, blame_range)')
 @click.option('--branch', '-b', help='Branch name')
-def git(action, path, message, files, branch):
+@click.option('--rev', '-r', help='Revision (show_file_at, show_object, list_tree, diff_stat, blame_range)')
+@click.option('--all-repos', is_flag=True, help='Run on every repository under --path')
+@click.option('--workers', '-w', default=8, help='Parallel workers for --all-repos')
+def git(action, path, message, files, file_path, branch, rev, all_repos, workers):
     """Control Git operations"""
     from penelope.tools.ide_tools import control_git
     
@@ -158,8 +278,15 @@ def git(action, path, message, files, branch):
         kwargs['message'] = message
     if files:
         kwargs['files'] = files
+    if file_path:
+        kwargs['file'] = file_path
     if branch:
         kwargs['branch_name'] = branch
+    if rev:
+        kwargs['rev'] = rev
+    if all_repos:
+        kwargs['all_repos'] = True
+        kwargs['max_workers'] = workers
     
     result = control_git(action, **kwargs)
     console.print(result)
@@ -275,33 +402,15 @@ def run(command, cwd):
 @cli.command()
 def tools():
     """List all available tools"""
+    from rich.table import Table
+    from penelope.tools.registry import tool_descriptions
+
     try:
-        agent = PenelopeAgent()
         table = Table(title="Available Penelope Tools")
         table.add_column("Tool Name", style="cyan")
         table.add_column("Description", style="green")
         
-        # Get system prompt to extract tool info
-        prompt = agent.get_system_prompt()
-        # Parse tools from prompt (simplified)
-        tools_list = [
-            ("read_file", "Read file contents"),
-            ("write_file", "Write content to file"),
-            ("replace_text", "Replace text in file"),
-            ("list_dir", "List directory contents"),
-            ("run_command", "Run shell command"),
-            ("grep_search", "Search for patterns in files"),
-            ("search_files", "Search files with regex"),
-            ("open_app", "Open Windows applications"),
-            ("control_android_studio", "Control Android Studio"),
-            ("control_cursor", "Control Cursor IDE"),
-            ("control_vscode", "Control VS Code"),
-            ("control_git", "Git operations"),
-            ("control_python", "Python development tools"),
-            ("control_npm", "npm/Node.js operations"),
-        ]
-        
-        for tool_name, description in tools_list:
+        for tool_name, description in tool_descriptions():
             table.add_row(tool_name, description)
         
         console.print(table)
@@ -311,6 +420,8 @@ def tools():
 @cli.command()
 def info():
     """Show Penelope information"""
+    from rich.table import Table
+
     info_table = Table(title="Penelope AI Assistant")
     info_table.add_column("Property", style="cyan")
     info_table.add_column("Value", style="green")
@@ -324,6 +435,68 @@ def info():
     
     console.print(info_table)
 
+# ============================================================================
+# DAEMON COMMANDS
+# ============================================================================
+
+@cli.command()
+@click.option('--socket', 'socket_path', help='Unix socket path (default: ~/.penelope/penelope.sock)')
+@click.option('--port', default=0, help='TCP port on 127.0.0.1 where Unix sockets are unavailable')
+@click.option('--metrics-port', type=int, help='Expose Prometheus metrics on 127.0.0.1:PORT/metrics')
+def serve(socket_path, port, metrics_port):
+    """Run Penelope as a daemon that keeps sessions and caches warm"""
+    from penelope.server.daemon import serve as run_daemon
+
+    try:
+        run_daemon(socket_path, port, metrics_port=metrics_port)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/] {e}")
+
+@cli.command()
+@click.option('--host', default='127.0.0.1', help='Interface to bind (default: localhost only)')
+@click.option('--port', default=8765, help='HTTP port')
+@click.option('--max-concurrent', default=4, help='Agent turns running at the same time')
+@click.option('--max-queue', default=32, help='Turns allowed to wait for a slot before returning 429')
+@click.option('--metrics-port', type=int, help='Expose Prometheus metrics on 127.0.0.1:PORT/metrics')
+def api(host, port, max_concurrent, max_queue, metrics_port):
+    """Run the HTTP/JSON API server for concurrent agent sessions"""
+    from penelope.server.http_api import run_server
+
+    run_server(host, port, max_concurrent, max_queue, metrics_port)
+
+@cli.command(context_settings={"ignore_unknown_options": True, "allow_extra_args": True})
+@click.pass_context
+def ask(ctx):
+    """Send a query to the running daemon (see: penelope serve)"""
+    from penelope.server.client import main as client_main
+    sys.exit(client_main(ctx.args))
+
+# ============================================================================
+# TRACE COMMANDS
+# ============================================================================
+
+@cli.group()
+def trace():
+    """Inspect agent traces (enable with PENELOPE_TRACE=jsonl or otlp)"""
+    pass
+
+@trace.command()
+@click.argument('trace_file', required=False, type=click.Path(exists=True, dir_okay=False))
+@click.option('--last', '-n', type=int, help='Only the last N turns')
+@click.option('--session', '-s', help='Only turns of this session id')
+def summarize(trace_file, last, session):
+    """Show where time went in traced agent turns"""
+    from penelope.core.tracing import TRACE_DIR, summarize_trace
+
+    if not trace_file:
+        files = sorted(TRACE_DIR.glob("trace-*.jsonl"))
+        if not files:
+            console.print(f"[bold red]Error:[/] no trace files in {TRACE_DIR}")
+            return
+        trace_file = files[-1]
+    console.print(f"[dim]{trace_file}[/]")
+    console.print(summarize_trace(trace_file, last, session), markup=False, highlight=False)
+
 # ============================================================================
 # MAIN ENTRY POINT
 # ============================================================================
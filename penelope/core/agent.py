@@ -1,12 +1,59 @@
 import os
 import json
-import anthropic
+import threading
+import time
 from typing import Dict, Any, List
-from penelope.tools.file_tools import read_file, write_file, list_dir, replace_text
-from penelope.tools.terminal_tools import run_command, grep_search, open_app
-from penelope.tools.search_tools import search_files
-from penelope.tools.android_studio_tools import control_android_studio, new_android_project, open_gemini_agent, send_message_to_gemini, type_in_gemini_chat
-from penelope.tools.ide_tools import control_cursor, control_vscode, control_git, control_python, control_npm
+from penelope.tools.registry import load_tools
+from penelope.tools.output_tools import shape_output
+from penelope.tools import file_cache
+from penelope.tools.file_cache import prefetch_from_result
+from penelope.tools.pack_tools import output_chars
+from penelope.core.tracing import get_tracer
+from penelope.core.response_cache import create_message
+from penelope.core.tool_memo import ToolMemo, mutates_git
+from penelope.core import metrics
+
+# Tools that never change the workspace; any other tool invalidates cached git status.
+# control_git invalidates the cache itself for its mutating actions.
+READ_ONLY_TOOLS = {
+    "read_file", "outline_file", "read_many", "list_dir", "grep_search", "search_files", "read_output",
+    "job_status", "job_output", "control_git"
+}
+
+# Agents with their own working_dir (daemon and server sessions) pass it to tools through
+# their parameters: tool -> (path parameters resolved against working_dir and their defaults,
+# parameter that takes working_dir as the command's cwd). Tools not listed here take no
+# paths at all.
+PATH_PARAMS = {
+    "read_file": ({"path": ""}, None),
+    "write_file": ({"path": ""}, None),
+    "replace_text": ({"path": ""}, None),
+    "list_dir": ({"path": "."}, None),
+    "outline_file": ({"path": ""}, None),
+    "grep_search": ({"path": "."}, None),
+    "search_files": ({"directory": "."}, None),
+    "run_command": ({"cwd": "."}, None),
+    "start_job": ({"cwd": "."}, None),
+    "control_git": ({"path": "."}, None),
+    "control_npm": ({"path": "."}, None),
+    "control_python": ({}, "cwd"),
+}
+
+# Tools that act on the process working directory implicitly (the desktop and IDE tools);
+# they still chdir into working_dir, one at a time under this lock
+CHDIR_TOOLS = {
+    "open_app", "control_android_studio", "new_android_project", "open_gemini_agent",
+    "send_message_to_gemini", "type_in_gemini_chat", "control_cursor", "control_vscode"
+}
+_CWD_LOCK = threading.Lock()
+
+class ChatCancelled(Exception):
+    """Raised by PenelopeAgent.chat when cancel() was called during a turn"""
+
+def _anthropic():
+    """Import the Anthropic SDK on first use; it dominates Penelope's import time"""
+    import anthropic
+    return anthropic
 
 class PenelopeAgent:
     def __init__(self):
@@ -15,29 +62,126 @@ class PenelopeAgent:
             raise ValueError("No valid ANTHROPIC_API_KEYs found in .env")
         
         self.current_key_index = 0
-        self.client = anthropic.Anthropic(api_key=self.api_keys[self.current_key_index])
+        metrics.KEYS_CONFIGURED.set(len(self.api_keys))
+        self.client = _anthropic().Anthropic(api_key=self.api_keys[self.current_key_index])
         self.model = os.getenv("ANTHROPIC_MODEL", "claude-3-haiku-20240307")
         self.history = []
-        self.tools = {
-            "read_file": read_file,
-            "write_file": write_file,
-            "replace_text": replace_text,
-            "list_dir": list_dir,
-            "run_command": run_command,
-            "grep_search": grep_search,
-            "search_files": search_files,
-            "open_app": open_app,
-            "control_android_studio": control_android_studio,
-            "new_android_project": new_android_project,
-            "open_gemini_agent": open_gemini_agent,
-            "send_message_to_gemini": send_message_to_gemini,
-            "type_in_gemini_chat": type_in_gemini_chat,
-            "control_cursor": control_cursor,
-            "control_vscode": control_vscode,
-            "control_git": control_git,
-            "control_python": control_python,
-            "control_npm": control_npm
-        }
+        # Tool implementations are imported on first call (see penelope.tools.registry)
+        self.tools = load_tools()
+        # Optional per-agent working directory for tool calls (None = process cwd)
+        self.working_dir = None
+        # Optional callback(event, data) for progress events; defaults to printing tool calls
+        self.on_event = None
+        self._cancelled = threading.Event()
+        # Cumulative token usage reported by the API
+        self.usage = {"requests": 0, "input_tokens": 0, "output_tokens": 0,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        # Results of read-only tool calls, reused while nothing has changed (see penelope.core.tool_memo)
+        self.tool_memo = ToolMemo() if os.getenv("PENELOPE_TOOL_MEMO", "1") != "0" else None
+        # Optional persistent session (see penelope.core.session_store)
+        self.store = None
+        self.session_id = None
+
+    def cancel(self):
+        """Stop the running chat turn before its next model call (thread-safe)"""
+        self._cancelled.set()
+
+    def clear_cancel(self):
+        """Forget a cancel() that no turn has consumed; call when a new turn is accepted"""
+        self._cancelled.clear()
+
+    def attach_session(self, store, session_id: str = None, resume: bool = True) -> str:
+        """Persist history to a session store; resumes the session's tail if it exists"""
+        self.store = store
+        if session_id and resume and store.exists(session_id):
+            self.session_id = session_id
+            self.history = store.load(session_id)
+            if self.history and self.history[-1]["role"] == "user":
+                # Interrupted mid-turn (crash): close the turn so the next query is not dropped
+                self._append({"role": "assistant", "content": "(The previous turn was interrupted.)"})
+        else:
+            self.session_id = store.create_session(session_id, cwd=self.working_dir)
+            for message in self.history:
+                store.append(self.session_id, message["role"], message["content"])
+        return self.session_id
+
+    def _append(self, message: dict):
+        self.history.append(message)
+        if self.store:
+            self.store.append(self.session_id, message["role"], message["content"])
+
+    def _record_usage(self, response, span):
+        self.usage["requests"] += 1
+        usage = getattr(response, "usage", None)
+        for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"):
+            count = getattr(usage, field, None) or 0
+            self.usage[field] += count
+            span.set(**{field: count})
+            if count:
+                metrics.TOKENS.inc(count, model=self.model, type=field.replace("_tokens", ""))
+        span.set(stop_reason=getattr(response, "stop_reason", None) or "")
+
+    def _emit(self, event: str, **data):
+        if self.on_event:
+            self.on_event(event, data)
+        elif event == "tool":
+            print(f"[*] Tool: {data['name']} | {data.get('thought', '')}")
+
+    def _tool_params(self, tool_name: str, params: dict) -> dict:
+        """params with relative paths resolved against working_dir"""
+        params = dict(params)
+        if tool_name == "read_many":
+            from penelope.tools.pack_tools import parse_specs
+            params["paths"] = [{"path": os.path.join(self.working_dir, path), "start_line": start, "end_line": end}
+                               for path, start, end in parse_specs(params.get("paths"))]
+            return params
+        paths, cwd_param = PATH_PARAMS.get(tool_name, ({}, None))
+        for name, default in paths.items():
+            value = params.get(name) or default
+            if value and isinstance(value, str):
+                params[name] = os.path.join(self.working_dir, value)
+        if cwd_param:
+            params[cwd_param] = self.working_dir
+        return params
+
+    def _run_tool(self, tool_name: str, params: dict):
+        if not self.working_dir:
+            return self.tools[tool_name](**params)
+        if tool_name not in CHDIR_TOOLS:
+            return self.tools[tool_name](**self._tool_params(tool_name, params))
+        with _CWD_LOCK:
+            previous = os.getcwd()
+            os.chdir(self.working_dir)
+            try:
+                return self.tools[tool_name](**params)
+            finally:
+                os.chdir(previous)
+
+    def _call_tool(self, tool_name: str, params: dict, span) -> str:
+        """Run a tool (or reuse its memoized result) and shape the output for the history"""
+        cwd = self.working_dir or os.getcwd()
+
+        # read_many sizes its own output to the requested token budget
+        max_chars = output_chars(params) if tool_name == "read_many" else None
+
+        def run():
+            result = shape_output(self._run_tool(tool_name, params), tool_name, max_chars)
+            # Warm the file cache for the reads that usually follow a listing or search
+            prefetch_from_result(tool_name, params, result, cwd)
+            return result
+
+        if self.tool_memo is None:
+            return run()
+        result, hit = self.tool_memo.call(tool_name, params, cwd, run)
+        if not hit:
+            return result
+        span.set(memo="hit")
+        metrics.TOOL_MEMO_HITS.inc(tool=tool_name)
+        message = f"Tool Result ({tool_name}):\n{result}"
+        if any(m["content"] == message for m in self.history if m["role"] == "user"):
+            # The full result is still in the conversation; don't pay for it twice
+            return "(Same as the earlier call with these arguments; nothing has changed since. See that result above.)"
+        return result
 
     def _load_keys(self) -> List[str]:
         keys = []
@@ -53,10 +197,13 @@ class PenelopeAgent:
             keys.append(standard_key)
         return keys
 
-    def _switch_key(self):
+    def _switch_key(self, reason: str = "manual"):
         if len(self.api_keys) > 1:
+            previous = self.current_key_index
             self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            self.client = anthropic.Anthropic(api_key=self.api_keys[self.current_key_index])
+            get_tracer().event("agent.key_switch", from_key=previous, to_key=self.current_key_index, reason=reason)
+            metrics.KEY_SWITCHES.inc(reason=reason)
+            self.client = _anthropic().Anthropic(api_key=self.api_keys[self.current_key_index])
             return True
         return False
 
@@ -65,13 +212,17 @@ class PenelopeAgent:
 You act as a pair programmer with full system access.
 
 CORE WORKFLOW:
-1. EXPLORE: Use 'list_dir', 'grep_search', and 'read_file' to understand the codebase.
+1. EXPLORE: Use 'list_dir', 'grep_search', 'outline_file' and 'read_file' to understand the codebase.
+   Outline large source files first and read only the line ranges you need; use 'read_many'
+   instead of several read_file calls when you need context from more than one file.
 2. PLAN: Explain your thought process to the user.
 3. EXECUTE: Use 'write_file' to apply changes and 'run_command' to test or run code.
 4. ITERATE: If a command fails or a file isn't what you expected, adjust your approach.
 
 TOOLS:
-- read_file(path) -> str
+- read_file(path, start_line=None, end_line=None) -> str (Whole file, or numbered lines start_line..end_line)
+- outline_file(path) -> str (Classes, functions with signatures and line ranges, constants; Python, JS/TS, Kotlin, Java)
+- read_many(paths, max_tokens=2000, query=None) -> str (Several files or "path:start-end" ranges in one call, packed into max_tokens; files most relevant to the query regex are kept whole)
 - write_file(path, content) -> str
 - replace_text(path, old_text, new_text) -> str
 - list_dir(path=".") -> str
@@ -86,9 +237,15 @@ TOOLS:
 - type_in_gemini_chat(message) -> str (Types text in Gemini's chat input without sending)
 - control_cursor(action, **kwargs) -> str (Control Cursor IDE: "open_project", "open_file", "new_file", "open_composer", "send_to_composer", etc.)
 - control_vscode(action, **kwargs) -> str (Control VS Code: "open_project", "open_file", "open_terminal", "run_command")
-- control_git(action, **kwargs) -> str (Git operations: "init", "status", "add", "commit", "push", "pull", "branch", "log")
-- control_python(action, **kwargs) -> str (Python tools: "run_script", "install_package", "run_tests", "create_venv")
-- control_npm(action, **kwargs) -> str (npm operations: "init", "install", "run_script", "build")
+- control_git(action, **kwargs) -> str (Git operations: "init", "status" (compact cached summary; raw=true for plain text), "add", "commit", "push", "pull", "branch", "log", "show_file_at" (file, rev), "show_object" (rev), "list_tree" (rev, dir), "diff_stat" (base, rev), "blame_range" (file, start, end, rev); all_repos=true runs the action on every repository under path in parallel)
+- control_python(action, **kwargs) -> str (Python tools: "run_script", "install_package", "run_tests", "create_venv" (requirements=... reuses a cached environment), "install_requirements" (managed=true for a cached environment), "check_syntax" (path: file, directory or list; checks everything in one call), "run_tests" with smart=true (only affected tests, failed first, in parallel shards), "profile_code" (path, top), "compare_profiles" (base, new), "sample_profile" (path); run_script/run_tests accept background=true)
+- control_npm(action, **kwargs) -> str (npm operations: "init", "install" (skipped automatically when package.json and the lockfile are unchanged, no need to install before every build), "run_script", "build"; "start" always runs in the background, run_script/build/test/lint accept background=true)
+- read_output(handle, start_line=1, max_lines=200) -> str (Page through a long tool output that was truncated; the handle is shown in the truncation marker)
+- start_job(command, cwd=None) -> str (Run a shell command in the background and return a job id immediately; use it to run builds, tests and linters in parallel)
+- job_status(job_id=None) -> str (Status of one job or the whole job table)
+- job_output(job_id, lines=50) -> str (Last lines of a job's output)
+- wait_job(job_id, timeout=60) -> str (Wait for a job to finish)
+- kill_job(job_id) -> str (Stop a running job)
 
 RESPONSE FORMAT:
 To use a tool, you MUST output a single JSON object:
@@ -102,39 +259,98 @@ Wait for the result. If you are done, simply talk to the user.
 """
 
     def chat(self, user_input: str):
+        tracer = get_tracer()
+        usage_before = dict(self.usage)
+        started = time.perf_counter()
+        status = "error"
+        try:
+            with tracer.span("agent.turn", model=self.model, **{"session.id": self.session_id or ""}) as turn:
+                response = self._chat(user_input, tracer)
+                turn.set(**{field: self.usage[field] - usage_before[field] for field in self.usage})
+                status = "ok"
+                return response
+        except ChatCancelled:
+            status = "cancelled"
+            if self.history and self.history[-1]["role"] == "user":
+                # Close the turn so the next query is not taken for its continuation
+                self._append({"role": "assistant", "content": "(Cancelled.)"})
+            raise
+        finally:
+            metrics.AGENT_TURNS.inc(status=status)
+            metrics.AGENT_TURN_SECONDS.observe(time.perf_counter() - started)
+
+    def _chat(self, user_input: str, tracer):
+        anthropic = _anthropic()
         if not self.history or self.history[-1]["role"] != "user":
-            self.history.append({"role": "user", "content": user_input})
+            self._append({"role": "user", "content": user_input})
         
         # Max iteration to prevent infinite loops
-        for _ in range(10):
+        for iteration in range(10):
+            if self._cancelled.is_set():
+                self._cancelled.clear()
+                raise ChatCancelled("Chat turn was cancelled")
+            request_started = time.perf_counter()
             try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    system=self.get_system_prompt(),
-                    messages=self.history,
-                    max_tokens=4000
-                )
-            except (anthropic.RateLimitError, anthropic.AuthenticationError):
-                if self._switch_key(): continue
+                with tracer.span("model.request", model=self.model, iteration=iteration,
+                                 key_index=self.current_key_index, messages=len(self.history)) as span:
+                    response = create_message(
+                        self.client,
+                        model=self.model,
+                        system=self.get_system_prompt(),
+                        messages=self.history,
+                        max_tokens=4000
+                    )
+                    if getattr(response, "cached", False):
+                        span.set(response_cache="hit")
+                    self._record_usage(response, span)
+            except (anthropic.RateLimitError, anthropic.AuthenticationError) as e:
+                reason = "rate_limit" if isinstance(e, anthropic.RateLimitError) else "auth"
+                metrics.MODEL_REQUESTS.inc(model=self.model, status=reason)
+                if self._switch_key(reason): continue
+                raise
+            except Exception:
+                metrics.MODEL_REQUESTS.inc(model=self.model, status="error")
                 raise
+            if getattr(response, "cached", False):
+                # Served from the response cache: no API call, so no latency sample either
+                metrics.MODEL_REQUESTS.inc(model=self.model, status="cached")
+            else:
+                metrics.MODEL_REQUESTS.inc(model=self.model, status="ok")
+                metrics.MODEL_REQUEST_SECONDS.observe(time.perf_counter() - request_started, model=self.model)
 
             ai_content = response.content[0].text
-            self.history.append({"role": "assistant", "content": ai_content})
+            self._append({"role": "assistant", "content": ai_content})
 
             # Try to extract JSON for tool call
             try:
                 if "{" in ai_content and "}" in ai_content:
                     start = ai_content.find("{")
                     end = ai_content.rfind("}") + 1
-                    data = json.loads(ai_content[start:end])
+                    with tracer.span("agent.parse", chars=end - start):
+                        data = json.loads(ai_content[start:end])
                     
                     if "action" in data:
                         tool_name = data["action"]
                         params = data.get("params", {})
                         if tool_name in self.tools:
-                            print(f"[*] Tool: {tool_name} | {data.get('thought', '')}")
-                            result = self.tools[tool_name](**params)
-                            self.history.append({"role": "user", "content": f"Tool Result ({tool_name}):\n{result}"})
+                            self._emit("tool", name=tool_name, thought=data.get('thought', ''), params=params)
+                            tool_started = time.perf_counter()
+                            with tracer.span("tool.execute", **{"tool.name": tool_name}) as tool_span:
+                                result = self._call_tool(tool_name, params, tool_span)
+                                tool_span.set(**{"output.chars": len(result)})
+                                if result.startswith("Error"):
+                                    tool_span.fail(result.splitlines()[0][:200])
+                            self._emit("tool_result", name=tool_name, seconds=time.perf_counter() - tool_started,
+                                       chars=len(result))
+                            if tool_name not in READ_ONLY_TOOLS:
+                                from penelope.tools.git_backend import invalidate_status
+                                invalidate_status()
+                            if tool_name not in READ_ONLY_TOOLS or mutates_git(tool_name, params):
+                                # Commands, checkouts and installs can rewrite files within one mtime tick
+                                file_cache.invalidate()
+                                if self.tool_memo:
+                                    self.tool_memo.clear()
+                            self._append({"role": "user", "content": f"Tool Result ({tool_name}):\n{result}"})
                             continue
             except:
                 pass
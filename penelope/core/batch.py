@@ -0,0 +1,235 @@
+"""
+Batch Runner for Penelope
+Runs many queries from a JSONL file with a pool of concurrent agents. Each
+input line is a JSON object ({"query": ..., "id": ..., "cwd": ..., "timeout": ...})
+or a bare JSON string. Results are appended to a JSONL file as each item
+finishes; items whose id is already in the results file are skipped, so an
+interrupted batch resumes where it stopped.
+
+Items without a cwd run in the directory the batch was started from. An item
+with a timeout runs in a worker process; when the timeout expires the worker
+is killed, with the model request and any tool subprocess it is waiting on,
+and replaced for the next item. agent_factory must then be picklable (a
+module-level function).
+"""
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+def read_items(input_path: str) -> list:
+    """Parse the input JSONL into item dicts with an id and a query"""
+    items, seen = [], set()
+    with open(input_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{input_path}:{number}: invalid JSON ({e})")
+            item = {"query": data} if isinstance(data, str) else dict(data)
+            if not item.get("query"):
+                raise ValueError(f"{input_path}:{number}: missing 'query'")
+            item["id"] = str(item.get("id") or f"line-{number}")
+            if item["id"] in seen:
+                raise ValueError(f"{input_path}:{number}: duplicate id '{item['id']}'")
+            seen.add(item["id"])
+            items.append(item)
+    return items
+
+def completed_ids(output_path: str, retry_failed: bool = False) -> set:
+    """Ids already recorded in a results file (a torn last line is ignored)"""
+    done, failed = set(), set()
+    path = Path(output_path)
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                (done if record["status"] == "ok" else failed).add(record["id"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    # An id that eventually succeeded counts as done even if earlier attempts failed
+    return done if retry_failed else done | failed
+
+def _worker_main(conn, agent_factory):
+    """Worker process: run items sent over conn until None arrives"""
+    if hasattr(os, "setsid"):
+        os.setsid()  # own process group, so a timeout kills the tool subprocesses too
+    runner = BatchRunner(workers=1, timeout=0, agent_factory=agent_factory)
+    while True:
+        item = conn.recv()
+        if item is None:
+            break
+        conn.send(runner.run_item(item))
+
+class BatchRunner:
+    """Thread pool of agents, one reusable agent (and HTTP client) or worker process per thread"""
+
+    def __init__(self, workers: int = 4, timeout: float = 300, agent_factory=None):
+        self.workers = workers
+        self.timeout = timeout
+        self.agent_factory = agent_factory
+        self.cwd = os.getcwd()
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._workers = []
+        self._workers_lock = threading.Lock()
+
+    def _agent(self):
+        agent = getattr(self._local, "agent", None)
+        if agent is None:
+            if self.agent_factory:
+                agent = self.agent_factory()
+            else:
+                from penelope.core.agent import PenelopeAgent
+                agent = PenelopeAgent()
+            self._local.agent = agent
+        agent.history = []
+        agent.clear_cancel()  # a timeout that fired as the previous item finished
+        for key in agent.usage:
+            agent.usage[key] = 0
+        return agent
+
+    def _worker(self):
+        worker = getattr(self._local, "worker", None)
+        if worker is None or not worker[0].is_alive():
+            conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.get_context("spawn").Process(
+                target=_worker_main, args=(child_conn, self.agent_factory), daemon=True)
+            process.start()
+            child_conn.close()
+            worker = self._local.worker = (process, conn)
+            with self._workers_lock:
+                self._workers.append(worker)
+        return worker
+
+    def _kill(self, worker):
+        process, conn = worker
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except OSError:
+            pass
+        process.join(5)
+        conn.close()
+        self._local.worker = None
+
+    def close(self):
+        """Stop the worker processes"""
+        with self._workers_lock:
+            workers, self._workers = self._workers, []
+        for process, conn in workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+
+    def run_item(self, item: dict) -> dict:
+        """Run one item; with a timeout it runs in a worker process that is killed when it expires"""
+        item = dict(item, cwd=os.path.abspath(os.path.join(self.cwd, item.get("cwd") or ".")))
+        timeout = item.get("timeout") or self.timeout
+        if not timeout:
+            return self._run_here(item)
+
+        started = time.perf_counter()
+        record = {"id": item["id"], "query": item["query"], "cwd": item["cwd"],
+                  "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        try:
+            worker = self._worker()
+        except Exception as e:
+            record["status"], record["error"] = "error", f"Could not start a worker process: {type(e).__name__}: {e}"
+            worker = None
+        try:
+            if worker is not None:
+                worker[1].send(dict(item, timeout=None))
+                if worker[1].poll(timeout):
+                    return worker[1].recv()
+                self._kill(worker)
+                record["status"], record["error"] = "timeout", f"Timed out after {timeout}s"
+        except (EOFError, OSError) as e:
+            self._kill(worker)
+            record["status"], record["error"] = "error", f"Worker process exited ({type(e).__name__})"
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        record["tool_calls"], record["tool_seconds"] = 0, 0.0
+        return record
+
+    def _run_here(self, item: dict) -> dict:
+        record = {"id": item["id"], "query": item["query"], "cwd": item["cwd"],
+                  "started": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        started = time.perf_counter()
+        tools = {"calls": 0, "seconds": 0.0}
+        try:
+            agent = self._agent()
+            agent.working_dir = item["cwd"]
+
+            def on_event(event, data):
+                if event == "tool_result":
+                    tools["calls"] += 1
+                    tools["seconds"] += data.get("seconds", 0)
+            agent.on_event = on_event
+
+            record["response"] = agent.chat(item["query"])
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"], record["error"] = "error", f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        record["tool_calls"] = tools["calls"]
+        record["tool_seconds"] = round(tools["seconds"], 3)
+        agent = getattr(self._local, "agent", None)
+        if agent is not None:
+            record["usage"] = dict(agent.usage)
+            record["messages"] = len(agent.history)
+            agent.on_event = None
+        return record
+
+    def run(self, items: list, output_path: str, on_result=None) -> dict:
+        """Run items concurrently, appending each result to output_path as it finishes"""
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        totals = {"ok": 0, "error": 0, "timeout": 0, "input_tokens": 0, "output_tokens": 0}
+        started = time.perf_counter()
+        try:
+            with open(output_path, "a", encoding="utf-8") as out, \
+                    ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="penelope-batch") as pool:
+                futures = [pool.submit(self.run_item, item) for item in items]
+                for future in as_completed(futures):
+                    record = future.result()
+                    with self._write_lock:
+                        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        out.flush()
+                    totals[record["status"]] += 1
+                    for key in ("input_tokens", "output_tokens"):
+                        totals[key] += record.get("usage", {}).get(key, 0)
+                    if on_result:
+                        on_result(record)
+        finally:
+            self.close()
+        totals["seconds"] = round(time.perf_counter() - started, 3)
+        return totals
+
+def run_batch(input_path: str, output_path: str = None, workers: int = 4, timeout: float = 300,
+              restart: bool = False, retry_failed: bool = False, on_result=None, agent_factory=None) -> dict:
+    """Run a JSONL batch; returns totals including how many items were skipped as already done"""
+    output_path = output_path or str(Path(input_path).with_suffix("")) + ".results.jsonl"
+    items = read_items(input_path)
+    if restart and Path(output_path).exists():
+        Path(output_path).unlink()
+    done = completed_ids(output_path, retry_failed)
+    pending = [item for item in items if item["id"] not in done]
+    runner = BatchRunner(workers=workers, timeout=timeout, agent_factory=agent_factory)
+    totals = runner.run(pending, output_path, on_result) if pending else {"seconds": 0}
+    totals.update(total=len(items), skipped=len(items) - len(pending), output=output_path)
+    return totals
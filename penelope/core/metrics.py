@@ -0,0 +1,190 @@
+"""
+Metrics for Penelope
+Minimal in-process registry of counters, gauges and histograms rendered in
+the Prometheus text exposition format (0.0.4). The agent, the API key pool
+and every registry-loaded tool record into it; collecting is always on and
+cheap, exposing it is opt-in:
+
+    penelope serve --metrics-port 9464      (or PENELOPE_METRICS_PORT=9464)
+    curl http://127.0.0.1:9464/metrics
+"""
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+MODEL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, k)} {_number(v)}" for k, v in items]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, labelnames: tuple, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._get(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+# Metrics recorded by Penelope itself
+AGENT_TURNS = REGISTRY.counter("penelope_agent_turns_total", "Agent chat turns by outcome", ("status",))
+AGENT_TURN_SECONDS = REGISTRY.histogram("penelope_agent_turn_seconds", "Duration of agent chat turns", buckets=MODEL_BUCKETS)
+MODEL_REQUESTS = REGISTRY.counter("penelope_model_requests_total", "Model API requests by outcome", ("model", "status"))
+MODEL_REQUEST_SECONDS = REGISTRY.histogram("penelope_model_request_seconds", "Model API request latency",
+                                           ("model",), buckets=MODEL_BUCKETS)
+TOKENS = REGISTRY.counter("penelope_tokens_total", "Tokens reported by the model API", ("model", "type"))
+KEY_SWITCHES = REGISTRY.counter("penelope_api_key_switches_total", "API key rotations by cause", ("reason",))
+KEYS_CONFIGURED = REGISTRY.gauge("penelope_api_keys_configured", "API keys available to the key pool")
+TOOL_CALLS = REGISTRY.counter("penelope_tool_calls_total", "Tool calls by tool and outcome", ("tool", "status"))
+TOOL_SECONDS = REGISTRY.histogram("penelope_tool_duration_seconds", "Tool execution latency", ("tool",))
+TOOL_MEMO_HITS = REGISTRY.counter("penelope_tool_memo_hits_total", "Tool calls answered from the session memo", ("tool",))
+RESPONSE_CACHE = REGISTRY.counter("penelope_response_cache_total", "Response cache lookups by result", ("result",))
+
+# ============================================================================
+# EXPOSITION ENDPOINT
+# ============================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        data = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+_server = None
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread (once per process)"""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True, name="penelope-metrics").start()
+    return _server
+
+def start_from_env(port: int = None):
+    """Start the endpoint when a port is given or PENELOPE_METRICS_PORT is set; returns the server or None"""
+    port = port or int(os.getenv("PENELOPE_METRICS_PORT", "0") or 0)
+    if not port:
+        return None
+    server = start_metrics_server(port)
+    print(f"[*] Metrics on http://127.0.0.1:{server.server_address[1]}/metrics", flush=True)
+    return server
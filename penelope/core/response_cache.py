@@ -0,0 +1,242 @@
+"""
+Response Cache for Penelope
+Opt-in, content-addressed on-disk cache for Messages API responses, keyed by
+a hash of (model, system prompt, messages, params). Automated runs (the
+debug cycles, FunctionalityTester, batch jobs) replay identical prompts;
+with the cache on, repeats cost no tokens and return in milliseconds.
+
+Modes (PENELOPE_RESPONSE_CACHE):
+    read     read-through: serve hits, call the API on misses and store them
+    record   always call the API and store (refreshes recordings)
+    replay   serve hits only; a miss raises ResponseCacheMiss (offline tests)
+
+Entries live under ~/.penelope/response_cache (PENELOPE_RESPONSE_CACHE_DIR),
+expire after PENELOPE_RESPONSE_CACHE_TTL seconds (default 7 days, 0 = never)
+and are evicted least-recently-used beyond PENELOPE_RESPONSE_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("PENELOPE_RESPONSE_CACHE_DIR", str(Path.home() / ".penelope" / "response_cache")))
+MODES = ("read", "record", "replay")
+DEFAULT_TTL = 7 * 24 * 3600
+DEFAULT_MAX_MB = 200
+
+class ResponseCacheMiss(LookupError):
+    """Raised in replay mode when a request has no recorded response"""
+
+class _Record:
+    """Attribute view of a stored response (response.content[0].text, response.usage...)"""
+
+    def __init__(self, data: dict):
+        for key, value in data.items():
+            setattr(self, key, _wrap(value))
+
+    def __repr__(self):
+        return f"_Record({vars(self)})"
+
+def _wrap(value):
+    if isinstance(value, dict):
+        return _Record(value)
+    if isinstance(value, list):
+        return [_wrap(item) for item in value]
+    return value
+
+def _response_dict(response) -> dict:
+    """Plain-JSON form of an SDK Message (or anything shaped like one)"""
+    for method in ("model_dump", "to_dict", "dict"):
+        if hasattr(response, method):
+            try:
+                return json.loads(json.dumps(getattr(response, method)(), default=str))
+            except (TypeError, ValueError):
+                break
+    blocks = []
+    for block in getattr(response, "content", None) or []:
+        item = {"type": getattr(block, "type", "text")}
+        for field in ("text", "id", "name", "input"):
+            if getattr(block, field, None) is not None:
+                item[field] = getattr(block, field)
+        blocks.append(item)
+    return {"id": getattr(response, "id", None), "model": getattr(response, "model", None),
+            "role": "assistant", "content": blocks, "stop_reason": getattr(response, "stop_reason", None)}
+
+def request_key(request: dict) -> str:
+    """Stable hash of a messages.create request (model, system, messages, params)"""
+    canonical = json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    def __init__(self, mode: str = "read", directory=None, ttl: float = DEFAULT_TTL, max_mb: float = DEFAULT_MAX_MB):
+        if mode not in MODES:
+            raise ValueError(f"Unknown response cache mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.directory = Path(directory) if directory else CACHE_DIR
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._total = None  # bytes on disk, scanned on the first store
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, request: dict):
+        """Cached response for the request, or None (raises ResponseCacheMiss in replay mode)"""
+        if self.mode == "record":
+            return None
+        key = request_key(request)
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            if self.ttl and time.time() - entry["created"] > self.ttl:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            os.utime(path)  # mtime doubles as last use for LRU eviction
+        except (OSError, ValueError, KeyError):
+            self.stats["misses"] += 1
+            if self.mode == "replay":
+                raise ResponseCacheMiss(f"No recorded response for request {key[:12]} in {self.directory}")
+            return None
+        self.stats["hits"] += 1
+        response = dict(entry["response"])
+        # A hit spends no tokens; the original usage stays available for reporting
+        response["recorded_usage"] = response.get("usage")
+        response["usage"] = {"input_tokens": 0, "output_tokens": 0,
+                             "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0}
+        response["cached"] = True
+        return _Record(response)
+
+    def put(self, request: dict, response):
+        key = request_key(request)
+        path = self._path(key)
+        data = json.dumps({"created": time.time(), "model": request.get("model"),
+                           "response": _response_dict(response)}, ensure_ascii=False).encode("utf-8")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = path.stat().st_size if path.exists() else 0
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)  # concurrent writers (batch workers) never see half an entry
+        self.stats["stores"] += 1
+        with self._lock:
+            if self._total is None:
+                self._total = self.size()
+            else:
+                self._total += len(data) - previous
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list:
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _remove(self, path: Path) -> int:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            return size
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """Drop least recently used entries until the cache is at 90% of its budget"""
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(self._entries()):
+            if self._total <= target:
+                break
+            self._total -= self._remove(path)
+            self.stats["evictions"] += 1
+
+    def size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def prune(self) -> int:
+        """Remove expired entries and enforce the size budget; returns entries removed"""
+        removed = 0
+        now = time.time()
+        for _, _, path in self._entries():
+            try:
+                created = json.loads(path.read_text(encoding="utf-8"))["created"]
+            except (OSError, ValueError, KeyError):
+                created = 0
+            if self.ttl and now - created > self.ttl:
+                removed += bool(self._remove(path))
+        with self._lock:
+            self._total = self.size()
+            before = self.stats["evictions"]
+            if self._total > self.max_bytes:
+                self._evict()
+            removed += self.stats["evictions"] - before
+        return removed
+
+    def clear(self) -> int:
+        removed = sum(bool(self._remove(path)) for _, _, path in self._entries())
+        with self._lock:
+            self._total = 0
+        return removed
+
+    def describe(self) -> dict:
+        entries = self._entries()
+        return {"mode": self.mode, "directory": str(self.directory), "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries), "max_bytes": self.max_bytes, "ttl": self.ttl,
+                **self.stats}
+
+_cache = None
+_configured = False
+
+def get_response_cache():
+    """Process-wide cache from PENELOPE_RESPONSE_CACHE, or None when caching is off"""
+    global _cache, _configured
+    if not _configured:
+        mode = os.getenv("PENELOPE_RESPONSE_CACHE", "").lower()
+        if mode in ("1", "true", "yes", "on"):
+            mode = "read"
+        _cache = ResponseCache(mode, os.getenv("PENELOPE_RESPONSE_CACHE_DIR"),
+                               float(os.getenv("PENELOPE_RESPONSE_CACHE_TTL", DEFAULT_TTL)),
+                               float(os.getenv("PENELOPE_RESPONSE_CACHE_MAX_MB", DEFAULT_MAX_MB))) if mode in MODES else None
+        _configured = True
+    return _cache
+
+def configure(mode: str = None, directory=None, ttl: float = DEFAULT_TTL, max_mb: float = DEFAULT_MAX_MB):
+    """Set the process-wide cache (mode None turns it off); also exported to child processes"""
+    global _cache, _configured
+    _cache = ResponseCache(mode, directory, ttl, max_mb) if mode else None
+    _configured = True
+    if mode:
+        os.environ["PENELOPE_RESPONSE_CACHE"] = mode
+        if directory:
+            os.environ["PENELOPE_RESPONSE_CACHE_DIR"] = str(directory)
+    else:
+        os.environ.pop("PENELOPE_RESPONSE_CACHE", None)
+    return _cache
+
+def create_message(client, **request):
+    """client.messages.create(**request) through the response cache when it is enabled"""
+    cache = get_response_cache()
+    if cache is None:
+        return client.messages.create(**request)
+    from penelope.core import metrics
+
+    try:
+        response = cache.get(request)
+    except ResponseCacheMiss:
+        metrics.RESPONSE_CACHE.inc(result="miss")
+        raise
+    if response is not None:
+        metrics.RESPONSE_CACHE.inc(result="hit")
+        return response
+    if cache.mode != "record":
+        metrics.RESPONSE_CACHE.inc(result="miss")
+    response = client.messages.create(**request)
+    cache.put(request, response)
+    metrics.RESPONSE_CACHE.inc(result="store")
+    return response
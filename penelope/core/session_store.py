@@ -0,0 +1,190 @@
+"""
+Persistent Session Store for Penelope
+SQLite (WAL) store that appends every history message as it happens, so a
+conversation survives crashes and can be resumed by id. Resuming loads only
+the tail of the session; older messages are folded into a compacted summary
+that is extended incrementally and saved, so resume cost stays bounded no
+matter how long the session grows.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+DB_PATH = Path(os.getenv("PENELOPE_SESSION_DB", str(Path.home() / ".penelope" / "sessions.db")))
+TAIL_MESSAGES = 40
+MAX_SUMMARY_CHARS = 4000
+SUMMARY_PREFIX = "[Summary of the earlier part of this session]"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    cwd TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id TEXT PRIMARY KEY,
+    upto_seq INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+"""
+
+def _content_text(content) -> str:
+    return content if isinstance(content, str) else json.dumps(content)
+
+def _summary_line(role: str, content: str) -> str:
+    """One compact line for a message, or '' for messages not worth keeping"""
+    text = " ".join(content.split())
+    if role == "user":
+        if text.startswith("Tool Result ("):
+            tool = text[len("Tool Result ("):].split(")", 1)[0]
+            return f"- ran {tool}"
+        if text.startswith(SUMMARY_PREFIX):
+            return ""
+        return f"- User: {text[:200]}"
+    if '"action"' in text:
+        return ""  # tool call; the following tool result line covers it
+    return f"- Penelope: {text[:200]}"
+
+def compact_summary(previous: str, messages: list) -> str:
+    """Extend a summary with (role, content) pairs, merging runs of tool calls"""
+    lines = previous.splitlines() if previous else []
+    for role, content in messages:
+        line = _summary_line(role, content)
+        if not line:
+            continue
+        if line.startswith("- ran ") and lines and lines[-1].startswith("- ran "):
+            lines[-1] = lines[-1] + ", " + line[len("- ran "):]
+            continue
+        lines.append(line)
+    text = "\n".join(lines)
+    if len(text) > MAX_SUMMARY_CHARS:
+        text = "...\n" + text[-MAX_SUMMARY_CHARS:].split("\n", 1)[-1]
+    return text
+
+class SessionStore:
+    """Thread-safe append-only message log with per-session summaries"""
+
+    def __init__(self, path=None):
+        self.path = Path(path or DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # durable across crashes of the process, cheap commits
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def create_session(self, session_id: str = None, title: str = "", cwd: str = None) -> str:
+        session_id = session_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._db.execute("INSERT OR IGNORE INTO sessions (id, title, cwd, created, updated) VALUES (?, ?, ?, ?, ?)",
+                             (session_id, title[:200], cwd or os.getcwd(), now, now))
+        return session_id
+
+    def exists(self, session_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone() is not None
+
+    def append(self, session_id: str, role: str, content) -> int:
+        """Append one message; returns its sequence number"""
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                seq = self._db.execute("SELECT message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+                if seq is None:
+                    raise KeyError(f"Unknown session {session_id}")
+                seq = seq[0]
+                self._db.execute("INSERT INTO messages (session_id, seq, role, content, created) VALUES (?, ?, ?, ?, ?)",
+                                 (session_id, seq, role, _content_text(content), now))
+                title_sql = ", title = ?" if seq == 0 and role == "user" else ""
+                params = [now, seq + 1] + ([" ".join(str(content).split())[:80]] if title_sql else []) + [session_id]
+                self._db.execute(f"UPDATE sessions SET updated = ?, message_count = ?{title_sql} WHERE id = ?", params)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return seq
+
+    def list_sessions(self, limit: int = 20) -> list:
+        with self._lock:
+            rows = self._db.execute("SELECT id, title, cwd, created, updated, message_count FROM sessions "
+                                    "ORDER BY updated DESC LIMIT ?", (limit,)).fetchall()
+        keys = ("id", "title", "cwd", "created", "updated", "messages")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def latest_session(self):
+        sessions = self.list_sessions(limit=1)
+        return sessions[0]["id"] if sessions else None
+
+    def load(self, session_id: str, tail: int = TAIL_MESSAGES) -> list:
+        """History for resuming: a summary message for older messages plus the last messages"""
+        with self._lock:
+            row = self._db.execute("SELECT message_count FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown session {session_id}")
+            count = row[0]
+            start = max(0, count - tail)
+            # The tail must start with an assistant message so that summary (user) + tail alternate roles
+            while 0 < start < count:
+                role = self._db.execute("SELECT role FROM messages WHERE session_id = ? AND seq = ?",
+                                        (session_id, start)).fetchone()
+                if role and role[0] == "assistant":
+                    break
+                start -= 1
+            if start == 0:
+                return self._messages_from(session_id, 0)
+
+            summary = self._db.execute("SELECT upto_seq, text FROM summaries WHERE session_id = ?",
+                                       (session_id,)).fetchone()
+            upto, text = summary if summary else (0, "")
+            if upto < start:
+                # Only the messages between the stored summary and the tail are read and folded in
+                new = self._db.execute("SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? AND seq < ? "
+                                       "ORDER BY seq", (session_id, upto, start)).fetchall()
+                text = compact_summary(text, new)
+                self._db.execute("INSERT OR REPLACE INTO summaries (session_id, upto_seq, text) VALUES (?, ?, ?)",
+                                 (session_id, start, text))
+                upto = start
+            messages = self._messages_from(session_id, upto)
+        return [{"role": "user", "content": f"{SUMMARY_PREFIX}\n{text}"}] + messages
+
+    def _messages_from(self, session_id: str, seq: int) -> list:
+        return [{"role": role, "content": content} for role, content in self._db.execute(
+            "SELECT role, content FROM messages WHERE session_id = ? AND seq >= ? ORDER BY seq", (session_id, seq))]
+
+    def delete(self, session_id: str):
+        with self._lock:
+            for table, column in (("messages", "session_id"), ("summaries", "session_id"), ("sessions", "id")):
+                self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (session_id,))
+
+_default_store = None
+_default_lock = threading.Lock()
+
+def get_store() -> SessionStore:
+    """Process-wide store at DB_PATH"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = SessionStore()
+        return _default_store
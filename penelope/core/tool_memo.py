@@ -0,0 +1,116 @@
+"""
+Tool Result Memoization for Penelope
+Remembers results of read-only tool calls within an agent session, keyed by
+tool, arguments and working directory. An entry is reused only while the
+state it depends on is unchanged:
+
+    read_file, outline_file   the file's size and mtime
+    read_many                 size and mtime of every file read
+    list_dir                  the directory's mtime
+    grep_search, search_files no cheap fingerprint; a short TTL
+    control_git (read actions) the repository's index/HEAD mtimes, for no longer
+                              than the git status cache (PENELOPE_GIT_STATUS_TTL)
+
+Any mutating tool clears the memo (see PenelopeAgent), but files can change
+outside the agent, so the TTL is kept short. Disable with
+PENELOPE_TOOL_MEMO=0; PENELOPE_TOOL_MEMO_TTL sets the TTL in seconds (default 5).
+"""
+import json
+import os
+import time
+from collections import OrderedDict
+
+MEMO_TTL = float(os.getenv("PENELOPE_TOOL_MEMO_TTL", "5"))
+MAX_ENTRIES = 256
+
+# tool -> how an entry is validated
+MEMO_POLICIES = {
+    "read_file": "file",
+    "outline_file": "file",
+    "read_many": "files",
+    "list_dir": "dir",
+    "grep_search": "ttl",
+    "search_files": "ttl",
+    "control_git": "git",
+}
+
+# control_git actions that only read; every other action changes the repository
+GIT_READ_ACTIONS = {"status", "log", "show_file_at", "show_object", "list_tree", "diff_stat", "blame_range"}
+
+def mutates_git(tool_name: str, params: dict) -> bool:
+    return tool_name == "control_git" and params.get("action") not in GIT_READ_ACTIONS
+
+def _stat(path: str, size: bool = True):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size) if size else st.st_mtime_ns
+
+class ToolMemo:
+    def __init__(self, ttl: float = MEMO_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self._entries = OrderedDict()  # key -> (state, stored_at, result)
+
+    def _ttl(self, policy: str):
+        """Seconds an entry stays valid, or None when its fingerprint alone decides"""
+        if policy == "git":
+            # Never outlive git_backend's own status cache; the fingerprint misses worktree edits
+            from penelope.tools.git_backend import STATUS_CACHE_TTL
+            return min(self.ttl, STATUS_CACHE_TTL)
+        return self.ttl if policy == "ttl" else None
+
+    def _state(self, policy: str, params: dict, cwd: str):
+        """Fingerprint of what the result depends on; None when the call is not memoizable"""
+        if policy == "file":
+            return _stat(os.path.join(cwd, params.get("path", "")))
+        if policy == "files":
+            from penelope.tools.pack_tools import parse_specs
+            return tuple(_stat(os.path.join(cwd, spec[0])) for spec in parse_specs(params.get("paths")))
+        if policy == "dir":
+            return _stat(os.path.join(cwd, params.get("path", ".")), size=False)
+        if policy == "git":
+            if params.get("action") not in GIT_READ_ACTIONS or params.get("fresh"):
+                return None
+            try:
+                from penelope.tools.git_backend import get_repository
+                return get_repository(os.path.join(cwd, params.get("path") or "."))._state_fingerprint()
+            except Exception:
+                return None
+        return ()
+
+    def call(self, tool_name: str, params: dict, cwd: str, run) -> tuple:
+        """(result, hit): the remembered result if still valid, otherwise run() and remember it"""
+        policy = MEMO_POLICIES.get(tool_name)
+        if policy is None:
+            return run(), False
+        try:
+            key = (tool_name, json.dumps(params, sort_keys=True, default=str), cwd)
+        except (TypeError, ValueError):
+            return run(), False
+        # Taken before running, so a change during the call makes the entry stale rather than wrong
+        state = self._state(policy, params, cwd)
+        if state is None:
+            return run(), False
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            ttl = self._ttl(policy)
+            expired = ttl is not None and time.monotonic() - entry[1] > ttl
+            if entry[0] == state and not expired:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2], True
+            del self._entries[key]
+
+        result = run()
+        if isinstance(result, str) and not result.startswith("Error"):
+            self._entries[key] = (state, time.monotonic(), result)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result, False
+
+    def clear(self):
+        self._entries.clear()
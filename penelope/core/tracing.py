@@ -0,0 +1,243 @@
+"""
+Tracing for Penelope
+Records spans for agent turns, model requests (with token usage and prompt
+cache stats), JSON parsing, tool executions and API key switches, and
+appends them to a local file as plain JSONL or as OpenTelemetry OTLP/JSON
+(one ExportTraceServiceRequest per line, the OTel collector file format).
+
+Enable with PENELOPE_TRACE=jsonl or PENELOPE_TRACE=otlp; the file defaults
+to ~/.penelope/traces/trace-YYYYMMDD.jsonl (PENELOPE_TRACE_FILE). When
+tracing is off, spans are a shared no-op object.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+TRACE_DIR = Path(os.getenv("PENELOPE_TRACE_DIR", str(Path.home() / ".penelope" / "traces")))
+FORMATS = ("jsonl", "otlp")
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: str, attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> dict:
+        return {"name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+                "start_ns": self.start_ns, "end_ns": self.end_ns, "duration_ms": round(self.duration_ms, 3),
+                "status": self.status, "error": self.error, "attributes": self.attributes}
+
+class _NoopSpan:
+    def set(self, **attributes):
+        pass
+
+    def fail(self, error):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(span: Span) -> dict:
+    """Wrap a span in an OTLP/JSON ExportTraceServiceRequest"""
+    otel_span = {
+        "traceId": span.trace_id, "spanId": span.span_id, "name": span.name, "kind": 1,
+        "startTimeUnixNano": str(span.start_ns), "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+        "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+    }
+    if span.parent_id:
+        otel_span["parentSpanId"] = span.parent_id
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "penelope"}}]},
+        "scopeSpans": [{"scope": {"name": "penelope.core.tracing"}, "spans": [otel_span]}],
+    }]}
+
+class Tracer:
+    """Creates spans and appends finished ones to the trace file"""
+
+    def __init__(self, fmt: str = None, path=None):
+        self.format = fmt if fmt in FORMATS else None
+        self.path = Path(path) if path else TRACE_DIR / f"trace-{time.strftime('%Y%m%d')}.jsonl"
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._file = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.format is not None
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Context manager for a child of the current span (a new trace at the top level)"""
+        if not self.format:
+            yield _NOOP_SPAN
+            return
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span = Span(name, parent.trace_id if parent else os.urandom(16).hex(),
+                    parent.span_id if parent else None, attributes)
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            stack.pop()
+            span.end_ns = time.time_ns()
+            self.export(span)
+
+    def event(self, name: str, **attributes):
+        """Zero-duration span, e.g. an API key switch"""
+        with self.span(name, **attributes):
+            pass
+
+    def export(self, span: Span):
+        record = to_otlp(span) if self.format == "otlp" else span.to_dict()
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line)
+            self._file.flush()
+
+_tracer = None
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer configured from PENELOPE_TRACE / PENELOPE_TRACE_FILE"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(os.getenv("PENELOPE_TRACE", "").lower() or None, os.getenv("PENELOPE_TRACE_FILE"))
+    return _tracer
+
+def configure(fmt: str = "jsonl", path=None) -> Tracer:
+    global _tracer
+    _tracer = Tracer(fmt, path)
+    return _tracer
+
+# ============================================================================
+# SUMMARY
+# ============================================================================
+
+def _from_otlp(record: dict) -> list:
+    spans = []
+    for resource in record.get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+            for s in scope.get("spans", []):
+                attributes = {}
+                for attr in s.get("attributes", []):
+                    value = next(iter(attr["value"].values()), None)
+                    attributes[attr["key"]] = int(value) if "intValue" in attr["value"] else value
+                start, end = int(s["startTimeUnixNano"]), int(s["endTimeUnixNano"])
+                spans.append({"name": s["name"], "trace_id": s["traceId"], "span_id": s["spanId"],
+                              "parent_id": s.get("parentSpanId"), "start_ns": start, "end_ns": end,
+                              "duration_ms": (end - start) / 1e6,
+                              "status": "error" if s.get("status", {}).get("code") == 2 else "ok",
+                              "error": s.get("status", {}).get("message"), "attributes": attributes})
+    return spans
+
+def read_spans(path) -> list:
+    """Spans from a JSONL or OTLP/JSON trace file"""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line of a live trace
+            spans.extend(_from_otlp(record) if "resourceSpans" in record else [record])
+    return spans
+
+def _p95(values: list) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+def summarize_trace(path, last_turns: int = None, session: str = None) -> str:
+    """Where the time went: per span type, per tool, tokens, cache and key switches"""
+    spans = read_spans(path)
+    turns = [s for s in spans if s["name"] == "agent.turn"
+             and (not session or s["attributes"].get("session.id") == session)]
+    turns.sort(key=lambda s: s["start_ns"])
+    if last_turns:
+        turns = turns[-last_turns:]
+    trace_ids = {t["trace_id"] for t in turns}
+    spans = [s for s in spans if s["trace_id"] in trace_ids]
+    if not spans:
+        return f"No agent turns found in {path}"
+
+    total_ms = sum(t["duration_ms"] for t in turns)
+    by_name = {}
+    for s in spans:
+        key = s["name"] if s["name"] != "tool.execute" else f"tool.execute[{s['attributes'].get('tool.name', '?')}]"
+        by_name.setdefault(key, []).append(s)
+
+    model_ms = sum(s["duration_ms"] for s in by_name.get("model.request", []))
+    tool_ms = sum(s["duration_ms"] for s in spans if s["name"] == "tool.execute")
+    lines = [f"{len(turns)} turns, {total_ms / 1000:.2f}s total "
+             f"(model {model_ms / total_ms:.0%}, tools {tool_ms / total_ms:.0%}, "
+             f"loop overhead {(total_ms - model_ms - tool_ms) / total_ms:.0%})" if total_ms else f"{len(turns)} turns",
+             "", f"{'span':42} {'count':>6} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'share':>6} {'errors':>6}"]
+    for name, group in sorted(by_name.items(), key=lambda item: -sum(s["duration_ms"] for s in item[1])):
+        durations = [s["duration_ms"] for s in group]
+        total = sum(durations)
+        errors = sum(1 for s in group if s["status"] == "error")
+        share = f"{total / total_ms:.0%}" if total_ms and name != "agent.turn" else ""
+        lines.append(f"{name[:42]:42} {len(group):6} {total / 1000:9.2f} {total / len(group):9.1f} "
+                     f"{_p95(durations):9.1f} {share:>6} {errors:6}")
+
+    requests = by_name.get("model.request", [])
+    tokens = {field: sum(s["attributes"].get(field, 0) or 0 for s in requests)
+              for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")}
+    prompt_tokens = tokens["input_tokens"] + tokens["cache_creation_input_tokens"] + tokens["cache_read_input_tokens"]
+    lines += ["", f"Tokens: {tokens['input_tokens']} input, {tokens['output_tokens']} output, "
+                  f"{tokens['cache_read_input_tokens']} cache read, {tokens['cache_creation_input_tokens']} cache write"
+                  + (f" (cache hit {tokens['cache_read_input_tokens'] / prompt_tokens:.0%} of prompt tokens)" if prompt_tokens else "")]
+    if requests:
+        lines.append(f"Model requests: {len(requests)}, "
+                     f"{sum(1 for s in requests if s['status'] == 'error')} failed, "
+                     f"{len(by_name.get('agent.key_switch', []))} key switches")
+
+    slowest = sorted((s for s in spans if s["name"] != "agent.turn"), key=lambda s: -s["duration_ms"])[:5]
+    if slowest:
+        lines += ["", "Slowest spans:"]
+        for s in slowest:
+            detail = s["attributes"].get("tool.name") or s["attributes"].get("model") or ""
+            lines.append(f"  {s['duration_ms']:9.1f} ms  {s['name']} {detail}".rstrip())
+    return "\n".join(lines)
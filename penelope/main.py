@@ -2,11 +2,6 @@ import click
 import os
 from dotenv import load_dotenv
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from rich.box import DOUBLE
-from penelope.core.agent import PenelopeAgent
 import sys
 import importlib.util
 from pathlib import Path
@@ -22,7 +17,9 @@ def _import_crash_logger():
     spec.loader.exec_module(crash_logger_module)
     return crash_logger_module.log_crash
 
-log_crash = _import_crash_logger()
+def log_crash(exception: Exception, context: str = "General"):
+    """Log a crash, loading crash_logger on first use"""
+    return _import_crash_logger()(exception, context)
 
 load_dotenv()
 console = Console()
@@ -30,11 +27,20 @@ console = Console()
 @click.command()
 @click.option('--query', '-q', help='Direct query to Penelope')
 @click.option('--interactive', '-i', is_flag=True, help='Start interactive chat mode')
-def main(query, interactive):
+@click.option('--session', '-s', 'session_id', help='Resume (or create) a saved session by id')
+def main(query, interactive, session_id):
     """Penelope AI Assistant - CLI Version"""
+    from rich.markdown import Markdown
+    from rich.panel import Panel
+    from rich.text import Text
+    from rich.box import DOUBLE
+    from penelope.core.agent import PenelopeAgent
     
     try:
         agent = PenelopeAgent()
+        if session_id or os.getenv("PENELOPE_SESSIONS", "1") != "0":
+            from penelope.core.session_store import get_store
+            session_id = agent.attach_session(get_store(), session_id)
     except Exception as e:
         console.print(f"[bold red]Error:[/] {e}")
         return
@@ -78,6 +84,8 @@ def main(query, interactive):
             log_path = log_crash(e, f"Chat Input: {user_input}")
             console.print(f"\n[bold red]Crash gedetecteerd![/] Log opgeslagen in: [cyan]{log_path}[/]")
             console.print(f"[red]{type(e).__name__}: {str(e)}[/]")
+            if session_id:
+                console.print(f"[dim]Session saved; resume with: --session {session_id}[/]")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,116 @@
+"""
+Penelope Daemon Client
+Thin client that forwards a query to a running `penelope serve` daemon and
+streams its events back. Deliberately imports only the standard library so
+it starts in milliseconds.
+
+Usage:
+    python run_penelope.py ask "query" [--session NAME]
+"""
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+
+STATE_DIR = Path(os.getenv("PENELOPE_STATE_DIR", str(Path.home() / ".penelope")))
+SOCKET_PATH = Path(os.getenv("PENELOPE_SOCKET", str(STATE_DIR / "penelope.sock")))
+TCP_STATE_FILE = STATE_DIR / "daemon.json"  # port and token when AF_UNIX is unavailable (Windows)
+
+class DaemonUnavailable(Exception):
+    """Raised when no daemon is listening"""
+
+def _connect(timeout: float = None) -> tuple:
+    """Open a connection to the daemon; returns (socket, auth token or None)"""
+    if hasattr(socket, "AF_UNIX") and SOCKET_PATH.exists():
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(SOCKET_PATH))
+            return sock, None
+        except OSError:
+            sock.close()
+            raise DaemonUnavailable(f"No daemon listening on {SOCKET_PATH}")
+    try:
+        state = json.loads(TCP_STATE_FILE.read_text(encoding="utf-8"))
+        sock = socket.create_connection(("127.0.0.1", state["port"]), timeout=timeout or 5)
+        sock.settimeout(timeout)
+        return sock, state.get("token")
+    except (OSError, ValueError, KeyError):
+        raise DaemonUnavailable("No Penelope daemon is running (start one with: penelope serve)")
+
+def request(payload: dict, on_event=None, timeout: float = None) -> dict:
+    """Send one request and return the final event; intermediate events go to on_event"""
+    sock, token = _connect(timeout)
+    if token:
+        payload = dict(payload, token=token)
+    with sock, sock.makefile("rwb") as stream:
+        stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+        stream.flush()
+        for raw in stream:
+            event = json.loads(raw)
+            if event.get("event") in ("response", "error", "ok"):
+                return event
+            if on_event:
+                on_event(event)
+    return {"event": "error", "error": "Daemon closed the connection"}
+
+def daemon_available() -> bool:
+    try:
+        return request({"op": "ping"}, timeout=2).get("event") == "ok"
+    except DaemonUnavailable:
+        return False
+    except OSError:
+        return False
+
+def ask(query: str, session: str = "default", cwd: str = None, on_event=None) -> str:
+    """Run a query in a daemon session and return Penelope's response"""
+    result = request({"op": "chat", "query": query, "session": session, "cwd": cwd or os.getcwd()}, on_event)
+    if result.get("event") == "error":
+        raise RuntimeError(result.get("error", "unknown daemon error"))
+    return result.get("text", "")
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="penelope ask", description="Send a query to the Penelope daemon")
+    parser.add_argument("query", nargs="?", help="Query for Penelope")
+    parser.add_argument("--session", "-s", default="default", help="Daemon session name")
+    parser.add_argument("--reset", action="store_true", help="Clear the session history first")
+    parser.add_argument("--stop", action="store_true", help="Stop the daemon")
+    parser.add_argument("--profile-tools", metavar="NAMES",
+                        help='Profile these tools in the daemon (comma-separated, "*" for all, "" to stop)')
+    parser.add_argument("--profile-report", action="store_true", help="Show the daemon's per-tool profiles")
+    args = parser.parse_args(argv)
+
+    def show_event(event):
+        if event.get("event") == "tool":
+            print(f"[*] Tool: {event.get('name')} | {event.get('thought', '')}", flush=True)
+
+    try:
+        if args.stop:
+            request({"op": "shutdown"})
+            print("Daemon stopped")
+            return 0
+        if args.profile_tools is not None or args.profile_report:
+            payload = {"op": "profile_tools"}
+            if args.profile_tools is not None:
+                payload["tools"] = args.profile_tools
+            result = request(payload)
+            print(f"Profiled tools: {', '.join(result.get('tools', [])) or 'none'}")
+            if args.profile_report and result.get("report"):
+                print(result["report"])
+        if args.reset:
+            request({"op": "reset", "session": args.session})
+        if args.query:
+            print(ask(args.query, args.session, on_event=show_event))
+        return 0
+    except DaemonUnavailable as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Penelope Daemon
+Long-running process that keeps agent sessions, tool caches, git cat-file
+processes and warm HTTP connections alive across CLI invocations. Listens
+on a Unix socket (localhost TCP with a token where AF_UNIX is unavailable)
+and speaks newline-delimited JSON:
+
+    -> {"op": "chat", "query": "...", "session": "default", "cwd": "..."}
+    <- {"event": "tool", "name": "...", "thought": "..."}      (zero or more)
+    <- {"event": "response", "text": "..."}  or  {"event": "error", "error": "..."}
+
+Other ops: "ping", "reset" (clear a session), "sessions", "shutdown" and
+"profile_tools" (profile only the named tools in the running daemon).
+"""
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+import time
+
+from penelope.server.client import STATE_DIR, SOCKET_PATH, TCP_STATE_FILE, daemon_available
+
+class SessionPool:
+    """Named agent sessions; each session handles one query at a time"""
+
+    def __init__(self, agent_factory=None):
+        self.agent_factory = agent_factory
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def _create_agent(self):
+        if self.agent_factory:
+            return self.agent_factory()
+        from penelope.core.agent import PenelopeAgent
+        return PenelopeAgent()
+
+    def get(self, name: str) -> tuple:
+        with self._lock:
+            if name not in self._sessions:
+                self._sessions[name] = {"agent": self._create_agent(), "lock": threading.Lock(),
+                                        "created": time.time(), "queries": 0}
+            return self._sessions[name]
+
+    def reset(self, name: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(name, None) is not None
+
+    def describe(self) -> list:
+        with self._lock:
+            return [{"session": name, "messages": len(s["agent"].history), "queries": s["queries"],
+                     "busy": s["lock"].locked()} for name, s in sorted(self._sessions.items())]
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def _send(self, event: dict):
+        self.wfile.write(json.dumps(event, default=str).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self):
+        try:
+            payload = json.loads(self.rfile.readline() or b"{}")
+        except ValueError:
+            return self._send({"event": "error", "error": "Invalid JSON request"})
+        if self.server.token and payload.get("token") != self.server.token:
+            return self._send({"event": "error", "error": "Invalid daemon token"})
+
+        op = payload.get("op")
+        pool = self.server.sessions
+        if op == "ping":
+            self._send({"event": "ok", "pid": os.getpid(), "uptime": time.time() - self.server.started_at})
+        elif op == "sessions":
+            self._send({"event": "ok", "sessions": pool.describe()})
+        elif op == "reset":
+            self._send({"event": "ok", "reset": pool.reset(payload.get("session", "default"))})
+        elif op == "shutdown":
+            self._send({"event": "ok"})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        elif op == "profile_tools":
+            self._profile_tools(payload)
+        elif op == "chat":
+            self._chat(pool, payload)
+        else:
+            self._send({"event": "error", "error": f"Unknown op '{op}'"})
+
+    def _profile_tools(self, payload: dict):
+        """Toggle per-tool profiling at runtime ("tools": names, "" to stop) and report profiles"""
+        from penelope.tools import profile_tools
+        from penelope.tools.registry import enable_tool_profiling
+
+        if "tools" in payload:
+            enable_tool_profiling(payload["tools"] or [])
+        enabled = sorted(profile_tools._profiled_tools)
+        reports = [f"== {name} ==\n{profile_tools.tool_profile_report(name)}" for name in enabled if name != "*"]
+        self._send({"event": "ok", "tools": enabled, "report": "\n\n".join(reports)})
+
+    def _chat(self, pool: SessionPool, payload: dict):
+        query = payload.get("query")
+        if not query:
+            return self._send({"event": "error", "error": "query is required"})
+        try:
+            session = pool.get(payload.get("session", "default"))
+        except Exception as e:
+            return self._send({"event": "error", "error": f"{type(e).__name__}: {e}"})
+
+        with session["lock"]:
+            agent = session["agent"]
+            agent.working_dir = payload.get("cwd") or None
+            agent.on_event = lambda event, data: self._send(dict(data, event=event))
+            try:
+                text = agent.chat(query)
+                session["queries"] += 1
+                self._send({"event": "response", "text": text})
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # client went away; the session keeps its history
+            except Exception as e:
+                self._send({"event": "error", "error": f"{type(e).__name__}: {e}"})
+            finally:
+                agent.on_event = None
+
+if hasattr(socket, "AF_UNIX"):
+    class _UnixDaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+class _TcpDaemonServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+def create_server(socket_path: str = None, port: int = 0, agent_factory=None):
+    """Create (but do not start) the daemon server"""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    if hasattr(socket, "AF_UNIX"):
+        path = str(socket_path or SOCKET_PATH)
+        if os.path.exists(path):
+            if daemon_available():
+                raise RuntimeError(f"A Penelope daemon is already listening on {path}")
+            os.unlink(path)  # stale socket from a crashed daemon
+        server = _UnixDaemonServer(path, _RequestHandler)
+        os.chmod(path, 0o600)
+        server.token = None
+        server.address_text = path
+    else:
+        server = _TcpDaemonServer(("127.0.0.1", port), _RequestHandler)
+        server.token = secrets.token_hex(16)
+        server.address_text = f"127.0.0.1:{server.server_address[1]}"
+        TCP_STATE_FILE.write_text(json.dumps({"port": server.server_address[1], "token": server.token,
+                                              "pid": os.getpid()}), encoding="utf-8")
+    server.sessions = SessionPool(agent_factory)
+    server.started_at = time.time()
+    return server
+
+def serve(socket_path: str = None, port: int = 0, agent_factory=None, metrics_port: int = None):
+    """Run the daemon until it receives a shutdown request or Ctrl+C"""
+    from penelope.core.metrics import start_from_env
+
+    server = create_server(socket_path, port, agent_factory)
+    start_from_env(metrics_port)
+    print(f"[*] Penelope daemon listening on {server.address_text} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if server.token is None:
+            try:
+                os.unlink(server.address_text)
+            except OSError:
+                pass
+        else:
+            TCP_STATE_FILE.unlink(missing_ok=True)
+        print("[*] Penelope daemon stopped", flush=True)
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    serve()
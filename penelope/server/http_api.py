@@ -0,0 +1,287 @@
+"""
+Penelope HTTP/JSON API
+asyncio server (standard library only) exposing isolated agent sessions to
+internal tooling. Each session owns a PenelopeAgent (history) and a working
+directory; agent turns run in a bounded thread pool behind a concurrency
+limiter with a bounded wait queue.
+
+Endpoints:
+    GET    /health                     server status, running/queued turns
+    POST   /sessions                   {"cwd": "..."} -> {"session_id": ...}
+    GET    /sessions                   list sessions
+    GET    /sessions/{id}              session info and history
+    DELETE /sessions/{id}              drop a session
+    POST   /sessions/{id}/chat         {"message": "..."} -> {"event": "response", "text": ..., "events": [...]}
+    POST   /sessions/{id}/stream       same, as server-sent events (queued, started, tool, response|error|cancelled)
+    POST   /sessions/{id}/cancel       cancel the queued or running turn
+
+Set PENELOPE_API_TOKEN to require "Authorization: Bearer <token>". To test
+against a local stand-in model server, point ANTHROPIC_BASE_URL at it (the
+Anthropic SDK honours it) or pass an agent_factory.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1024 * 1024
+
+_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+            429: "Too Many Requests", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class Session:
+    """One isolated conversation: its own agent, history and working directory"""
+
+    def __init__(self, agent, cwd: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.agent = agent
+        self.agent.working_dir = cwd
+        self.cwd = cwd
+        self.created = time.time()
+        self.turns = 0
+        self.state = "idle"  # idle, queued, running; one turn per session at a time
+        self.cancel_requested = False
+
+    def describe(self, with_history: bool = False) -> dict:
+        info = {"session_id": self.id, "cwd": self.cwd, "state": self.state, "turns": self.turns,
+                "messages": len(self.agent.history), "created": self.created}
+        if with_history:
+            info["history"] = self.agent.history
+        return info
+
+class ApiServer:
+    """Session registry, concurrency limiter and HTTP routing"""
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 32, agent_factory=None, token: str = None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.agent_factory = agent_factory
+        self.token = token if token is not None else os.getenv("PENELOPE_API_TOKEN")
+        self.sessions = {}
+        self.running = 0
+        self.queued = 0
+        self._slots = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="penelope-api")
+        # Session setup must not wait behind long chat turns for a slot
+        self._setup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="penelope-api-setup")
+
+    def _create_agent(self):
+        if self.agent_factory:
+            return self.agent_factory()
+        from penelope.core.agent import PenelopeAgent
+        return PenelopeAgent()
+
+    # ------------------------------------------------------------------ turns
+
+    async def run_turn(self, session: Session, message: str, emit):
+        """Queue, then run one chat turn; emit(event_dict) receives progress events"""
+        if self.queued >= self.max_queue:
+            raise HTTPError(429, f"Request queue is full ({self.max_queue} waiting)")
+        if session.state != "idle":
+            raise HTTPError(409, f"Session {session.id} already has a turn {session.state}")
+
+        loop = asyncio.get_running_loop()
+        self.queued += 1
+        waiting = True
+        session.state, session.cancel_requested = "queued", False
+        # Accepted: from here on a cancel applies to this turn
+        session.agent.clear_cancel()
+        try:
+            await emit({"event": "queued", "position": self.queued})
+            async with self._slots:
+                self.queued -= 1
+                waiting = False
+                if session.cancel_requested:
+                    return {"event": "cancelled"}
+                self.running += 1
+                session.state = "running"
+                await emit({"event": "started"})
+
+                def on_event(event, data):
+                    # Called from the worker thread
+                    asyncio.run_coroutine_threadsafe(emit(dict(data, event=event)), loop)
+
+                session.agent.on_event = on_event
+                started = time.perf_counter()
+                try:
+                    text = await loop.run_in_executor(self._executor, session.agent.chat, message)
+                    session.turns += 1
+                    return {"event": "response", "text": text, "seconds": round(time.perf_counter() - started, 3)}
+                except Exception as e:
+                    if type(e).__name__ == "ChatCancelled":
+                        return {"event": "cancelled"}
+                    return {"event": "error", "error": f"{type(e).__name__}: {e}"}
+                finally:
+                    session.agent.on_event = None
+                    self.running -= 1
+        finally:
+            if waiting:
+                self.queued -= 1  # client went away while waiting for a slot
+            session.state = "idle"
+
+    # ---------------------------------------------------------------- routing
+
+    def _session(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if not session:
+            raise HTTPError(404, f"Unknown session {session_id}")
+        return session
+
+    async def route(self, method: str, path: str, body: dict, writer) -> tuple:
+        """Returns (status, payload); streaming endpoints write to the socket themselves"""
+        parts = [p for p in path.split("/") if p]
+        if parts == ["health"] and method == "GET":
+            return 200, {"status": "ok", "sessions": len(self.sessions), "running": self.running,
+                         "queued": self.queued, "max_concurrent": self.max_concurrent, "max_queue": self.max_queue}
+        if parts == ["sessions"]:
+            if method == "GET":
+                return 200, {"sessions": [s.describe() for s in self.sessions.values()]}
+            if method == "POST":
+                cwd = os.path.abspath(body.get("cwd") or os.getcwd())
+                if not os.path.isdir(cwd):
+                    raise HTTPError(400, f"cwd {cwd} is not a directory")
+                agent = await asyncio.get_running_loop().run_in_executor(self._setup_executor, self._create_agent)
+                session = Session(agent, cwd)
+                self.sessions[session.id] = session
+                return 201, session.describe()
+            raise HTTPError(405, f"{method} not allowed on /sessions")
+        if len(parts) == 2 and parts[0] == "sessions":
+            session = self._session(parts[1])
+            if method == "GET":
+                return 200, session.describe(with_history=True)
+            if method == "DELETE":
+                session.cancel_requested = True
+                session.agent.cancel()
+                del self.sessions[session.id]
+                return 200, {"deleted": session.id}
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        if len(parts) == 3 and parts[0] == "sessions" and method == "POST":
+            session = self._session(parts[1])
+            action = parts[2]
+            if action == "cancel":
+                was = session.state
+                session.cancel_requested = True
+                session.agent.cancel()
+                return 200, {"session_id": session.id, "cancelled": was != "idle", "state": was}
+            if action in ("chat", "stream"):
+                message = body.get("message")
+                if not message:
+                    raise HTTPError(400, "message is required")
+                if action == "chat":
+                    events = []
+                    async def collect(event):
+                        events.append(event)
+                    result = await self.run_turn(session, message, collect)
+                    status = 200 if result["event"] in ("response", "cancelled") else 500
+                    return status, dict(result, session_id=session.id, events=events)
+                await self._stream(session, message, writer)
+                return None, None
+        raise HTTPError(404, f"No route for {method} {path}")
+
+    async def _stream(self, session: Session, message: str, writer):
+        # Reject before committing to a 200 event stream
+        if self.queued >= self.max_queue:
+            raise HTTPError(429, f"Request queue is full ({self.max_queue} waiting)")
+        if session.state != "idle":
+            raise HTTPError(409, f"Session {session.id} already has a turn {session.state}")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+
+        async def send(event):
+            name = event.get("event", "message")
+            writer.write(f"event: {name}\ndata: {json.dumps(event, default=str)}\n\n".encode("utf-8"))
+            await writer.drain()
+
+        try:
+            result = await self.run_turn(session, message, send)
+            await send(result)
+        except (ConnectionError, asyncio.CancelledError):
+            session.agent.cancel()  # client disconnected
+            raise
+
+    # ------------------------------------------------------------------- http
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                return
+            method, target, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                if self.token and headers.get("authorization") != f"Bearer {self.token}":
+                    raise HTTPError(401, "Missing or invalid bearer token")
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw.strip() else {}
+                except ValueError:
+                    raise HTTPError(400, "Body is not valid JSON")
+                if not isinstance(body, dict):
+                    raise HTTPError(400, "Body must be a JSON object")
+                status, payload = await self.route(method.upper(), urlsplit(target).path, body, writer)
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": f"{type(e).__name__}: {e}"}
+            if status is not None:
+                data = json.dumps(payload, default=str).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, ready=None):
+        """Serve until cancelled; ready(bound_port) is called once listening"""
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        server = await asyncio.start_server(self.handle, host, port)
+        bound = server.sockets[0].getsockname()[1]
+        if ready:
+            ready(bound)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._setup_executor.shutdown(wait=False, cancel_futures=True)
+
+def run_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_concurrent: int = 4, max_queue: int = 32,
+               metrics_port: int = None):
+    """Run the API server in the foreground until Ctrl+C"""
+    from penelope.core.metrics import start_from_env
+
+    start_from_env(metrics_port)
+    api = ApiServer(max_concurrent=max_concurrent, max_queue=max_queue)
+    def ready(bound):
+        print(f"[*] Penelope API listening on http://{host}:{bound} "
+              f"(max {max_concurrent} concurrent turns, queue {max_queue})", flush=True)
+    try:
+        asyncio.run(api.serve(host, port, ready))
+    except KeyboardInterrupt:
+        print("[*] Penelope API stopped", flush=True)
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    load_dotenv()
+    run_server()
@@ -0,0 +1,182 @@
+"""
+File Content Cache and Prefetcher for Penelope
+read_file serves text from an in-memory LRU cache validated by size,
+mtime, ctime and inode, so a repeated read costs one stat instead of a
+(possibly network) disk read. Because timestamps can be coarse on network
+mounts, the agent also drops the whole cache after any tool that may have
+changed files. After list_dir, grep_search or search_files the agent hands the
+result to prefetch_from_result, which warms the cache for the most likely
+next reads on a background thread.
+
+PENELOPE_FILE_CACHE_MB bounds the cache (default 64), PENELOPE_PREFETCH=0
+turns prefetching off and PENELOPE_PREFETCH_FILES sets how many candidates
+are warmed per result (default 8). PENELOPE_PREFETCH_OUTLINES=1 also
+precomputes outline_file results for the prefetched source files.
+"""
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_MB = float(os.getenv("PENELOPE_FILE_CACHE_MB", "64"))
+PREFETCH_ENABLED = os.getenv("PENELOPE_PREFETCH", "1") != "0"
+PREFETCH_FILES = int(os.getenv("PENELOPE_PREFETCH_FILES", "8"))
+PREFETCH_OUTLINES = os.getenv("PENELOPE_PREFETCH_OUTLINES", "0") == "1"
+MAX_PREFETCH_BYTES = 256 * 1024  # larger files are rarely read whole; leave them to read_file
+PREFETCH_TOOLS = {"list_dir", "grep_search", "search_files"}
+
+_BINARY_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".ico", ".pdf", ".zip", ".gz", ".jar", ".apk", ".aar",
+                      ".class", ".so", ".dll", ".exe", ".bin", ".pyc", ".woff", ".woff2", ".ttf", ".db", ".sqlite"}
+_SOURCE_EXTENSIONS = {".py", ".js", ".jsx", ".ts", ".tsx", ".kt", ".kts", ".java", ".gradle", ".json", ".toml",
+                      ".cfg", ".ini", ".yaml", ".yml", ".md", ".txt", ".xml", ".html", ".css", ".sh"}
+_LIKELY_NAMES = ("readme", "main", "__init__", "index", "app", "setup", "pyproject", "package", "build", "cli")
+_HEADER_RE = re.compile(r"^--- (.+) ---$")
+
+def _stamp(st) -> tuple:
+    """What must be unchanged for a cached copy to be served"""
+    return (st.st_mtime_ns, st.st_size, st.st_ctime_ns, st.st_ino)
+
+class FileCache:
+    """Thread-safe LRU of decoded file contents, bounded by total file size"""
+
+    def __init__(self, max_bytes: int = int(CACHE_MB * 1024 * 1024)):
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "prefetched": 0}
+        self._entries = OrderedDict()  # abspath -> (stamp, size, text)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _store(self, key: str, st, text: str):
+        size = st.st_size
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous:
+                self._bytes -= previous[1]
+            self._entries[key] = (_stamp(st), size, text)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self._bytes -= old_size
+
+    def cached(self, key: str, st) -> str:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != _stamp(st):
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def read_text(self, path) -> str:
+        """Like Path.read_text(encoding="utf-8"), served from the cache while the file is unchanged"""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        text = self.cached(key, st)
+        if text is not None:
+            self.stats["hits"] += 1
+            return text
+        self.stats["misses"] += 1
+        with open(key, encoding="utf-8") as f:
+            text = f.read()
+        self._store(key, st, text)
+        return text
+
+    def warm(self, path: str):
+        """Load a file into the cache unless it is already fresh; errors are ignored"""
+        try:
+            st = os.stat(path)
+            if st.st_size > MAX_PREFETCH_BYTES or self.cached(path, st) is not None:
+                return
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError):
+            return
+        self._store(path, st, text)
+        self.stats["prefetched"] += 1
+        if PREFETCH_OUTLINES:
+            from penelope.tools.outline_tools import language_for, outline_source
+            language = language_for(path)
+            if language:
+                outline_source(text, language)
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._bytes = 0
+                return
+            entry = self._entries.pop(os.path.abspath(path), None)
+            if entry:
+                self._bytes -= entry[1]
+
+    def describe(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes, **self.stats}
+
+_cache = FileCache()
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_file_cache() -> FileCache:
+    return _cache
+
+def read_text(path) -> str:
+    return _cache.read_text(path)
+
+def invalidate(path=None):
+    _cache.invalidate(path)
+
+# ============================================================================
+# PREFETCH
+# ============================================================================
+
+def _likely_score(name: str) -> int:
+    stem, ext = os.path.splitext(name.lower())
+    if ext in _BINARY_EXTENSIONS or stem.startswith("."):
+        return -1
+    score = 2 if ext in _SOURCE_EXTENSIONS else 0
+    return score + (3 if stem in _LIKELY_NAMES else 0)
+
+def prefetch_candidates(tool_name: str, params: dict, result: str, cwd: str, limit: int = PREFETCH_FILES) -> list:
+    """Absolute paths the model is most likely to read next, best first"""
+    if not isinstance(result, str) or result.startswith("Error"):
+        return []
+    if tool_name == "list_dir":
+        base = os.path.join(cwd, params.get("path") or ".")
+        names = [line[len("[FILE] "):] for line in result.splitlines() if line.startswith("[FILE] ")]
+        ranked = sorted((n for n in names if _likely_score(n) >= 0), key=lambda n: -_likely_score(n))
+        return [os.path.abspath(os.path.join(base, n)) for n in ranked[:limit]]
+
+    # grep_search / search_files: "--- path ---" headers followed by matching lines
+    counts = {}
+    current = None
+    for line in result.splitlines():
+        match = _HEADER_RE.match(line)
+        if match:
+            current = os.path.abspath(os.path.join(cwd, match.group(1)))
+            counts.setdefault(current, 0)
+        elif current and line.strip():
+            counts[current] += 1
+    ranked = sorted(counts, key=lambda p: -counts[p])  # stable: ties keep result order
+    return [p for p in ranked if _likely_score(os.path.basename(p)) >= 0][:limit]
+
+def prefetch(paths: list):
+    """Warm the cache for paths on the background prefetch threads"""
+    global _executor
+    if not paths:
+        return
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="penelope-prefetch")
+    for path in paths:
+        _executor.submit(_cache.warm, path)
+
+def prefetch_from_result(tool_name: str, params: dict, result: str, cwd: str) -> list:
+    """Start prefetching after a listing or search; returns the paths queued"""
+    if not PREFETCH_ENABLED or tool_name not in PREFETCH_TOOLS:
+        return []
+    paths = prefetch_candidates(tool_name, params, result, cwd)
+    prefetch(paths)
+    return paths
@@ -1,10 +1,22 @@
 import os
 from pathlib import Path
 
-def read_file(path: str) -> str:
-    """Read the content of a file."""
+from penelope.tools import file_cache
+
+def read_file(path: str, start_line: int = None, end_line: int = None) -> str:
+    """Read the content of a file, or only lines start_line..end_line (1-based, inclusive, numbered)."""
     try:
-        return Path(path).read_text(encoding="utf-8")
+        text = file_cache.read_text(path)
+        if start_line is None and end_line is None:
+            return text
+        lines = text.splitlines()
+        start = max(1, int(start_line or 1))
+        end = min(len(lines), int(end_line or len(lines)))
+        if start > end:
+            return f"Error: {path} has {len(lines)} lines; the range {start}-{end_line or 'end'} is empty."
+        width = len(str(end))
+        numbered = "\n".join(f"{n:>{width}}: {lines[n - 1]}" for n in range(start, end + 1))
+        return f"{path} lines {start}-{end} of {len(lines)}\n{numbered}"
     except Exception as e:
         return f"Error reading file: {str(e)}"
 
@@ -14,6 +26,7 @@ def write_file(path: str, content: str) -> str:
         p = Path(path)
         p.parent.mkdir(parents=True, exist_ok=True)
         p.write_text(content, encoding="utf-8")
+        file_cache.invalidate(path)
         return f"Successfully wrote to {path}"
     except Exception as e:
         return f"Error writing file: {str(e)}"
@@ -29,6 +42,7 @@ def replace_text(path: str, old_text: str, new_text: str) -> str:
             return f"Error: Text not found in {path}."
         new_content = content.replace(old_text, new_text)
         p.write_text(new_content, encoding="utf-8")
+        file_cache.invalidate(path)
         return f"Successfully updated {path}"
     except Exception as e:
         return f"Error replacing text: {str(e)}"
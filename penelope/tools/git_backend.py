@@ -0,0 +1,387 @@
+"""
+Git Object Backend for Penelope
+Keeps long-lived `git cat-file --batch` / `--batch-check` processes per
+repository so blobs, trees and commits can be read at any revision without
+spawning a new git process for every lookup
+
+Also provides a cached `git status --porcelain=v2` summary that is only
+recomputed when the index/HEAD change, the cache expires or a mutating
+tool invalidates it
+"""
+import atexit
+import os
+import platform
+import re
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+STATUS_CACHE_TTL = float(os.getenv("PENELOPE_GIT_STATUS_TTL", "5"))
+STATUS_LIST_LIMIT = 50
+
+class GitObjectError(Exception):
+    """Raised when a git object cannot be resolved"""
+
+class CatFileProcess:
+    """A single long-lived `git cat-file` process speaking the batch protocol"""
+
+    def __init__(self, repo_root: str, mode: str = "--batch"):
+        self.repo_root = repo_root
+        self.mode = mode
+        self._process = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                ["git", "cat-file", self.mode],
+                cwd=self.repo_root,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+
+    def _request(self, spec: str) -> Tuple[str, str, int, Optional[bytes]]:
+        self._ensure_started()
+        self._process.stdin.write(spec.encode("utf-8") + b"\n")
+        self._process.stdin.flush()
+
+        header = self._process.stdout.readline().decode("utf-8", errors="replace").rstrip("\n")
+        if not header:
+            raise BrokenPipeError("git cat-file exited")
+        # "<spec> missing" / "<spec> ambiguous"; checked first because the spec may contain spaces
+        for problem in ("missing", "ambiguous"):
+            if header.endswith(f" {problem}"):
+                raise GitObjectError(f"{spec}: {problem}")
+        parts = header.split()
+        if len(parts) != 3 or not parts[2].isdigit():
+            raise GitObjectError(f"{spec}: unexpected reply {header!r}")
+
+        oid, obj_type, size = parts[0], parts[1], int(parts[2])
+        content = None
+        if self.mode == "--batch":
+            content = self._process.stdout.read(size)
+            self._process.stdout.read(1)  # trailing newline
+        return oid, obj_type, size, content
+
+    def query(self, spec: str) -> Tuple[str, str, int, Optional[bytes]]:
+        """Return (oid, type, size, content) for an object spec like 'HEAD:README.md'"""
+        if "\n" in spec:
+            raise GitObjectError("Object spec may not contain newlines")
+        with self._lock:
+            try:
+                return self._request(spec)
+            except (BrokenPipeError, OSError):
+                # Process died (e.g. repository was repacked or removed); restart once
+                self.close()
+                return self._request(spec)
+
+    def close(self):
+        process, self._process = self._process, None
+        if process and process.poll() is None:
+            try:
+                process.stdin.close()
+                process.wait(timeout=2)
+            except Exception:
+                process.kill()
+
+class GitRepository:
+    """Object access for one repository through persistent cat-file processes"""
+
+    def __init__(self, root: str, git_dir: str = None):
+        self.root = root
+        self.git_dir = git_dir or str(Path(root) / ".git")
+        self._status_cache = None
+        self._status_lock = threading.Lock()
+        self._batch = CatFileProcess(root, "--batch")
+        self._check = CatFileProcess(root, "--batch-check")
+
+    def relative_path(self, path: str, cwd: str = None) -> str:
+        """Convert a path relative to cwd into a repository-relative posix path"""
+        full = (Path(cwd or self.root) / path).resolve()
+        try:
+            return full.relative_to(self.root).as_posix()
+        except ValueError:
+            raise GitObjectError(f"{path} is outside repository {self.root}")
+
+    def object_info(self, spec: str) -> Tuple[str, str, int]:
+        oid, obj_type, size, _ = self._check.query(spec)
+        return oid, obj_type, size
+
+    def read_object(self, spec: str) -> Tuple[str, str, bytes]:
+        oid, obj_type, _, content = self._batch.query(spec)
+        return oid, obj_type, content
+
+    def read_blob(self, rev: str, path: str) -> bytes:
+        oid, obj_type, content = self.read_object(f"{rev}:{path}")
+        if obj_type != "blob":
+            raise GitObjectError(f"{rev}:{path} is a {obj_type}, not a file")
+        return content
+
+    def read_tree(self, spec: str) -> list:
+        """Return tree entries as (mode, type, oid, name) tuples"""
+        oid, obj_type, content = self.read_object(spec)
+        if obj_type == "commit":
+            oid, obj_type, content = self.read_object(f"{spec}^{{tree}}")
+        if obj_type != "tree":
+            raise GitObjectError(f"{spec} is a {obj_type}, not a tree")
+
+        oid_bytes = len(oid) // 2
+        entries = []
+        pos = 0
+        while pos < len(content):
+            space = content.index(b" ", pos)
+            nul = content.index(b"\0", space)
+            mode = content[pos:space].decode()
+            name = content[space + 1:nul].decode("utf-8", errors="replace")
+            entry_oid = content[nul + 1:nul + 1 + oid_bytes].hex()
+            entry_type = "tree" if mode == "40000" else "commit" if mode == "160000" else "blob"
+            entries.append((mode.zfill(6), entry_type, entry_oid, name))
+            pos = nul + 1 + oid_bytes
+        return entries
+
+    def read_commit(self, rev: str) -> dict:
+        oid, obj_type, content = self.read_object(f"{rev}^{{commit}}")
+        text = content.decode("utf-8", errors="replace")
+        header, _, message = text.partition("\n\n")
+        commit = {"oid": oid, "parents": [], "message": message.strip()}
+        for line in header.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "parent":
+                commit["parents"].append(value)
+            elif key in ("tree", "author", "committer"):
+                commit[key] = value
+        return commit
+
+    def _state_fingerprint(self) -> tuple:
+        """mtimes of the files git rewrites when the index or HEAD change"""
+        stamps = []
+        for name in ("index", "HEAD"):
+            try:
+                stamps.append(os.stat(os.path.join(self.git_dir, name)).st_mtime_ns)
+            except OSError:
+                stamps.append(None)
+        return tuple(stamps)
+
+    def invalidate_status(self):
+        self._status_cache = None
+
+    def status(self, use_cache: bool = True) -> dict:
+        """Parsed `git status --porcelain=v2`, cached until the repository state changes"""
+        with self._status_lock:
+            fingerprint = self._state_fingerprint()
+            cached = self._status_cache
+            if (use_cache and cached and cached[0] == fingerprint
+                    and time.monotonic() - cached[1] < STATUS_CACHE_TTL):
+                return dict(cached[2], cached=True)
+
+            started = time.perf_counter()
+            result = subprocess.run(
+                ["git"] + _status_config() + ["status", "--porcelain=v2", "-z", "--branch"],
+                cwd=self.root,
+                capture_output=True,
+                timeout=60
+            )
+            if result.returncode != 0:
+                raise GitObjectError(result.stderr.decode("utf-8", errors="replace").strip())
+            summary = parse_porcelain_v2(result.stdout)
+            summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            # Re-read the fingerprint: git status may refresh the index itself
+            self._status_cache = (self._state_fingerprint(), time.monotonic(), summary)
+            return dict(summary, cached=False)
+
+    def close(self):
+        self._batch.close()
+        self._check.close()
+
+_repositories = {}
+_toplevels = {}
+_registry_lock = threading.Lock()
+_git_version = None
+
+def _get_git_version() -> tuple:
+    global _git_version
+    if _git_version is None:
+        try:
+            output = subprocess.run(["git", "version"], capture_output=True, text=True, timeout=10).stdout
+            numbers = output.split()[2].split(".")[:2]
+            _git_version = tuple(int(n) for n in numbers)
+        except Exception:
+            _git_version = (0, 0)
+    return _git_version
+
+def _status_config() -> list:
+    """Enable the untracked cache, and the builtin fsmonitor where git supports it"""
+    config = ["-c", "core.untrackedCache=true"]
+    if (platform.system() in ("Windows", "Darwin") and _get_git_version() >= (2, 36)
+            and os.getenv("PENELOPE_GIT_FSMONITOR", "1") != "0"):
+        config += ["-c", "core.fsmonitor=true"]
+    return config
+
+def get_repository(path: str = ".") -> GitRepository:
+    """Return the (cached) repository containing path"""
+    cwd = str(Path(path).resolve())
+    with _registry_lock:
+        root = _toplevels.get(cwd)
+    git_dir = None
+    if root is None:
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "--absolute-git-dir"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode != 0:
+            raise GitObjectError(result.stderr.strip() or f"{cwd} is not a git repository")
+        lines = result.stdout.strip().splitlines()
+        root = str(Path(lines[0]).resolve())
+        git_dir = lines[1] if len(lines) > 1 else None
+    with _registry_lock:
+        _toplevels[cwd] = root
+        if root not in _repositories:
+            _repositories[root] = GitRepository(root, git_dir)
+        return _repositories[root]
+
+def _submodules(repo: Path) -> list:
+    """Checked-out submodules of a repository (from .gitmodules), recursively"""
+    try:
+        text = (repo / ".gitmodules").read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return []
+    found = []
+    for match in re.finditer(r"^\s*path\s*=\s*(.+?)\s*$", text, re.MULTILINE):
+        submodule = repo / match.group(1)
+        if (submodule / ".git").exists():
+            found.append(str(submodule))
+            found.extend(_submodules(submodule))
+    return found
+
+def discover_repositories(root: str, max_depth: int = 3) -> list:
+    """Find git repositories (including worktrees and submodules) under root"""
+    root_path = Path(root).resolve()
+    repos = []
+    for current, dirs, files in os.walk(root_path):
+        depth = len(Path(current).relative_to(root_path).parts)
+        if ".git" in dirs or ".git" in files:
+            repos.append(current)
+            repos.extend(_submodules(Path(current)))
+            dirs[:] = []  # don't descend into a repository's working tree
+            continue
+        if depth >= max_depth:
+            dirs[:] = []
+            continue
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ['node_modules', '__pycache__', 'venv']]
+    return sorted(repos)
+
+def invalidate_status(path: str = None):
+    """Drop cached status for the repository containing path, or for all repositories"""
+    with _registry_lock:
+        repos = list(_repositories.values())
+    if path is None:
+        for repo in repos:
+            repo.invalidate_status()
+        return
+    target = Path(path).resolve()
+    for repo in repos:
+        if target == Path(repo.root) or Path(repo.root) in target.parents:
+            repo.invalidate_status()
+
+def close_all():
+    """Stop all cat-file processes"""
+    with _registry_lock:
+        for repo in _repositories.values():
+            repo.close()
+        _repositories.clear()
+
+atexit.register(close_all)
+
+def format_object(repo: GitRepository, spec: str, max_bytes: int = 200_000) -> str:
+    """Render any git object (commit, tree, blob, tag) as text for the agent"""
+    oid, obj_type, size = repo.object_info(spec)
+    if obj_type == "commit":
+        commit = repo.read_commit(oid)
+        lines = [f"commit {commit['oid']}"]
+        lines += [f"parent {p}" for p in commit["parents"]]
+        lines += [f"author {commit.get('author', '')}", "", commit["message"]]
+        return "\n".join(lines)
+    if obj_type == "tree":
+        entries = repo.read_tree(oid)
+        return "\n".join(f"{mode} {etype} {eoid[:12]}  {name}{'/' if etype == 'tree' else ''}"
+                         for mode, etype, eoid, name in entries) or "(empty tree)"
+    _, _, content = repo.read_object(oid)
+    if b"\0" in content[:8000]:
+        return f"Binary {obj_type} {oid[:12]} ({size} bytes)"
+    text = content[:max_bytes].decode("utf-8", errors="replace")
+    if size > max_bytes:
+        text += f"\n... [{size - max_bytes} more bytes]"
+    return text
+
+def parse_porcelain_v2(data: bytes) -> dict:
+    """Parse `git status --porcelain=v2 -z --branch` output into a summary dict"""
+    summary = {"branch": None, "upstream": None, "ahead": 0, "behind": 0,
+               "staged": [], "unstaged": [], "untracked": [], "conflicts": []}
+    records = data.decode("utf-8", errors="replace").split("\0")
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record:
+            continue
+        kind = record[0]
+        if kind == "#":
+            parts = record.split(" ", 2)
+            key, value = parts[1], parts[2] if len(parts) > 2 else ""
+            if key == "branch.head":
+                summary["branch"] = value
+            elif key == "branch.upstream":
+                summary["upstream"] = value
+            elif key == "branch.ab":
+                ahead, behind = value.split()
+                summary["ahead"], summary["behind"] = int(ahead), -int(behind)
+        elif kind in ("1", "2"):
+            fields = record.split(" ", 8 if kind == "1" else 9)
+            xy, path = fields[1], fields[-1]
+            if kind == "2":
+                path = f"{records[i]} -> {path}"  # rename/copy source follows
+                i += 1
+            if xy[0] != ".":
+                summary["staged"].append((xy[0], path))
+            if xy[1] != ".":
+                summary["unstaged"].append((xy[1], path))
+        elif kind == "u":
+            summary["conflicts"].append(record.split(" ", 10)[-1])
+        elif kind == "?":
+            summary["untracked"].append(record[2:])
+    summary["clean"] = not (summary["staged"] or summary["unstaged"]
+                            or summary["untracked"] or summary["conflicts"])
+    return summary
+
+def format_status(summary: dict) -> str:
+    """Compact text rendering of a parsed status summary"""
+    branch = summary.get("branch") or "(unknown)"
+    line = f"branch {branch}"
+    if summary.get("upstream"):
+        line += f" -> {summary['upstream']} (ahead {summary['ahead']}, behind {summary['behind']})"
+    lines = [line]
+
+    def add_section(title, entries):
+        if not entries:
+            return
+        shown = entries[:STATUS_LIST_LIMIT]
+        text = ", ".join(f"{e[0]} {e[1]}" if isinstance(e, tuple) else e for e in shown)
+        if len(entries) > len(shown):
+            text += f", ... +{len(entries) - len(shown)} more"
+        lines.append(f"{title} ({len(entries)}): {text}")
+
+    add_section("conflicts", summary["conflicts"])
+    add_section("staged", summary["staged"])
+    add_section("unstaged", summary["unstaged"])
+    add_section("untracked", summary["untracked"])
+    if summary["clean"]:
+        lines.append("working tree clean")
+    source = "cached" if summary.get("cached") else f"{summary.get('elapsed_ms', 0)} ms"
+    lines.append(f"[status {source}]")
+    return "\n".join(lines)
@@ -70,6 +70,20 @@ def _type_text(text: str, delay: float = 0.1):
     except Exception as e:
         return False
 
+def _split_args(args) -> list:
+    """Accept script arguments as a list or a shell-style string"""
+    if not args:
+        return []
+    if isinstance(args, str):
+        import shlex
+        return shlex.split(args, posix=platform.system() != "Windows")
+    return [str(a) for a in args]
+
+def _start_background_job(cmd, cwd=None, name: str = None) -> str:
+    """Start a command as a background job instead of blocking on it"""
+    from penelope.tools.job_tools import start_job
+    return start_job(cmd, cwd, name)
+
 # ============================================================================
 # CURSOR IDE CONTROL
 # ============================================================================
@@ -681,18 +695,38 @@ def control_git(action: str, **kwargs) -> str:
     
     Available actions:
     - "init": Initialize a new repository (requires path)
-    - "status": Check repository status (requires path)
+    - "status": Compact, cached repository status (requires path, optional
+      raw=True for plain `git status` text, fresh=True to bypass the cache,
+      format="json" for the parsed summary)
     - "add": Add files to staging (requires path, optional files)
     - "commit": Make a commit (requires path, message)
     - "push": Push to remote (requires path)
     - "pull": Pull from remote (requires path)
     - "branch": List/create branches (requires path, optional branch_name)
     - "log": Show commit log (requires path)
+    - "show_file_at": Show a file at a revision (requires file, optional rev, default HEAD)
+    - "show_object": Show any commit, tree or blob (requires rev, e.g. "HEAD~3" or "main:src")
+    - "list_tree": List a directory at a revision (optional rev, dir)
+    - "diff_stat": Diffstat between revisions (optional base, default HEAD, and rev)
+    - "blame_range": Blame a line range (requires file, start, end, optional rev)
+
+    show_file_at, show_object and list_tree read objects through a long-lived
+    `git cat-file --batch` process per repository (see git_backend).
+
+    Pass all_repos=True to run the action on every repository found under
+    path (optional max_workers, default 8, and max_depth, default 3).
     """
     try:
         path = kwargs.get("path", ".")
         cwd = Path(path).resolve() if path else Path.cwd()
         
+        if kwargs.get("all_repos"):
+            return _control_git_bulk(action, cwd, **kwargs)
+        
+        if action in ("init", "add", "commit", "push", "pull", "branch"):
+            from penelope.tools.git_backend import invalidate_status
+            invalidate_status(str(cwd))
+        
         if action == "init":
             result = subprocess.run(
                 ["git", "init"],
@@ -704,6 +738,16 @@ def control_git(action: str, **kwargs) -> str:
             return result.stdout or "Repository initialized"
         
         elif action == "status":
+            if not kwargs.get("raw"):
+                from penelope.tools.git_backend import get_repository, format_status, GitObjectError
+                try:
+                    summary = get_repository(str(cwd)).status(use_cache=not kwargs.get("fresh"))
+                except GitObjectError as e:
+                    return f"Error: {e}"
+                if kwargs.get("format") == "json":
+                    import json
+                    return json.dumps(summary)
+                return format_status(summary)
             result = subprocess.run(
                 ["git", "status"],
                 cwd=str(cwd),
@@ -788,12 +832,115 @@ def control_git(action: str, **kwargs) -> str:
             )
             return result.stdout or "No commits found"
         
+        elif action in ("show_file_at", "show_object", "list_tree"):
+            from penelope.tools.git_backend import get_repository, format_object, GitObjectError
+            try:
+                repo = get_repository(str(cwd))
+                rev = kwargs.get("rev", "HEAD")
+                if action == "show_file_at":
+                    file_path = kwargs.get("file", "")
+                    if not file_path:
+                        return "Error: file parameter required"
+                    return format_object(repo, f"{rev}:{repo.relative_path(file_path, str(cwd))}")
+                if action == "show_object":
+                    return format_object(repo, rev)
+                directory = repo.relative_path(kwargs.get("dir", "."), str(cwd))
+                spec = f"{rev}:" if directory == "." else f"{rev}:{directory}"
+                return format_object(repo, spec)
+            except GitObjectError as e:
+                return f"Error: {e}"
+        
+        elif action == "diff_stat":
+            base = kwargs.get("base", "HEAD")
+            rev = kwargs.get("rev", "")
+            cmd = ["git", "diff", "--stat", base] + ([rev] if rev else [])
+            result = subprocess.run(
+                cmd,
+                cwd=str(cwd),
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            return result.stdout or result.stderr or "No differences"
+        
+        elif action == "blame_range":
+            file_path = kwargs.get("file", "")
+            if not file_path:
+                return "Error: file parameter required"
+            start = int(kwargs.get("start", 1))
+            end = int(kwargs.get("end", start + 20))
+            cmd = ["git", "blame", "-L", f"{start},{end}"]
+            if kwargs.get("rev"):
+                cmd.append(kwargs["rev"])
+            result = subprocess.run(
+                cmd + ["--", file_path],
+                cwd=str(cwd),
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            return result.stdout or result.stderr or "No blame output"
+        
         else:
-            return f"Error: Unknown action '{action}'. Available: init, status, add, commit, push, pull, branch, log"
+            available_actions = [
+                "init", "status", "add", "commit", "push", "pull", "branch", "log",
+                "show_file_at", "show_object", "list_tree", "diff_stat", "blame_range"
+            ]
+            return f"Error: Unknown action '{action}'. Available: {', '.join(available_actions)}"
     
     except Exception as e:
         return f"Error executing Git action '{action}': {str(e)}"
 
+def _control_git_bulk(action: str, root: Path, **kwargs) -> str:
+    """Run a git action on all repositories under root with a bounded worker pool"""
+    from concurrent.futures import ThreadPoolExecutor
+    from penelope.tools.git_backend import discover_repositories, get_repository, GitObjectError
+
+    if action == "init":
+        return "Error: init cannot be used with all_repos"
+    repos = discover_repositories(str(root), int(kwargs.get("max_depth", 3)))
+    if not repos:
+        return f"No git repositories found under {root}"
+
+    repo_kwargs = {k: v for k, v in kwargs.items() if k not in ("path", "all_repos", "max_workers", "max_depth")}
+
+    def run_one(repo_path):
+        started = time.perf_counter()
+        try:
+            if action == "status" and not repo_kwargs.get("raw"):
+                summary = get_repository(repo_path).status(use_cache=not repo_kwargs.get("fresh"))
+                ahead_behind = f"+{summary['ahead']}/-{summary['behind']}" if summary["upstream"] else "no upstream"
+                output = (f"{summary['branch']} {ahead_behind} staged:{len(summary['staged'])} "
+                          f"unstaged:{len(summary['unstaged'])} untracked:{len(summary['untracked'])}"
+                          f"{' conflicts:' + str(len(summary['conflicts'])) if summary['conflicts'] else ''}"
+                          f"{' clean' if summary['clean'] else ''}")
+            else:
+                output = control_git(action, path=repo_path, **repo_kwargs)
+        except GitObjectError as e:
+            output = f"Error: {e}"
+        return repo_path, output.strip(), time.perf_counter() - started
+
+    wall_start = time.perf_counter()
+    workers = max(1, int(kwargs.get("max_workers", 8)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_one, repos))
+    wall = time.perf_counter() - wall_start
+
+    results.sort(key=lambda r: r[0].lower())
+    slowest = max(results, key=lambda r: r[2])
+    lines = [
+        f"git {action} on {len(results)} repositories under {root} "
+        f"({wall:.2f}s wall, {sum(r[2] for r in results):.2f}s total, {workers} workers; "
+        f"slowest {Path(slowest[0]).name} {slowest[2]:.2f}s)"
+    ]
+    for repo_path, output, elapsed in results:
+        name = Path(repo_path).relative_to(root).as_posix() if repo_path != str(root) else "."
+        if "\n" not in output:
+            lines.append(f"{name} ({elapsed * 1000:.0f} ms): {output}")
+        else:
+            lines.append(f"== {name} ({elapsed * 1000:.0f} ms) ==\n{output}")
+    return "\n".join(lines)
+
 # ============================================================================
 # PYTHON DEVELOPMENT TOOLS
 # ============================================================================
@@ -803,28 +950,52 @@ def control_python(action: str, **kwargs) -> str:
     Control Python development operations.
 
     Available actions:
-    - "run_script": Run a Python script (requires path)
-    - "install_package": Install a package via pip (requires package)
-    - "run_tests": Run pytest tests (requires path)
-    - "create_venv": Create virtual environment (requires path)
-    - "check_syntax": Check Python syntax (requires path)
-    - "install_requirements": Install from requirements.txt
+    - "run_script": Run a Python script (requires path, optional background)
+    - "install_package": Install a package via pip (requires package, optional offline)
+    - "run_tests": Run pytest tests (requires path, optional background). With
+      smart=True only tests affected by changes since the last run are run,
+      previously failed tests first, sharded over workers (optional workers,
+      affected_only=False for the full suite) with a structured summary
+    - "create_venv": Create virtual environment (requires path, optional
+      requirements to reuse/clone a cached environment with the same requirements hash)
+    - "check_syntax": Check Python syntax of files and directories in one call
+      (requires path: a file, directory or comma-separated list, or paths: list)
+    - "install_requirements": Install from requirements.txt (optional managed=True
+      to get a cached environment for it instead, optional venv target)
+    - "build_wheelhouse": Download wheels for requirements into the local wheelhouse
     - "create_package": Create Python package structure
     - "run_linter": Run flake8 or pylint
     - "generate_docs": Generate documentation with sphinx
-    - "profile_code": Profile Python code performance
+    - "profile_code": Profile a script with cProfile and show the top functions by
+      cumulative and self time (requires path, optional args, top, output .pstats)
+    - "compare_profiles": Diff two .pstats files to show regressions (requires base, new,
+      optional min_ms noise floor, default 1 ms)
+    - "sample_profile": Profile a script with the sampling profiler and write
+      collapsed stacks for flame graphs (requires path, optional args, interval)
     - "debug_script": Run script with debugger
     - "create_test": Generate unit test template
+
+    Relative paths and commands are taken from cwd when given (the agent passes
+    its working directory) instead of the process working directory.
     """
+    cwd = kwargs.pop("cwd", None)
+
+    def here(path):
+        """path resolved against cwd (the calling agent's working directory) when relative"""
+        return os.path.join(cwd, path) if cwd and path and not os.path.isabs(path) else path
+
     try:
         if action == "run_script":
             script_path = kwargs.get("path", "")
             if not script_path:
                 return "Error: path parameter required"
+            if kwargs.get("background"):
+                return _start_background_job(["python", script_path], cwd, f"python {script_path}")
             result = subprocess.run(
                 ["python", script_path],
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=120
             )
             return result.stdout or result.stderr or "Script executed"
@@ -833,76 +1004,97 @@ def control_python(action: str, **kwargs) -> str:
             package = kwargs.get("package", "")
             if not package:
                 return "Error: package parameter required"
+            from penelope.tools.venv_tools import pip_source_args
             result = subprocess.run(
-                ["pip", "install", package],
+                ["pip", "install", package] + pip_source_args(kwargs.get("offline")),
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=300
             )
             return result.stdout or result.stderr or f"Installed {package}"
 
         elif action == "run_tests":
             test_path = kwargs.get("path", ".")
+            if kwargs.get("smart"):
+                from penelope.tools.test_runner import run_tests
+                workers = kwargs.get("workers")
+                return run_tests(
+                    here(test_path),
+                    workers=int(workers) if workers else None,
+                    affected_only=kwargs.get("affected_only", True),
+                    extra_args=_split_args(kwargs.get("args"))
+                )
+            if kwargs.get("background"):
+                return _start_background_job(["pytest", test_path], cwd, f"pytest {test_path}")
             result = subprocess.run(
                 ["pytest", test_path],
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=300
             )
             return result.stdout or result.stderr or "Tests executed"
 
         elif action == "create_venv":
             venv_path = kwargs.get("path", "venv")
+            if kwargs.get("requirements"):
+                from penelope.tools.venv_tools import ensure_env
+                return ensure_env(here(kwargs["requirements"]), target=here(venv_path), offline=kwargs.get("offline"))
             result = subprocess.run(
                 ["python", "-m", "venv", venv_path],
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=60
             )
             return result.stdout or f"Created virtual environment: {venv_path}"
 
         elif action == "check_syntax":
-            file_path = kwargs.get("path", "")
-            if not file_path:
+            paths = kwargs.get("paths") or kwargs.get("path", "")
+            if not paths:
                 return "Error: path parameter required"
-            result = subprocess.run(
-                ["python", "-m", "py_compile", file_path],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            if result.returncode == 0:
-                return f"Syntax check passed for {file_path}"
-            else:
-                return f"Syntax errors in {file_path}: {result.stderr}"
+            from penelope.tools.syntax_tools import check_syntax
+            if isinstance(paths, str):
+                paths = [p.strip() for p in paths.split(",")]
+            return check_syntax([here(p) for p in paths])
 
         elif action == "install_requirements":
-            req_file = kwargs.get("path", "requirements.txt")
+            req_file = here(kwargs.get("path", "requirements.txt"))
             if not os.path.exists(req_file):
                 return f"Error: {req_file} not found"
+            from penelope.tools.venv_tools import ensure_env, pip_source_args
+            if kwargs.get("managed"):
+                return ensure_env(req_file, target=here(kwargs.get("venv")), offline=kwargs.get("offline"))
             result = subprocess.run(
-                ["pip", "install", "-r", req_file],
+                ["pip", "install", "-r", req_file] + pip_source_args(kwargs.get("offline")),
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=600
             )
             return result.stdout or result.stderr or f"Installed requirements from {req_file}"
 
+        elif action == "build_wheelhouse":
+            from penelope.tools.venv_tools import build_wheelhouse
+            return build_wheelhouse(here(kwargs.get("path", "requirements.txt")))
+
         elif action == "create_package":
             package_name = kwargs.get("name", "")
             if not package_name:
                 return "Error: name parameter required"
 
             # Create package structure
-            os.makedirs(package_name, exist_ok=True)
-            os.makedirs(f"{package_name}/tests", exist_ok=True)
+            package_dir = here(package_name)
+            os.makedirs(package_dir, exist_ok=True)
+            os.makedirs(f"{package_dir}/tests", exist_ok=True)
 
             # Create __init__.py
-            with open(f"{package_name}/__init__.py", "w") as f:
+            with open(f"{package_dir}/__init__.py", "w") as f:
                 f.write(f'"""Package: {package_name}"""\n\n__version__ = "0.1.0"\n')
 
             # Create setup.py
-            with open(f"{package_name}/setup.py", "w") as f:
+            with open(f"{package_dir}/setup.py", "w") as f:
                 f.write(f'''"""Setup script for {package_name}"""
 
 from setuptools import setup, find_packages
@@ -916,7 +1108,7 @@ setup(
 ''')
 
             # Create README
-            with open(f"{package_name}/README.md", "w") as f:
+            with open(f"{package_dir}/README.md", "w") as f:
                 f.write(f"# {package_name}\n\nPython package for {package_name} functionality.\n")
 
             return f"Created Python package structure for '{package_name}'"
@@ -930,6 +1122,7 @@ setup(
                     ["flake8", file_path],
                     capture_output=True,
                     text=True,
+                    cwd=cwd,
                     timeout=120
                 )
             elif linter == "pylint":
@@ -937,6 +1130,7 @@ setup(
                     ["pylint", file_path],
                     capture_output=True,
                     text=True,
+                    cwd=cwd,
                     timeout=120
                 )
             else:
@@ -945,8 +1139,8 @@ setup(
             return result.stdout or result.stderr or f"Linted {file_path} with {linter}"
 
         elif action == "generate_docs":
-            docs_dir = kwargs.get("path", "docs")
-            if not os.path.exists("setup.py") and not os.path.exists("pyproject.toml"):
+            docs_dir = here(kwargs.get("path", "docs"))
+            if not os.path.exists(here("setup.py")) and not os.path.exists(here("pyproject.toml")):
                 return "Error: No Python project found (setup.py or pyproject.toml required)"
 
             # Create docs directory
@@ -958,6 +1152,7 @@ setup(
                  "--author", "Author", "--version", "0.1", "--release", "0.1"],
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=60
             )
 
@@ -968,13 +1163,36 @@ setup(
             if not script_path:
                 return "Error: path parameter required"
 
-            result = subprocess.run(
-                ["python", "-m", "cProfile", script_path],
-                capture_output=True,
-                text=True,
-                timeout=300
+            from penelope.tools.profile_tools import profile_script
+            return profile_script(
+                here(script_path),
+                args=_split_args(kwargs.get("args")),
+                top=int(kwargs.get("top", 20)),
+                output=here(kwargs.get("output")),
+                cwd=cwd
+            )
+
+        elif action == "compare_profiles":
+            base, new = kwargs.get("base", ""), kwargs.get("new", "")
+            if not base or not new:
+                return "Error: base and new parameters required (.pstats files)"
+            from penelope.tools.profile_tools import compare_pstats, DEFAULT_MIN_MS
+            return compare_pstats(here(base), here(new), top=int(kwargs.get("top", 20)),
+                                  min_ms=float(kwargs.get("min_ms", DEFAULT_MIN_MS)))
+
+        elif action == "sample_profile":
+            script_path = kwargs.get("path", "")
+            if not script_path:
+                return "Error: path parameter required"
+            from penelope.tools.profile_tools import sample_script
+            return sample_script(
+                here(script_path),
+                args=_split_args(kwargs.get("args")),
+                interval=float(kwargs.get("interval", 0.005)),
+                top=int(kwargs.get("top", 15)),
+                output=here(kwargs.get("output")),
+                cwd=cwd
             )
-            return result.stdout or result.stderr or f"Profiled {script_path}"
 
         elif action == "debug_script":
             script_path = kwargs.get("path", "")
@@ -985,6 +1203,7 @@ setup(
                 ["python", "-m", "pdb", script_path],
                 capture_output=True,
                 text=True,
+                cwd=cwd,
                 timeout=300,
                 input="c\n"  # Continue execution
             )
@@ -992,7 +1211,7 @@ setup(
 
         elif action == "create_test":
             test_name = kwargs.get("name", "test_example")
-            target_dir = kwargs.get("path", "tests")
+            target_dir = here(kwargs.get("path", "tests"))
 
             os.makedirs(target_dir, exist_ok=True)
 
@@ -1030,9 +1249,9 @@ if __name__ == "__main__":
         else:
             available_actions = [
                 "run_script", "install_package", "run_tests", "create_venv",
-                "check_syntax", "install_requirements", "create_package",
-                "run_linter", "generate_docs", "profile_code", "debug_script",
-                "create_test"
+                "check_syntax", "install_requirements", "build_wheelhouse", "create_package",
+                "run_linter", "generate_docs", "profile_code", "compare_profiles",
+                "sample_profile", "debug_script", "create_test"
             ]
             return f"Error: Unknown action '{action}'. Available: {', '.join(available_actions)}"
 
@@ -1049,10 +1268,13 @@ def control_npm(action: str, **kwargs) -> str:
 
     Available actions:
     - "init": Initialize npm project (requires path)
-    - "install": Install packages (requires path, optional package)
+    - "install": Install packages (requires path, optional package). Without a
+      package the install is skipped when package.json and the lockfile are
+      unchanged since the last install (force=True to reinstall); with a
+      lockfile `npm ci --prefer-offline` is used (offline=True for --offline)
     - "run_script": Run npm script (requires path, script_name)
     - "build": Run build script (requires path)
-    - "start": Start development server
+    - "start": Start development server (runs as a background job)
     - "test": Run test suite
     - "lint": Run linting
     - "format": Format code
@@ -1062,6 +1284,9 @@ def control_npm(action: str, **kwargs) -> str:
     - "update_dependencies": Update all dependencies
     - "audit": Run security audit
     - "publish": Publish package to npm
+
+    "run_script", "build", "test" and "lint" accept background=True to run
+    as a background job (see job_status / job_output / wait_job / kill_job).
     """
     try:
         path = kwargs.get("path", ".")
@@ -1082,6 +1307,10 @@ def control_npm(action: str, **kwargs) -> str:
             dev = kwargs.get("dev", False)
             global_install = kwargs.get("global", False)
 
+            if not package and not global_install:
+                from penelope.tools.npm_tools import install_dependencies
+                return install_dependencies(cwd, force=kwargs.get("force", False), offline=kwargs.get("offline", False))
+
             cmd = ["npm", "install"]
             if global_install:
                 cmd.append("-g")
@@ -1097,12 +1326,17 @@ def control_npm(action: str, **kwargs) -> str:
                 text=True,
                 timeout=300
             )
+            if result.returncode == 0 and not global_install:
+                from penelope.tools.npm_tools import record_install
+                record_install(cwd)
             return result.stdout or result.stderr or "Packages installed"
 
         elif action == "run_script":
             script_name = kwargs.get("script_name", "")
             if not script_name:
                 return "Error: script_name parameter required"
+            if kwargs.get("background"):
+                return _start_background_job(["npm", "run", script_name], cwd, f"npm run {script_name}")
             result = subprocess.run(
                 ["npm", "run", script_name],
                 cwd=str(cwd),
@@ -1113,6 +1347,8 @@ def control_npm(action: str, **kwargs) -> str:
             return result.stdout or result.stderr or f"Ran script: {script_name}"
 
         elif action == "build":
+            if kwargs.get("background"):
+                return _start_background_job(["npm", "run", "build"], cwd, "npm run build")
             result = subprocess.run(
                 ["npm", "run", "build"],
                 cwd=str(cwd),
@@ -1123,6 +1359,8 @@ def control_npm(action: str, **kwargs) -> str:
             return result.stdout or result.stderr or "Build completed"
 
         elif action == "start":
+            if kwargs.get("background", True):
+                return _start_background_job(["npm", "start"], cwd, "npm start")
             result = subprocess.run(
                 ["npm", "start"],
                 cwd=str(cwd),
@@ -1133,6 +1371,8 @@ def control_npm(action: str, **kwargs) -> str:
             return result.stdout or result.stderr or "Started development server"
 
         elif action == "test":
+            if kwargs.get("background"):
+                return _start_background_job(["npm", "test"], cwd, "npm test")
             result = subprocess.run(
                 ["npm", "test"],
                 cwd=str(cwd),
@@ -1143,6 +1383,8 @@ def control_npm(action: str, **kwargs) -> str:
             return result.stdout or result.stderr or "Tests completed"
 
         elif action == "lint":
+            if kwargs.get("background"):
+                return _start_background_job(["npm", "run", "lint"], cwd, "npm run lint")
             result = subprocess.run(
                 ["npm", "run", "lint"],
                 cwd=str(cwd),
@@ -1188,6 +1430,9 @@ def control_npm(action: str, **kwargs) -> str:
                 text=True,
                 timeout=300
             )
+            if result.returncode == 0:
+                from penelope.tools.npm_tools import record_install
+                record_install(cwd)
             return result.stdout or result.stderr or f"Added dependency: {package}"
 
         elif action == "remove_dependency":
@@ -1202,6 +1447,9 @@ def control_npm(action: str, **kwargs) -> str:
                 text=True,
                 timeout=120
             )
+            if result.returncode == 0:
+                from penelope.tools.npm_tools import record_install
+                record_install(cwd)
             return result.stdout or result.stderr or f"Removed dependency: {package}"
 
         elif action == "update_dependencies":
@@ -1212,6 +1460,9 @@ def control_npm(action: str, **kwargs) -> str:
                 text=True,
                 timeout=300
             )
+            if result.returncode == 0:
+                from penelope.tools.npm_tools import record_install
+                record_install(cwd)
             return result.stdout or result.stderr or "Updated all dependencies"
 
         elif action == "audit":
@@ -0,0 +1,200 @@
+"""
+Background Job Runner for Penelope
+Runs external commands concurrently in the background with a job table,
+so long builds, test runs and dev servers do not block the agent loop
+"""
+import atexit
+import os
+import platform
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional, Union, List
+
+JOBS_DIR = Path(os.getenv("PENELOPE_JOBS_DIR", str(Path.home() / ".penelope" / "jobs")))
+MAX_CONCURRENT_JOBS = int(os.getenv("PENELOPE_MAX_JOBS", "4"))
+
+class Job:
+    """A single background command and its state"""
+
+    def __init__(self, command: Union[str, List[str]], cwd: str, name: str = None):
+        self.id = uuid.uuid4().hex[:8]
+        self.command = command
+        self.cwd = cwd
+        self.name = name or (command if isinstance(command, str) else " ".join(command))
+        self.status = "queued"
+        self.returncode = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.log_path = JOBS_DIR / f"job_{self.id}.log"
+        self.process = None
+        self.done = threading.Event()
+
+    @property
+    def duration(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def describe(self) -> str:
+        line = f"[{self.id}] {self.status:<8} {self.duration:7.1f}s  {self.name}"
+        if self.returncode is not None:
+            line += f"  (exit {self.returncode})"
+        return line
+
+class JobManager:
+    """Job table with a concurrency limit on running commands"""
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_JOBS):
+        self.max_concurrent = max(1, max_concurrent)
+        self._slots = threading.Semaphore(self.max_concurrent)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def start(self, command: Union[str, List[str]], cwd: str = None, name: str = None) -> Job:
+        JOBS_DIR.mkdir(parents=True, exist_ok=True)
+        job = Job(command, str(Path(cwd).resolve()) if cwd else os.getcwd(), name)
+        with self._lock:
+            self._jobs[job.id] = job
+        threading.Thread(target=self._run, args=(job,), daemon=True).start()
+        return job
+
+    def _run(self, job: Job):
+        with self._slots:
+            if job.status == "killed":
+                job.done.set()
+                return
+            popen_kwargs = {}
+            if platform.system() == "Windows":
+                popen_kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                popen_kwargs["start_new_session"] = True
+            try:
+                with open(job.log_path, "wb") as log:
+                    job.process = subprocess.Popen(
+                        job.command,
+                        shell=isinstance(job.command, str),
+                        cwd=job.cwd,
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        stdin=subprocess.DEVNULL,
+                        **popen_kwargs
+                    )
+                    job.started_at = time.time()
+                    if job.status == "killed":
+                        job.process.kill()
+                    else:
+                        job.status = "running"
+                    job.returncode = job.process.wait()
+                if job.status != "killed":
+                    job.status = "finished" if job.returncode == 0 else "failed"
+            except Exception as e:
+                job.log_path.write_text(f"Error starting job: {e}\n", encoding="utf-8")
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                job.done.set()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.created_at)
+
+    def wait(self, job_id: str, timeout: float = None) -> bool:
+        job = self.get(job_id)
+        return job.done.wait(timeout) if job else False
+
+    def kill(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if not job or job.done.is_set():
+            return False
+        job.status = "killed"
+        process = job.process
+        if process and process.poll() is None:
+            try:
+                if platform.system() == "Windows":
+                    subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                                   capture_output=True, timeout=10)
+                else:
+                    os.killpg(process.pid, signal.SIGTERM)
+                process.wait(timeout=5)
+            except Exception:
+                process.kill()
+        return True
+
+    def tail(self, job_id: str, lines: int = 50) -> str:
+        job = self.get(job_id)
+        if not job or not job.log_path.exists():
+            return ""
+        with open(job.log_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            block = min(size, max(lines, 1) * 400)
+            f.seek(size - block)
+            data = f.read().decode("utf-8", errors="replace")
+        return "\n".join(data.splitlines()[-lines:])
+
+    def shutdown(self):
+        for job in self.list():
+            if not job.done.is_set():
+                self.kill(job.id)
+
+job_manager = JobManager()
+atexit.register(job_manager.shutdown)
+
+# ============================================================================
+# AGENT TOOLS
+# ============================================================================
+
+def start_job(command: str, cwd: str = None, name: str = None) -> str:
+    """Start a command in the background and return its job id immediately."""
+    try:
+        job = job_manager.start(command, cwd, name)
+        return (f"Started job {job.id}: {job.name}\n"
+                f"Use job_status, job_output('{job.id}'), wait_job('{job.id}') or kill_job('{job.id}').")
+    except Exception as e:
+        return f"Error starting job: {str(e)}"
+
+def job_status(job_id: str = None) -> str:
+    """Show the status of one job, or of all jobs when no id is given."""
+    if job_id:
+        job = job_manager.get(job_id)
+        return job.describe() if job else f"Error: Unknown job '{job_id}'"
+    jobs = job_manager.list()
+    if not jobs:
+        return "No jobs."
+    running = sum(1 for j in jobs if j.status == "running")
+    header = f"{len(jobs)} jobs, {running} running (limit {job_manager.max_concurrent})"
+    return "\n".join([header] + [j.describe() for j in jobs])
+
+def job_output(job_id: str, lines: int = 50) -> str:
+    """Show the last lines of a job's output."""
+    job = job_manager.get(job_id)
+    if not job:
+        return f"Error: Unknown job '{job_id}'"
+    output = job_manager.tail(job_id, int(lines))
+    return f"{job.describe()}\n{output}" if output else f"{job.describe()}\n(no output yet)"
+
+def wait_job(job_id: str, timeout: float = 60) -> str:
+    """Wait for a job to finish (up to timeout seconds) and show its output tail."""
+    job = job_manager.get(job_id)
+    if not job:
+        return f"Error: Unknown job '{job_id}'"
+    if not job_manager.wait(job_id, float(timeout)):
+        return f"Job still running after {timeout}s\n{job_output(job_id, 20)}"
+    return job_output(job_id)
+
+def kill_job(job_id: str) -> str:
+    """Kill a queued or running job."""
+    if not job_manager.get(job_id):
+        return f"Error: Unknown job '{job_id}'"
+    if job_manager.kill(job_id):
+        return f"Killed job {job_id}"
+    return f"Job {job_id} already finished"
@@ -0,0 +1,70 @@
+"""
+npm Install Fingerprinting for Penelope
+Skips `npm install` when package.json and the lockfile are unchanged since
+the last successful install into node_modules, and prefers `npm ci` with
+the offline cache when a lockfile exists
+"""
+import hashlib
+import subprocess
+import time
+from pathlib import Path
+
+FINGERPRINT_FILE = ".penelope-install-fingerprint"
+LOCKFILES = ("package-lock.json", "npm-shrinkwrap.json")
+
+def _lockfile(project: Path):
+    for name in LOCKFILES:
+        if (project / name).exists():
+            return project / name
+    return None
+
+def install_fingerprint(project: Path) -> str:
+    """Hash of package.json and the lockfile"""
+    digest = hashlib.sha256()
+    for path in (project / "package.json", _lockfile(project)):
+        if path and path.exists():
+            digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes())
+    return digest.hexdigest()[:16]
+
+def install_is_current(project: Path) -> bool:
+    """node_modules matches package.json + lockfile as of the last recorded install"""
+    node_modules = project / "node_modules"
+    # npm maintains node_modules/.package-lock.json (the hidden lockfile) for the installed tree
+    if not (node_modules / ".package-lock.json").exists():
+        return False
+    try:
+        recorded = (node_modules / FINGERPRINT_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return False
+    return recorded == install_fingerprint(project)
+
+def record_install(project: Path):
+    node_modules = project / "node_modules"
+    if node_modules.is_dir():
+        (node_modules / FINGERPRINT_FILE).write_text(install_fingerprint(project), encoding="utf-8")
+
+def install_dependencies(project: Path, force: bool = False, offline: bool = False, timeout: int = 600) -> str:
+    """Install the project's dependencies unless node_modules is already current"""
+    if not (project / "package.json").exists():
+        return f"Error: no package.json in {project}"
+    if not force and install_is_current(project):
+        return (f"node_modules is up to date with package.json and lockfile "
+                f"(fingerprint {install_fingerprint(project)}); skipped npm install. Use force=True to reinstall.")
+
+    lockfile = _lockfile(project)
+    cmd = ["npm", "ci" if lockfile else "install", "--no-audit", "--no-fund"]
+    cmd.append("--offline" if offline else "--prefer-offline")
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        cmd,
+        cwd=str(project),
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        return f"{' '.join(cmd)} failed after {elapsed:.1f}s:\n{result.stderr or result.stdout}"
+    record_install(project)
+    return f"{' '.join(cmd)} completed in {elapsed:.1f}s\n{result.stdout}"
@@ -0,0 +1,315 @@
+"""
+File Outlines for Penelope
+Compact structural summary of a source file: classes, functions with
+signatures and line ranges, and top-level constants. Python is parsed with
+ast; JavaScript/TypeScript, Kotlin and Java go through a small tokenizer
+that strips comments and strings and tracks brace depth. Outlines are
+cached by content hash, so unchanged files are only parsed once.
+
+Paired with read_file(path, start_line, end_line) this lets the agent read
+only the parts of a file it needs.
+"""
+import ast
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+MAX_CACHED_OUTLINES = 512
+MAX_SIGNATURE_CHARS = 140
+
+LANGUAGES = {
+    ".py": "Python", ".pyw": "Python",
+    ".js": "JavaScript", ".jsx": "JavaScript", ".mjs": "JavaScript", ".cjs": "JavaScript",
+    ".ts": "TypeScript", ".tsx": "TypeScript",
+    ".kt": "Kotlin", ".kts": "Kotlin",
+    ".java": "Java",
+}
+
+_cache = OrderedDict()  # (language, sha1 of source) -> outline lines
+_cache_lock = threading.Lock()
+
+def _clip(text: str) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= MAX_SIGNATURE_CHARS else text[:MAX_SIGNATURE_CHARS - 3] + "..."
+
+def _lines(start: int, end: int) -> str:
+    return f"L{start}" if not end or end == start else f"L{start}-{end}"
+
+# ============================================================================
+# PYTHON
+# ============================================================================
+
+def _decorators(node) -> str:
+    names = []
+    for d in node.decorator_list:
+        target = d.func if isinstance(d, ast.Call) else d
+        names.append("@" + ast.unparse(target))
+    return " ".join(names) + " " if names else ""
+
+def _python_function(node, indent: str) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {ast.unparse(node.returns)}" if node.returns else ""
+    signature = _clip(f"{_decorators(node)}{prefix} {node.name}({ast.unparse(node.args)}){returns}")
+    return f"{indent}{signature}  {_lines(node.lineno, node.end_lineno)}"
+
+def _python_class(node, indent: str) -> list:
+    bases = [ast.unparse(b) for b in node.bases] + [ast.unparse(k) for k in node.keywords]
+    header = f"class {node.name}({', '.join(bases)})" if bases else f"class {node.name}"
+    out = [f"{indent}{_clip(_decorators(node) + header)}  {_lines(node.lineno, node.end_lineno)}"]
+    for child in node.body:
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append(_python_function(child, indent + "  "))
+        elif isinstance(child, ast.ClassDef):
+            out.extend(_python_class(child, indent + "  "))
+    return out
+
+def _python_constant(node) -> str:
+    if isinstance(node, ast.Assign):
+        names = [t.id for t in node.targets if isinstance(t, ast.Name)]
+    elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+        names = [node.target.id]
+    else:
+        return ""
+    names = [n for n in names if n.isupper() or n == "__all__"]
+    return f"{', '.join(names)}  {_lines(node.lineno, node.end_lineno)}" if names else ""
+
+def _outline_python(source: str) -> list:
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        # Still useful on a half-edited file: fall back to definition lines
+        out = [f"(syntax error at line {getattr(e, 'lineno', '?')}; outline from definition lines)"]
+        for number, line in enumerate(source.splitlines(), 1):
+            match = re.match(r"(\s*)((?:async\s+)?def\s+\w+.*|class\s+\w+.*)", line)
+            if match and len(match.group(1)) <= 4:
+                out.append(f"{match.group(1)[:2]}{_clip(match.group(2).rstrip(':'))}  L{number}")
+        return out
+
+    out, imports, constants = [], [], []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            imports.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append("." * node.level + (node.module or ""))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            constant = _python_constant(node)
+            if constant:
+                constants.append(constant)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out.append(_python_function(node, ""))
+        elif isinstance(node, ast.ClassDef):
+            out.extend(_python_class(node, ""))
+    header = []
+    if ast.get_docstring(tree):
+        header.append(f'"""{_clip(ast.get_docstring(tree).splitlines()[0])}"""')
+    if imports:
+        unique = list(dict.fromkeys(imports))
+        header.append("imports: " + ", ".join(unique[:12]) + (f", ... (+{len(unique) - 12})" if len(unique) > 12 else ""))
+    return header + [f"const {c}" for c in constants] + out
+
+# ============================================================================
+# BRACE LANGUAGES (JS/TS, KOTLIN, JAVA)
+# ============================================================================
+
+_MODIFIERS = (r"(?:(?:export|default|declare|public|private|protected|internal|static|final|abstract|open|sealed|"
+              r"data|inline|override|suspend|async|readonly|synchronized|native|enum|annotation|inner|value|"
+              r"lateinit|const|operator|infix|tailrec|external|actual|expect|companion)\s+)*")
+_ANNOTATION = r"(?:@[\w.]+(?:\([^)]*\))?\s+)*"
+_TYPE_RE = re.compile(rf"^\s*{_ANNOTATION}{_MODIFIERS}(class|interface|enum|object|record|trait|namespace|module)\b\s*([\w$]*)")
+_FUNCTION_RES = (
+    # function name(...) / fun name(...) / fun <T> Type.name(...)
+    re.compile(rf"^\s*{_ANNOTATION}{_MODIFIERS}(?:function\*?|fun)\s+(?:<[^>]*>\s*)?(?:[\w.]+\.)?([\w$]+)\s*[(<]"),
+    # const name = (...) => / const name = async function
+    re.compile(rf"^\s*{_MODIFIERS}(?:const|let|var)\s+([\w$]+)\s*(?::[^=]+)?=\s*(?:async\s+)?(?:function\b|\([^)]*\)\s*(?::[^=]+)?=>|[\w$]+\s*=>)"),
+    # Java / TS members: [modifiers] [Type] name(...) {   (not control-flow keywords)
+    # (or a body-less declaration ending in ";", as in interfaces and abstract classes)
+    re.compile(rf"^\s*{_ANNOTATION}{_MODIFIERS}(?:<[^>]*>\s*)?(?:[\w$.<>\[\],?]+\s+)?([\w$]+)\s*\((?:[^;{{]*\{{.*|[^;]*|[^;{{]*\)[^;{{=]*;\s*)$"),
+)
+_CONSTANT_RE = re.compile(rf"^\s*{_MODIFIERS}(?:const|val|var|let|static\s+final\s+[\w<>\[\]]+|final\s+static\s+[\w<>\[\]]+)\s+([A-Z][A-Z0-9_]+)\b")
+_IMPORT_RE = re.compile(r"^\s*import\s+(?:[\w{}*,\s]+\s+from\s+)?['\"]?([\w@./:-]+)")
+_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "new", "else", "do", "try", "when",
+             "synchronized", "super", "this", "throw", "typeof", "await", "yield", "function"}
+
+def _strip_code(source: str) -> list:
+    """Source lines with comments removed and string contents blanked (keeps braces meaningful)"""
+    out, line = [], []
+    i, n = 0, len(source)
+    state = None  # None, "//", "/*", or the open quote
+    while i < n:
+        c = source[i]
+        if c == "\n":
+            out.append("".join(line))
+            line = []
+            if state == "//":
+                state = None
+            elif state in ('"', "'"):
+                state = None  # unterminated single-line string
+            i += 1
+            continue
+        if state is None:
+            two = source[i:i + 2]
+            if two == "//":
+                state = "//"
+                i += 2
+                continue
+            if two == "/*":
+                state = "/*"
+                i += 2
+                continue
+            if source.startswith('"""', i):
+                state = '"""'
+                line.append('""')
+                i += 3
+                continue
+            if c in ('"', "'", "`"):
+                state = c
+                line.append(c)
+            else:
+                line.append(c)
+            i += 1
+        elif state == "//":
+            i += 1
+        elif state == "/*":
+            if source.startswith("*/", i):
+                state = None
+                i += 2
+            else:
+                i += 1
+        else:
+            if c == "\\":
+                i += 2
+                continue
+            if source.startswith(state, i):
+                line.append(state[0])
+                i += len(state)
+                state = None
+                continue
+            i += 1
+    out.append("".join(line))
+    return out
+
+def _signature(first: str, lines: list, number: int) -> str:
+    """The declaration starting on line number, joined with continuation lines up to its closing paren"""
+    text = first
+    balance = lines[number - 1].count("(") - lines[number - 1].count(")")
+    following = number
+    while balance > 0 and following < len(lines) and following - number < 20:
+        text += " " + lines[following].strip()
+        balance += lines[following].count("(") - lines[following].count(")")
+        following += 1
+    return text
+
+def _outline_braces(source: str, language: str) -> list:
+    lines = _strip_code(source)
+    raw = source.splitlines()
+    items = []    # [depth, kind, signature, start, end]
+    open_items = []  # (item, depth before its body opened)
+    imports, constants = [], []
+    depth = 0
+    container_depths = {0}  # depths where declarations are outline-worthy (top level, type bodies)
+    pending = None  # declaration whose "{" is on a later line
+
+    for number, line in enumerate(lines, 1):
+        stripped = line.strip()
+        if depth == 0 and (m := _IMPORT_RE.match(raw[number - 1] if number <= len(raw) else line)):
+            imports.append(m.group(1))
+        elif depth in container_depths and stripped:
+            item = None
+            if (m := _TYPE_RE.match(line)):
+                item = [depth, "type", m.group(0).strip() + line[m.end():].split("{")[0], number, None]
+            elif (m := _CONSTANT_RE.match(line)):
+                if depth == 0:
+                    constants.append(f"{m.group(1)}  L{number}")
+                else:
+                    items.append([depth, "const", f"const {m.group(1)}", number, None])
+            else:
+                # Member-style declarations only count inside type bodies; at the top level of a
+                # JS file the same shape is usually a call such as describe("...", () => {
+                for regex in _FUNCTION_RES if depth else _FUNCTION_RES[:2]:
+                    m = regex.match(line)
+                    if m and m.group(1) not in _KEYWORDS:
+                        item = [depth, "function", stripped.split("{")[0].rstrip(" =>"), number, None]
+                        break
+            if item:
+                if item[1] == "function":
+                    signature = _signature(raw[number - 1] if number <= len(raw) else stripped, lines, number)
+                    signature = signature.split("{")[0].strip().rstrip(";").rstrip()
+                    item[2] = signature[:-2].rstrip() if signature.endswith("=>") else signature
+                item[2] = _clip(item[2])
+                items.append(item)
+                pending = item
+        for c in line:
+            if c == "{":
+                if pending is not None:
+                    open_items.append((pending, depth))
+                    if pending[1] == "type":
+                        container_depths.add(depth + 1)
+                    pending = None
+                depth += 1
+            elif c == "}":
+                depth = max(0, depth - 1)
+                while open_items and open_items[-1][1] >= depth:
+                    item, _ = open_items.pop()
+                    item[4] = number
+                    if item[1] == "type":
+                        container_depths.discard(depth + 1)
+        if pending is not None:
+            # No body opened yet: a declaration that is complete on this line has no block body
+            # (expression-bodied or abstract function, data class header, interface member)
+            continued = stripped.endswith(("(", ",", "=", "=>", ":", "->"))
+            if pending[1] == "function" and not continued or stripped.endswith((")", ";")):
+                pending[4] = number
+                pending = None
+
+    out = []
+    if imports:
+        unique = list(dict.fromkeys(imports))
+        out.append("imports: " + ", ".join(unique[:12]) + (f", ... (+{len(unique) - 12})" if len(unique) > 12 else ""))
+    out += [f"const {c}" for c in constants]
+    base_depths = sorted({item[0] for item in items})
+    for item_depth, _, signature, start, end in items:
+        level = base_depths.index(item_depth)
+        out.append(f"{'  ' * level}{signature}  {_lines(start, end)}")
+    return out
+
+# ============================================================================
+# TOOL
+# ============================================================================
+
+def outline_source(source: str, language: str) -> list:
+    """Outline lines for source text, cached by content hash"""
+    key = (language, hashlib.sha1(source.encode("utf-8", errors="surrogatepass")).hexdigest())
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+    outline = _outline_python(source) if language == "Python" else _outline_braces(source, language)
+    with _cache_lock:
+        _cache[key] = outline
+        if len(_cache) > MAX_CACHED_OUTLINES:
+            _cache.popitem(last=False)
+    return outline
+
+def language_for(path: str):
+    return LANGUAGES.get(os.path.splitext(path)[1].lower())
+
+def outline_file(path: str) -> str:
+    """Classes, functions (with signatures and line ranges) and constants of a source file."""
+    language = language_for(path)
+    if not language:
+        return (f"Error: outline_file supports Python, JavaScript/TypeScript, Kotlin and Java files, not {path}. "
+                f"Use read_file instead.")
+    try:
+        from penelope.tools.file_cache import read_text
+        source = read_text(path)
+    except Exception as e:
+        return f"Error reading file: {str(e)}"
+    outline = outline_source(source, language)
+    total = source.count("\n") + (0 if source.endswith("\n") or not source else 1)
+    header = f"{path} ({language}, {total} lines)"
+    if not outline:
+        return f"{header}\n(no classes, functions or constants found)"
+    return header + "\n" + "\n".join(outline) + "\n\nRead a part with read_file(path, start_line, end_line)."
@@ -0,0 +1,193 @@
+"""
+Output shaping for Penelope tool results
+Keeps tool output small before it enters the conversation history and
+stores the full output on disk so it can be paged through later
+"""
+import os
+import re
+import time
+from pathlib import Path
+
+OUTPUT_DIR = Path(os.getenv("PENELOPE_OUTPUT_DIR", str(Path.home() / ".penelope" / "outputs")))
+MAX_OUTPUT_CHARS = int(os.getenv("PENELOPE_MAX_OUTPUT_CHARS", "8000"))
+MAX_LINE_CHARS = 1000
+MAX_STORED_OUTPUTS = int(os.getenv("PENELOPE_MAX_STORED_OUTPUTS", "200"))
+# Tools that return file content the model copies into replace_text: never rewritten,
+# only cut at a line boundary when too large
+CONTENT_TOOLS = {"read_file", "outline_file", "read_many", "read_output"}
+
+_ANSI_RE = re.compile(r"\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[@-Z\\-_]")
+_PROGRESS_RE = re.compile(r"\d{1,3}(?:\.\d+)?\s?%|[█▓▒░■━╸#=]{5,}|\[\s*[=>#.\- ]{3,}\s*\]|[⠁-⣿]")
+# The changing parts of a progress line (percentages, bars, counters, sizes, rates, times); the
+# rest of the line, e.g. a test id or package name, must match for two lines to collapse
+_PROGRESS_FRAGMENT_RE = re.compile(
+    r"\d{1,3}(?:\.\d+)?\s?%|[█▓▒░■━╸#=>\-]{3,}|\[\s*[=>#.\- ]{3,}\s*\]|[⠁-⣿]"
+    r"|\d+(?:\.\d+)?\s?(?:[kKMGT]i?B|B)(?:/s)?|\d+(?:\.\d+)?\s?/\s?\d+(?:\.\d+)?|\d+:\d\d(?::\d\d)?|\d+(?:\.\d+)?\s?it/s"
+)
+
+def strip_ansi(text: str) -> str:
+    """Remove ANSI escape sequences (colors, cursor movement) from text"""
+    return _ANSI_RE.sub("", text)
+
+def _resolve_carriage_returns(text: str) -> list:
+    """Keep only the final state of lines rewritten with carriage returns"""
+    lines = []
+    for line in text.replace("\r\n", "\n").split("\n"):
+        if "\r" in line:
+            parts = [part for part in line.split("\r") if part.strip()]
+            line = parts[-1] if parts else ""
+        lines.append(line.rstrip())
+    return lines
+
+def _collapse_lines(lines: list) -> list:
+    """Collapse runs of identical lines and consecutive progress bar updates"""
+    collapsed = []
+    previous = None
+    repeats = 0
+    progress_key = None
+
+    def flush_repeats():
+        if repeats:
+            collapsed.append(f"  [previous line repeated {repeats} more times]")
+
+    for line in lines:
+        if line == previous:
+            repeats += 1
+            continue
+        flush_repeats()
+        repeats = 0
+
+        key = " ".join(_PROGRESS_FRAGMENT_RE.sub(" ", line).split()) if _PROGRESS_RE.search(line) else None
+        if key is not None and key == progress_key and collapsed:
+            # Only the latest state of a progress bar is interesting
+            collapsed[-1] = line
+        else:
+            collapsed.append(line)
+        progress_key = key
+        previous = line
+
+    flush_repeats()
+    return collapsed
+
+def _clip_line(line: str) -> str:
+    if len(line) <= MAX_LINE_CHARS:
+        return line
+    return f"{line[:MAX_LINE_CHARS]} ... [+{len(line) - MAX_LINE_CHARS} chars]"
+
+def _prune_stored_outputs():
+    """Keep only the most recent stored outputs"""
+    try:
+        stored = sorted(OUTPUT_DIR.glob("*.log"), key=lambda p: p.stat().st_mtime)
+        for old in stored[:-MAX_STORED_OUTPUTS]:
+            old.unlink()
+    except OSError:
+        pass
+
+def save_output(text: str, tool_name: str = "output") -> str:
+    """Store full output on disk and return its handle"""
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    safe_name = re.sub(r"[^A-Za-z0-9_]", "_", tool_name)[:40] or "output"
+    handle = f"{safe_name}-{time.strftime('%Y%m%d%H%M%S')}-{os.urandom(3).hex()}"
+    (OUTPUT_DIR / f"{handle}.log").write_text(text, encoding="utf-8")
+    _prune_stored_outputs()
+    return handle
+
+def _truncate_content(text: str, tool_name: str, max_chars: int) -> str:
+    """text unchanged if it fits, otherwise its leading whole lines and a handle to the rest"""
+    if len(text) <= max_chars:
+        return text
+    try:
+        handle = save_output(text, tool_name)
+        hint = f"full text saved as handle '{handle}' (read_output), or use read_file(path, start_line, end_line)"
+    except OSError as e:
+        hint = f"full text could not be stored: {e}; use read_file(path, start_line, end_line)"
+    lines = text.splitlines(keepends=True)
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) > max_chars:
+            break
+        head.append(line)
+        used += len(line)
+    marker = f"... [truncated after line {len(head)} of {len(lines)} ({len(text)} chars); {hint}] ..."
+    return "".join(head) + ("" if not head or head[-1].endswith("\n") else "\n") + "\n" + marker
+
+def shape_output(text, tool_name: str = "output", max_chars: int = None) -> str:
+    """
+    Shape raw tool output before it enters the conversation history.
+
+    Strips ANSI codes, resolves carriage-return progress bars, collapses
+    repeated lines and, when the result is still too large, keeps the head
+    and tail and stores the full output on disk under a handle that can be
+    paged through with read_output(). Results of CONTENT_TOOLS are passed
+    through unchanged, only truncated by size.
+    """
+    if text is None:
+        return ""
+    if not isinstance(text, str):
+        text = str(text)
+    max_chars = max_chars or MAX_OUTPUT_CHARS
+    if tool_name in CONTENT_TOOLS:
+        return _truncate_content(text, tool_name, max_chars)
+
+    plain = strip_ansi(text)
+    lines = [_clip_line(line) for line in _collapse_lines(_resolve_carriage_returns(plain))]
+    shaped = "\n".join(lines).strip("\n")
+    if len(shaped) <= max_chars:
+        return shaped
+
+    try:
+        handle = save_output(plain, tool_name)
+        hint = f"full output saved as handle '{handle}', use read_output(handle, start_line, max_lines) to page through it"
+    except OSError as e:
+        hint = f"full output could not be stored: {e}"
+
+    budget = max_chars // 2
+    head, used = [], 0
+    for line in lines:
+        if used + len(line) + 1 > budget:
+            break
+        head.append(line)
+        used += len(line) + 1
+
+    tail, used = [], 0
+    for line in reversed(lines[len(head):]):
+        if used + len(line) + 1 > budget:
+            break
+        tail.append(line)
+        used += len(line) + 1
+    tail.reverse()
+
+    omitted = len(lines) - len(head) - len(tail)
+    total_lines = len(plain.splitlines())
+    marker = f"... [{omitted} lines omitted of {total_lines} total ({len(plain)} chars); {hint}] ..."
+    return "\n".join(head + ["", marker, ""] + tail)
+
+def read_output(handle: str, start_line: int = 1, max_lines: int = 200) -> str:
+    """Page through a stored tool output by handle."""
+    try:
+        if not re.fullmatch(r"[A-Za-z0-9_\-]+", handle or ""):
+            return f"Error: Invalid output handle '{handle}'"
+        path = OUTPUT_DIR / f"{handle}.log"
+        if not path.exists():
+            return f"Error: No stored output with handle '{handle}'"
+
+        lines = path.read_text(encoding="utf-8").splitlines()
+        start = max(int(start_line), 1)
+        end = min(start - 1 + max(int(max_lines), 1), len(lines))
+
+        page, used = [], 0
+        for number in range(start, end + 1):
+            line = f"{number}: {_clip_line(lines[number - 1])}"
+            if used + len(line) + 1 > MAX_OUTPUT_CHARS:
+                end = number - 1
+                break
+            page.append(line)
+            used += len(line) + 1
+
+        if not page:
+            return f"No lines in range (output has {len(lines)} lines)"
+        footer = f"[lines {start}-{end} of {len(lines)}"
+        footer += f"; continue with start_line={end + 1}]" if end < len(lines) else "; end of output]"
+        return "\n".join(page + [footer])
+    except Exception as e:
+        return f"Error reading output: {str(e)}"
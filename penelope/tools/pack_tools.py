@@ -0,0 +1,199 @@
+"""
+Token-Aware Multi-File Reads for Penelope
+read_many reads several files (or line ranges) concurrently and packs them
+into one result that fits a token budget. Files that fit their share are
+included whole; larger ones are condensed to their outline, the lines
+around query matches and as much of their head as fits, and leftover budget
+is used to expand the most relevant files back to full text. One call
+replaces a chain of read_file round-trips.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKENS = 2000
+MAX_TOKENS = 16000
+MAX_FILES = 40
+MATCH_CONTEXT = 3  # lines kept around each query match
+
+_RANGE_RE = re.compile(r"^(.*?):(\d+)(?:-(\d+))?$")
+
+def parse_specs(paths) -> list:
+    """[(path, start_line, end_line)] from "a.py", "a.py:10-40" or {"path", "start_line", "end_line"} entries"""
+    if isinstance(paths, str):
+        paths = [p for p in re.split(r"[,\n]", paths) if p.strip()]
+    specs = []
+    for entry in paths or []:
+        if isinstance(entry, dict):
+            start, end = entry.get("start_line"), entry.get("end_line")
+            specs.append((str(entry.get("path", "")), int(start) if start else None, int(end) if end else None))
+            continue
+        entry = str(entry).strip()
+        match = _RANGE_RE.match(entry)
+        if match and match.group(1):
+            specs.append((match.group(1), int(match.group(2)), int(match.group(3)) if match.group(3) else None))
+        else:
+            specs.append((entry, None, None))
+    return specs[:MAX_FILES]
+
+def output_chars(params: dict) -> int:
+    """Output size read_many will produce for these params (the agent's shaping limit)"""
+    try:
+        tokens = int(params.get("max_tokens") or DEFAULT_TOKENS)
+    except (TypeError, ValueError):
+        tokens = DEFAULT_TOKENS
+    return min(max(tokens, 200), MAX_TOKENS) * CHARS_PER_TOKEN + 1000
+
+def _load(spec: tuple):
+    from penelope.tools.file_cache import read_text
+    try:
+        return read_text(spec[0]), None
+    except Exception as e:
+        return None, f"Error reading file: {str(e)}"
+
+def _numbered(lines: list, start: int, end: int, width: int) -> list:
+    return [f"{n:>{width}}: {lines[n - 1]}" for n in range(start, end + 1)]
+
+class _File:
+    def __init__(self, order: int, spec: tuple, text: str, error: str, pattern):
+        self.order = order
+        self.path, start, end = spec
+        self.error = error
+        self.lines = text.splitlines() if text is not None else []
+        self.start = max(1, start or 1)
+        self.end = min(len(self.lines), end or len(self.lines))
+        self.ranged = bool(start or end)
+        if not error and self.ranged and self.start > self.end:
+            self.error = f"Error: {self.path} has {len(self.lines)} lines; the range {self.start}-{end or 'end'} is empty."
+        self.width = len(str(max(self.end, 1)))
+        self.matches = []
+        if pattern is not None:
+            self.matches = [n for n in range(self.start, self.end + 1) if pattern.search(self.lines[n - 1])]
+        # Explicit ranges were asked for; query matches show where the relevant code is
+        self.score = (5 if self.ranged else 0) + min(len(self.matches), 20)
+        self.full = "\n".join(_numbered(self.lines, self.start, self.end, self.width))
+        self.body = None
+        self.condensed = False
+
+    def header(self) -> str:
+        if self.error:
+            return f"=== {self.path} ==="
+        total = len(self.lines)
+        if self.condensed:
+            detail = f"condensed, {len(self.body) // CHARS_PER_TOKEN} of ~{len(self.full) // CHARS_PER_TOKEN} tokens"
+        else:
+            detail = "full" if not self.ranged else "range"
+        span = f"lines {self.start}-{self.end} of {total}" if total else "empty"
+        return f"=== {self.path} ({span}, {detail}) ==="
+
+    def condense(self, budget: int) -> str:
+        """Outline, then match windows, then leading lines, within budget characters
+
+        With query matches the match windows come first; the outline gets what is left.
+        """
+        parts, used = [], 0
+
+        def add(text: str) -> bool:
+            nonlocal used
+            if used + len(text) + 1 > budget:
+                return False
+            parts.append(text)
+            used += len(text) + 1
+            return True
+
+        def add_outline():
+            from penelope.tools.outline_tools import language_for, outline_source
+            language = language_for(self.path)
+            if language and not self.ranged:
+                outline = outline_source("\n".join(self.lines), language)
+                if outline and add("outline:"):
+                    for line in outline:
+                        if not add("  " + line):
+                            break
+
+        if not self.matches:
+            add_outline()
+        shown = set()
+        windows_at = len(parts)
+        windows = []
+        for n in self.matches:
+            lo, hi = max(self.start, n - MATCH_CONTEXT), min(self.end, n + MATCH_CONTEXT)
+            if windows and lo <= windows[-1][1] + 1:
+                windows[-1][1] = hi
+            else:
+                windows.append([lo, hi])
+        for lo, hi in windows:
+            block = _numbered(self.lines, lo, hi, self.width)
+            if not add("\n".join([f"lines {lo}-{hi}:"] + block)):
+                break
+            shown.update(range(lo, hi + 1))
+        if self.matches:
+            windows_at = len(parts)
+            add_outline()
+
+        head = []
+        for n in range(self.start, self.end + 1):
+            if n in shown:
+                break
+            line = _numbered(self.lines, n, n, self.width)[0]
+            if used + len(line) + 1 + 20 > budget:
+                break
+            head.append(line)
+            used += len(line) + 1
+        if head:
+            parts.insert(windows_at, "\n".join([f"lines {self.start}-{self.start + len(head) - 1}:"] + head))
+        return "\n".join(parts) if parts else "(no room in the token budget for this file)"
+
+def read_many(paths, max_tokens: int = DEFAULT_TOKENS, query: str = None) -> str:
+    """Read several files or ranges concurrently, packed into max_tokens (most relevant to query first)."""
+    try:
+        specs = parse_specs(paths)
+        if not specs:
+            return "Error: read_many needs a list of paths, e.g. [\"a.py\", \"b.py:10-40\"]"
+        budget = output_chars({"max_tokens": max_tokens}) - 1000
+        pattern = None
+        if query:
+            try:
+                pattern = re.compile(query, re.IGNORECASE)
+            except re.error:
+                pattern = re.compile(re.escape(query), re.IGNORECASE)
+
+        with ThreadPoolExecutor(max_workers=min(8, len(specs))) as pool:
+            loaded = list(pool.map(_load, specs))
+        files = [_File(i, spec, text, error, pattern) for i, (spec, (text, error)) in enumerate(zip(specs, loaded))]
+        ranked = sorted(files, key=lambda f: (-f.score, f.order))
+
+        # Pass 1: whole files that fit an equal share, the rest condensed to their share
+        share = budget // len(files)
+        for f in ranked:
+            if f.error:
+                f.body = f.error
+            elif len(f.full) <= share:
+                f.body = f.full
+            else:
+                f.condensed = True
+                f.body = f.condense(share)
+        # Pass 2: spend what is left expanding the most relevant condensed files
+        left = budget - sum(len(f.body) + len(f.header()) + 2 for f in files)
+        for f in ranked:
+            if not f.condensed:
+                continue
+            if len(f.full) - len(f.body) <= left:
+                left -= len(f.full) - len(f.body)
+                f.body, f.condensed = f.full, False
+            elif left > 200:
+                grown = f.condense(len(f.body) + left)
+                left -= len(grown) - len(f.body)
+                f.body = grown
+
+        out = []
+        for f in files:
+            out += [f.header(), f.body, ""]
+        condensed = sum(1 for f in files if f.condensed)
+        used = sum(len(f.body) for f in files) // CHARS_PER_TOKEN
+        footer = f"[{len(files)} files, ~{used} of {budget // CHARS_PER_TOKEN} tokens"
+        footer += (f"; {condensed} condensed, read omitted parts with read_file(path, start_line, end_line)]"
+                   if condensed else "]")
+        return "\n".join(out + [footer])
+    except Exception as e:
+        return f"Error in read_many: {str(e)}"
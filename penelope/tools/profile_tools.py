@@ -0,0 +1,262 @@
+"""
+Profiling Tools for Penelope
+Runs scripts under cProfile or the sampling profiler and turns the results
+into compact hot-spot tables instead of raw profiler dumps
+"""
+import atexit
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROFILE_DIR = Path(os.getenv("PENELOPE_PROFILE_DIR", str(Path.home() / ".penelope" / "profiles")))
+SAMPLER_SCRIPT = Path(__file__).with_name("sampling_profiler.py")
+DEFAULT_MIN_MS = 1.0  # self-time changes smaller than this are timer noise, not regressions
+
+def _default_output(script_path: str, suffix: str) -> Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    return PROFILE_DIR / f"{Path(script_path).stem}-{time.strftime('%Y%m%d-%H%M%S')}{suffix}"
+
+def _func_label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # builtins such as <built-in method time.sleep>
+    return f"{Path(filename).name}:{line}({name})"
+
+def _stamp(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _written(path: Path, before) -> bool:
+    """Whether this run wrote path (it may exist from an earlier run with the same output)"""
+    after = _stamp(path)
+    return after is not None and after != before
+
+def _tail(text: str, lines: int = 15) -> str:
+    return "\n".join(text.strip().splitlines()[-lines:])
+
+def summarize_pstats(stats_path: str, top: int = 20) -> str:
+    """Top-N functions by cumulative and by self time in a compact table"""
+    stats = pstats.Stats(str(stats_path))
+    entries = stats.stats  # {func: (primitive calls, calls, self time, cumulative, callers)}
+    lines = [f"{stats.total_calls} calls in {stats.total_tt:.3f}s ({stats_path})"]
+
+    for title, key in (("cumulative", 3), ("self", 2)):
+        lines += ["", f"Top {top} by {title} time:", f"  {'calls':>9} {'self s':>9} {'cum s':>9}  function"]
+        ranked = sorted(entries.items(), key=lambda item: item[1][key], reverse=True)[:top]
+        for func, (cc, nc, tt, ct, _) in ranked:
+            calls = f"{nc}/{cc}" if nc != cc else str(nc)
+            lines.append(f"  {calls:>9} {tt:9.4f} {ct:9.4f}  {_func_label(func)}")
+    return "\n".join(lines)
+
+def compare_pstats(base_path: str, new_path: str, top: int = 20, min_ms: float = DEFAULT_MIN_MS) -> str:
+    """Diff two profiles and list the functions whose self time changed by at least min_ms"""
+    base = pstats.Stats(str(base_path)).stats
+    new = pstats.Stats(str(new_path)).stats
+    base_total = sum(v[2] for v in base.values())
+    new_total = sum(v[2] for v in new.values())
+
+    rows = []
+    for func in set(base) | set(new):
+        b = base.get(func, (0, 0, 0.0, 0.0, None))
+        n = new.get(func, (0, 0, 0.0, 0.0, None))
+        if abs(n[2] - b[2]) * 1000 >= min_ms:
+            rows.append((func, n[2] - b[2], n[3] - b[3], b[1], n[1], b[2], n[2]))
+
+    change = (new_total - base_total) / base_total if base_total else 0.0
+    lines = [f"Total self time: {base_total:.3f}s -> {new_total:.3f}s ({change:+.1%})"]
+    for title, key, reverse in (("Regressions", 1, True), ("Improvements", 1, False)):
+        ranked = sorted(rows, key=lambda r: r[key], reverse=reverse)[:top]
+        ranked = [r for r in ranked if (r[key] > 0 if reverse else r[key] < 0)]
+        if not ranked:
+            continue
+        lines += ["", f"{title} by self time:", f"  {'delta s':>9} {'base s':>9} {'new s':>9} {'calls':>15}  function"]
+        for func, d_self, d_cum, b_calls, n_calls, b_self, n_self in ranked:
+            lines.append(f"  {d_self:+9.4f} {b_self:9.4f} {n_self:9.4f} {f'{b_calls}->{n_calls}':>15}  {_func_label(func)}")
+    if len(lines) == 1:
+        lines.append(f"No differences in self time of {min_ms} ms or more.")
+    else:
+        lines.append(f"\n(changes under {min_ms} ms per function ignored)")
+    return "\n".join(lines)
+
+def profile_script(script_path: str, args: list = None, top: int = 20, output: str = None,
+                   timeout: int = 300, cwd: str = None) -> str:
+    """Run a script under cProfile, keep the .pstats file and return the hot-spot table"""
+    stats_path = Path(output) if output else _default_output(script_path, ".pstats")
+    before = _stamp(stats_path)
+    result = subprocess.run(
+        [sys.executable, "-m", "cProfile", "-o", str(stats_path), script_path] + list(args or []),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        cwd=cwd
+    )
+    if not _written(stats_path, before):
+        return f"Profiling failed (exit {result.returncode}):\n{_tail(result.stderr or result.stdout)}"
+
+    report = summarize_pstats(str(stats_path), top)
+    if result.returncode != 0:
+        report += f"\n\nScript exited with {result.returncode}:\n{_tail(result.stderr)}"
+    return report + f"\n\nProfile saved to {stats_path} (compare with compare_profiles)"
+
+def sample_script(script_path: str, args: list = None, interval: float = 0.005, top: int = 15,
+                  output: str = None, timeout: int = 300, cwd: str = None) -> str:
+    """Run a script under the sampling profiler and summarize its collapsed stacks"""
+    from penelope.tools.sampling_profiler import read_collapsed, summarize_collapsed
+
+    folded_path = Path(output) if output else _default_output(script_path, ".folded")
+    before = _stamp(folded_path)
+    result = subprocess.run(
+        [sys.executable, str(SAMPLER_SCRIPT), "-o", str(folded_path), "-i", str(interval),
+         script_path] + list(args or []),
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        cwd=cwd
+    )
+    if not _written(folded_path, before):
+        return f"Sampling failed (exit {result.returncode}):\n{_tail(result.stderr or result.stdout)}"
+
+    report = summarize_collapsed(read_collapsed(str(folded_path)), top)
+    if result.returncode != 0:
+        report += f"\n\nScript exited with {result.returncode}:\n{_tail(result.stderr)}"
+    return report + f"\n\nCollapsed stacks saved to {folded_path} (flamegraph.pl / speedscope compatible)"
+
+# ============================================================================
+# IN-PROCESS RUN PROFILING (--profile)
+# ============================================================================
+
+PROFILE_MODES = ("cprofile", "sample")
+
+class RunProfiler:
+    """Profiles the current process (cProfile) or its main thread (sampling) until stop()"""
+
+    def __init__(self, mode: str = "cprofile", output: str = None, interval: float = 0.005):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (use {' or '.join(PROFILE_MODES)})")
+        self.mode = mode
+        self.output = Path(output) if output else _default_output("run", ".pstats" if mode == "cprofile" else ".folded")
+        self.interval = interval
+        self._profiler = None
+
+    def start(self) -> "RunProfiler":
+        if self.mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            from penelope.tools.sampling_profiler import Sampler
+            self._profiler = Sampler(self.interval).start()
+        return self
+
+    def stop(self, top: int = 15) -> str:
+        """Stop, write the profile and return its summary"""
+        if self._profiler is None:
+            return ""
+        profiler, self._profiler = self._profiler, None
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        if self.mode == "cprofile":
+            profiler.disable()
+            profiler.dump_stats(str(self.output))
+            return summarize_pstats(str(self.output), top)
+        from penelope.tools.sampling_profiler import summarize_collapsed
+        profiler.stop()
+        profiler.write_collapsed(str(self.output))
+        return summarize_collapsed(profiler.stacks, top) + f"\n\nCollapsed stacks saved to {self.output}"
+
+def split_profile_args(argv: list) -> tuple:
+    """Remove --profile, --profile-mode MODE, --profile-output PATH and --profile-tools NAMES from argv
+
+    Returns ({"mode", "output", "tools"}, remaining argv). --profile alone means cProfile;
+    it never takes a value, so a following command name is left in place.
+    """
+    options = {"mode": None, "output": None, "tools": None}
+    rest, i = [], 0
+    while i < len(argv):
+        arg = argv[i]
+        name, has_value, value = arg.partition("=")
+        if arg == "--profile":
+            options["mode"] = options["mode"] or "cprofile"
+        elif name in ("--profile-mode", "--profile-output", "--profile-tools"):
+            if not has_value and i + 1 < len(argv):
+                value, i = argv[i + 1], i + 1
+            if name == "--profile-mode" and value not in PROFILE_MODES:
+                raise ValueError(f"--profile-mode must be one of {', '.join(PROFILE_MODES)}")
+            options[name[len("--profile-"):]] = value
+        else:
+            rest.append(arg)
+        i += 1
+    if options["output"] and not options["mode"]:
+        options["mode"] = "sample" if options["output"].endswith((".folded", ".collapsed")) else "cprofile"
+    return options, rest
+
+# ============================================================================
+# PER-TOOL PROFILING (--profile-tools / PENELOPE_PROFILE_TOOLS)
+# ============================================================================
+
+_profiled_tools = {t.strip() for t in os.getenv("PENELOPE_PROFILE_TOOLS", "").split(",") if t.strip()}
+_tool_stats = {}  # tool name -> accumulated pstats.Stats
+_tool_lock = threading.Lock()
+_atexit_registered = False
+
+def set_tool_profiling(tools) -> set:
+    """Profile every call of the named tools ("*" for all); an empty value turns it off"""
+    global _profiled_tools, _atexit_registered
+    if isinstance(tools, str):
+        tools = [t.strip() for t in tools.split(",") if t.strip()]
+    _profiled_tools = set(tools or [])
+    if _profiled_tools and not _atexit_registered:
+        atexit.register(dump_tool_profiles)
+        _atexit_registered = True
+    return _profiled_tools
+
+def tool_profiling_enabled(name: str) -> bool:
+    return bool(_profiled_tools) and (name in _profiled_tools or "*" in _profiled_tools)
+
+def profile_tool_call(name: str, func, args: tuple, kwargs: dict):
+    """Run one tool call under cProfile and fold its stats into the tool's profile"""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return func(*args, **kwargs)  # another profiler (e.g. --profile) is active in this thread
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        with _tool_lock:
+            if name in _tool_stats:
+                _tool_stats[name].add(profiler)
+            else:
+                _tool_stats[name] = pstats.Stats(profiler)
+
+def dump_tool_profiles() -> list:
+    """Write one .pstats file per profiled tool; returns the paths"""
+    paths = []
+    with _tool_lock:
+        items = list(_tool_stats.items())
+    for name, stats in items:
+        path = _default_output(f"tool-{name}-{os.getpid()}", ".pstats")
+        stats.dump_stats(str(path))
+        paths.append(path)
+    return paths
+
+def tool_profile_report(name: str, top: int = 15) -> str:
+    with _tool_lock:
+        stats = _tool_stats.get(name)
+    if stats is None:
+        return f"No profile recorded for {name} (enabled: {', '.join(sorted(_profiled_tools)) or 'none'})"
+    path = _default_output(f"tool-{name}-{os.getpid()}", ".pstats")
+    stats.dump_stats(str(path))
+    return summarize_pstats(str(path), top)
+
+if _profiled_tools:
+    set_tool_profiling(_profiled_tools)
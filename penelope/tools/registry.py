@@ -0,0 +1,100 @@
+"""
+Lightweight Tool Registry for Penelope
+Maps tool names to "module:function" targets and imports the implementation
+only when a tool is first called, so startup does not pay for every tool
+module (and their optional Windows/GUI dependencies)
+"""
+import importlib
+import os
+import threading
+import time
+
+# name -> (implementation, short description)
+TOOL_SPECS = {
+    "read_file": ("penelope.tools.file_tools:read_file", "Read file contents"),
+    "write_file": ("penelope.tools.file_tools:write_file", "Write content to file"),
+    "replace_text": ("penelope.tools.file_tools:replace_text", "Replace text in file"),
+    "list_dir": ("penelope.tools.file_tools:list_dir", "List directory contents"),
+    "outline_file": ("penelope.tools.outline_tools:outline_file", "Outline classes and functions of a source file"),
+    "read_many": ("penelope.tools.pack_tools:read_many", "Read several files packed into a token budget"),
+    "run_command": ("penelope.tools.terminal_tools:run_command", "Run shell command"),
+    "grep_search": ("penelope.tools.terminal_tools:grep_search", "Search for patterns in files"),
+    "search_files": ("penelope.tools.search_tools:search_files", "Search files with regex"),
+    "open_app": ("penelope.tools.terminal_tools:open_app", "Open Windows applications"),
+    "control_android_studio": ("penelope.tools.android_studio_tools:control_android_studio", "Control Android Studio"),
+    "new_android_project": ("penelope.tools.android_studio_tools:new_android_project", "Create a new Android project"),
+    "open_gemini_agent": ("penelope.tools.android_studio_tools:open_gemini_agent", "Open Gemini in Android Studio"),
+    "send_message_to_gemini": ("penelope.tools.android_studio_tools:send_message_to_gemini", "Send a message to Gemini"),
+    "type_in_gemini_chat": ("penelope.tools.android_studio_tools:type_in_gemini_chat", "Type in Gemini's chat input"),
+    "control_cursor": ("penelope.tools.ide_tools:control_cursor", "Control Cursor IDE"),
+    "control_vscode": ("penelope.tools.ide_tools:control_vscode", "Control VS Code"),
+    "control_git": ("penelope.tools.ide_tools:control_git", "Git operations"),
+    "control_python": ("penelope.tools.ide_tools:control_python", "Python development tools"),
+    "control_npm": ("penelope.tools.ide_tools:control_npm", "npm/Node.js operations"),
+    "read_output": ("penelope.tools.output_tools:read_output", "Page through truncated tool output"),
+    "start_job": ("penelope.tools.job_tools:start_job", "Run a command in the background"),
+    "job_status": ("penelope.tools.job_tools:job_status", "Show background job status"),
+    "job_output": ("penelope.tools.job_tools:job_output", "Show background job output"),
+    "wait_job": ("penelope.tools.job_tools:wait_job", "Wait for a background job"),
+    "kill_job": ("penelope.tools.job_tools:kill_job", "Kill a background job"),
+}
+
+# Per-tool profiling is checked on every call, so its module is only imported when enabled
+_profile_tools = None
+
+def enable_tool_profiling(tools) -> set:
+    """Profile calls of the named tools (comma-separated or a list; "*" for all)"""
+    global _profile_tools
+    from penelope.tools import profile_tools
+    _profile_tools = profile_tools
+    return profile_tools.set_tool_profiling(tools)
+
+class LazyTool:
+    """Callable placeholder that imports its implementation on first call"""
+
+    def __init__(self, name: str, target: str, description: str = ""):
+        self.name = name
+        self.target = target
+        self.description = description
+        self._func = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    module_name, _, attr = self.target.partition(":")
+                    self._func = getattr(importlib.import_module(module_name), attr)
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        from penelope.core.metrics import TOOL_CALLS, TOOL_SECONDS
+
+        func = self.resolve()
+        started = time.perf_counter()
+        status = "error"
+        try:
+            if _profile_tools is not None and _profile_tools.tool_profiling_enabled(self.name):
+                result = _profile_tools.profile_tool_call(self.name, func, args, kwargs)
+            else:
+                result = func(*args, **kwargs)
+            # Tools report most failures as "Error..." strings rather than exceptions
+            status = "error" if isinstance(result, str) and result.startswith("Error") else "ok"
+            return result
+        finally:
+            TOOL_SECONDS.observe(time.perf_counter() - started, tool=self.name)
+            TOOL_CALLS.inc(tool=self.name, status=status)
+
+    def __repr__(self):
+        state = "loaded" if self._func else "lazy"
+        return f"<LazyTool {self.name} -> {self.target} ({state})>"
+
+def load_tools() -> dict:
+    """Fresh name -> LazyTool mapping for all registered tools"""
+    return {name: LazyTool(name, target, description) for name, (target, description) in TOOL_SPECS.items()}
+
+def tool_descriptions() -> list:
+    return [(name, description) for name, (_, description) in TOOL_SPECS.items()]
+
+if os.getenv("PENELOPE_PROFILE_TOOLS"):
+    enable_tool_profiling(os.getenv("PENELOPE_PROFILE_TOOLS"))
@@ -0,0 +1,147 @@
+"""
+Pure-Python Sampling Profiler for Penelope
+Periodically samples the stack of a thread and records collapsed stacks
+("frame;frame;frame count" lines) that can be fed to flame graph tools
+
+Usable in-process through Sampler, or as a script runner:
+    python sampling_profiler.py -o out.folded [-i 0.005] script.py [args...]
+"""
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+
+class Sampler:
+    """Samples one thread's stack on a background thread at a fixed interval"""
+
+    def __init__(self, interval: float = 0.005, thread_id: int = None, max_depth: int = 100,
+                 hide_outer: tuple = ()):
+        self.interval = interval
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.max_depth = max_depth
+        # Outermost frames starting with these labels (e.g. the runner itself) are dropped
+        self.hide_outer = hide_outer
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_at = None
+        self._switch_interval = None
+        self.elapsed = 0.0
+
+    @staticmethod
+    def _frame_label(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+    def _sample_loop(self):
+        # time.sleep releases and reacquires the GIL once per sample; Event.wait
+        # needs several handoffs, which skews samples towards blocking calls
+        while not self._stop.is_set():
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(self._frame_label(frame))
+                frame = frame.f_back
+            labels.reverse()
+            while len(labels) > 1 and labels[0].startswith(self.hide_outer):
+                labels.pop(0)
+            self.stacks[";".join(labels)] += 1
+            self.samples += 1
+
+    def start(self):
+        self._stop.clear()
+        # The sampler needs the GIL to take a sample; a shorter switch interval keeps
+        # CPU-bound code from being under-sampled relative to blocking calls
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval / 5))
+        self._started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="penelope-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if self._switch_interval is not None:
+            sys.setswitchinterval(self._switch_interval)
+            self._switch_interval = None
+        if self._started_at:
+            self.elapsed = time.perf_counter() - self._started_at
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def write_collapsed(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+def read_collapsed(path: str) -> Counter:
+    """Load a collapsed-stacks file written by Sampler.write_collapsed"""
+    stacks = Counter()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if stack and count.isdigit():
+                stacks[stack] += int(count)
+    return stacks
+
+def summarize_collapsed(stacks: Counter, top: int = 15) -> str:
+    """Compact text summary: hottest functions by self and inclusive samples, hottest stacks"""
+    total = sum(stacks.values())
+    if not total:
+        return "No samples collected (the program may have finished too quickly)."
+
+    self_counts = Counter()
+    inclusive_counts = Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        self_counts[frames[-1]] += count
+        for frame in set(frames):
+            inclusive_counts[frame] += count
+
+    lines = [f"{total} samples", "", "Top self (leaf) samples:"]
+    for frame, count in self_counts.most_common(top):
+        lines.append(f"  {count / total:6.1%}  {count:6d}  {frame}")
+    lines += ["", "Top inclusive samples:"]
+    for frame, count in inclusive_counts.most_common(top):
+        lines.append(f"  {count / total:6.1%}  {count:6d}  {frame}")
+    lines += ["", "Hottest stacks (leaf-most 4 frames):"]
+    for stack, count in stacks.most_common(min(top, 5)):
+        tail = ";".join(stack.split(";")[-4:])
+        lines.append(f"  {count / total:6.1%}  {tail}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sample a Python script and write collapsed stacks")
+    parser.add_argument("-o", "--output", required=True, help="Collapsed stacks output file")
+    parser.add_argument("-i", "--interval", type=float, default=0.005, help="Sampling interval in seconds")
+    parser.add_argument("script", help="Script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Script arguments")
+    options = parser.parse_args(argv)
+
+    sys.argv = [options.script] + options.args
+    # Run like `python script.py`: the script's directory replaces ours on sys.path
+    sys.path[0] = os.path.dirname(os.path.abspath(options.script))
+    sampler = Sampler(options.interval, hide_outer=("sampling_profiler.py:", "<frozen runpy>:", "runpy.py:")).start()
+    try:
+        runpy.run_path(options.script, run_name="__main__")
+    finally:
+        sampler.stop()
+        sampler.write_collapsed(options.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Batch Python Syntax Checking for Penelope
+Compiles many files in-process (or across a process pool for large trees)
+and caches results by content hash, so re-checking an edited tree only
+compiles the files that actually changed
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Union, List
+
+POOL_THRESHOLD = 64  # below this many uncached files, compiling in-process is faster than spawning workers
+SKIP_DIRS = {'node_modules', '__pycache__', 'venv', '.venv', 'build', 'dist', 'site-packages'}
+
+_cache = {}  # sha1 of source -> None (ok) or (line, column, message)
+_cache_lock = threading.Lock()
+
+def _compile_source(source: bytes, filename: str) -> Optional[tuple]:
+    try:
+        compile(source, filename, "exec", dont_inherit=True)
+        return None
+    except SyntaxError as e:
+        return (e.lineno or 0, e.offset or 0, f"{type(e).__name__}: {e.msg}")
+    except ValueError as e:  # e.g. source code string cannot contain null bytes
+        return (0, 0, f"ValueError: {e}")
+
+def _compile_job(job: tuple) -> Optional[tuple]:
+    source, filename = job
+    return _compile_source(source, filename)
+
+def _collect_files(paths: List[str]) -> list:
+    files = []
+    for entry in paths:
+        p = Path(entry)
+        if p.is_dir():
+            for current, dirs, names in os.walk(p):
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS]
+                files.extend(Path(current) / n for n in names if n.endswith(".py"))
+        else:
+            files.append(p)
+    return sorted(set(files))
+
+def check_syntax(paths: Union[str, List[str]], workers: int = None) -> str:
+    """Check the syntax of files and/or directories and report every error in one response."""
+    if isinstance(paths, str):
+        paths = [p.strip() for p in paths.split(",")] if "," in paths else [paths]
+    files = _collect_files(paths)
+    if not files:
+        return "No Python files found."
+
+    results, pending, missing = {}, [], []
+    for path in files:
+        try:
+            source = path.read_bytes()
+        except OSError as e:
+            missing.append(f"{path}: {e.strerror or e}")
+            continue
+        digest = hashlib.sha1(source).hexdigest()
+        with _cache_lock:
+            if digest in _cache:
+                results[path] = _cache[digest]
+                continue
+        pending.append((path, digest, source))
+
+    if len(pending) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(_compile_job, [(src, str(p)) for p, _, src in pending], chunksize=16))
+    else:
+        outcomes = [_compile_source(src, str(p)) for p, _, src in pending]
+
+    with _cache_lock:
+        for (path, digest, _), outcome in zip(pending, outcomes):
+            _cache[digest] = outcome
+            results[path] = outcome
+
+    errors = [(path, outcome) for path, outcome in sorted(results.items()) if outcome]
+    summary = (f"Checked {len(results)} files ({len(pending)} compiled, "
+               f"{len(results) - len(pending)} cached): {len(errors)} with syntax errors")
+    lines = [summary]
+    for path, (line, column, message) in errors:
+        lines.append(f"  {path}:{line}:{column}: {message}")
+    for problem in missing:
+        lines.append(f"  {problem}")
+    if not errors and not missing:
+        lines[0] = summary.replace(": 0 with syntax errors", ": all OK")
+    return "\n".join(lines)
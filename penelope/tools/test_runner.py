@@ -0,0 +1,335 @@
+"""
+Incremental, Parallel Test Runner for Penelope
+Selects the test files affected by changes since the last run (through an
+import-dependency graph of the workspace; a changed conftest.py selects every
+test below it, changed files under test data directories every test in that
+directory tree, and a changed pytest configuration file forces a full run),
+runs previously failed tests
+first, shards files across pytest worker processes and returns a compact
+structured summary with per-test durations
+"""
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+STATE_DIR = Path(os.getenv("PENELOPE_TEST_STATE_DIR", str(Path.home() / ".penelope" / "testruns")))
+SKIP_DIRS = {'node_modules', '__pycache__', 'venv', '.venv', 'build', 'dist', 'site-packages'}
+CONFIG_FILES = ("pytest.ini", "pyproject.toml", "setup.cfg", "tox.ini")
+TEST_DIR_NAMES = {"tests", "test", "testing", "fixtures", "testdata"}
+
+def _iter_python_files(root: Path):
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS]
+        for name in files:
+            if name.endswith(".py"):
+                yield Path(current) / name
+
+def _config_files(root: Path) -> list:
+    """pytest configuration files that apply to root: ini files and conftest.py files above it"""
+    found = []
+    for directory in [root] + list(root.parents):
+        found.extend(directory / name for name in CONFIG_FILES if (directory / name).is_file())
+        if directory != root and (directory / "conftest.py").is_file():
+            found.append(directory / "conftest.py")
+    return found
+
+def _data_files(root: Path) -> list:
+    """Non-Python files (fixtures, data) inside test directories"""
+    found = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in SKIP_DIRS]
+        if TEST_DIR_NAMES.intersection(Path(current).relative_to(root).parts):
+            found.extend(Path(current) / name for name in files if not name.endswith((".py", ".pyc")))
+    return found
+
+def _data_scope(path: Path, root: Path) -> Path:
+    """The outermost test directory containing a data file; its tests may all read it"""
+    scope = path.parent
+    for parent in path.relative_to(root).parents:
+        if parent.name in TEST_DIR_NAMES:
+            scope = root / parent
+    return scope
+
+def _is_test_file(path: Path) -> bool:
+    return path.name.startswith("test_") or path.name.endswith("_test.py")
+
+def _parse_imports(path: Path) -> list:
+    """Absolute module names imported by a file (relative imports resolved)"""
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (SyntaxError, ValueError, OSError):
+        return []
+    package = path.parent
+    modules = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level:
+                # Keep relative imports as path-based entries: "./pkg/mod" style
+                base = package
+                for _ in range(node.level - 1):
+                    base = base.parent
+                target = str(base / node.module.replace(".", os.sep)) if node.module else str(base)
+                modules.append("path:" + target)
+                modules.extend("path:" + str(Path(target) / alias.name) for alias in node.names)
+            elif node.module:
+                modules.append(node.module)
+                modules.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return modules
+
+class DependencyGraph:
+    """Import graph of the Python files in a workspace"""
+
+    def __init__(self, root: Path, import_cache: dict):
+        self.root = root
+        self.files = sorted(_iter_python_files(root))
+        self._file_set = set(self.files)
+        self.import_cache = import_cache
+        self._module_index = self._build_module_index()
+        self.imports = {f: self._resolve(f) for f in self.files}
+
+    def _build_module_index(self) -> dict:
+        """Map every dotted name a file could be imported as to the file"""
+        index = {}
+        for path in self.files:
+            rel = path.relative_to(self.root).with_suffix("")
+            parts = list(rel.parts)
+            if parts[-1] == "__init__":
+                parts = parts[:-1]
+            # Allow src/ layouts and scripts importing siblings: every suffix is a candidate name
+            for start in range(len(parts)):
+                index.setdefault(".".join(parts[start:]), set()).add(path)
+        return index
+
+    def _cached_imports(self, path: Path) -> list:
+        key = str(path)
+        stat = path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        cached = self.import_cache.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        modules = _parse_imports(path)
+        self.import_cache[key] = [stamp, modules]
+        return modules
+
+    def _resolve(self, path: Path) -> set:
+        deps = set()
+        for module in self._cached_imports(path):
+            if module.startswith("path:"):
+                target = Path(module[5:])
+                deps.update(c for c in (target.with_suffix(".py"), target / "__init__.py") if c in self._file_set)
+                continue
+            deps.update(self._module_index.get(module, ()))
+        deps.discard(path)
+        return deps
+
+    def affected_tests(self, changed: set) -> set:
+        """Test files that are changed or (transitively) import a changed file"""
+        reverse = {}
+        for path, deps in self.imports.items():
+            for dep in deps:
+                reverse.setdefault(dep, set()).add(path)
+        affected, stack = set(), list(changed)
+        while stack:
+            current = stack.pop()
+            if current in affected:
+                continue
+            affected.add(current)
+            stack.extend(reverse.get(current, ()))
+        return {p for p in affected if _is_test_file(p)}
+
+def _state_path(root: Path) -> Path:
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+    return STATE_DIR / f"{root.name}-{digest}.json"
+
+def _load_state(root: Path) -> dict:
+    try:
+        return json.loads(_state_path(root).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def _save_state(root: Path, state: dict):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    _state_path(root).write_text(json.dumps(state), encoding="utf-8")
+
+def _file_hashes(files: list, previous: dict) -> dict:
+    """Content hashes keyed by path, only rehashing files whose stat changed"""
+    hashes = {}
+    for path in files:
+        key = str(path)
+        stat = path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        old = previous.get(key)
+        if old and old[0] == stamp:
+            hashes[key] = old
+        else:
+            hashes[key] = [stamp, hashlib.sha1(path.read_bytes()).hexdigest()]
+    return hashes
+
+def _shard(files: list, durations: dict, workers: int) -> list:
+    """Longest-processing-time-first assignment of test files to workers"""
+    shards = [[0.0, []] for _ in range(max(1, min(workers, len(files))))]
+    for path in sorted(files, key=lambda p: durations.get(str(p), 1.0), reverse=True):
+        lightest = min(shards, key=lambda s: s[0])
+        lightest[0] += durations.get(str(path), 1.0)
+        lightest[1].append(path)
+    return [s[1] for s in shards if s[1]]
+
+def _module_name(test_file: Path, root: Path) -> str:
+    return ".".join(test_file.relative_to(root).with_suffix("").parts)
+
+def _belongs_to(test_id: str, module: str) -> bool:
+    """pytest junit classnames are the dotted module path, optionally followed by a class"""
+    classname = test_id.split("::")[0]
+    return classname == module or classname.startswith(module + ".")
+
+def _parse_junit(xml_path: Path) -> list:
+    """(test id, outcome, seconds, message) tuples from a junit xml report"""
+    results = []
+    try:
+        tree = ET.parse(xml_path)
+    except (ET.ParseError, OSError):
+        return results
+    for case in tree.iter("testcase"):
+        classname = case.get("classname", "")
+        test_id = f"{classname}::{case.get('name')}" if classname else case.get("name", "?")
+        outcome, message = "passed", ""
+        for tag in ("failure", "error", "skipped"):
+            child = case.find(tag)
+            if child is not None:
+                outcome = {"failure": "failed", "error": "error", "skipped": "skipped"}[tag]
+                message = (child.get("message") or child.text or "").strip().splitlines()[:1]
+                message = message[0][:200] if message else ""
+                break
+        results.append((test_id, outcome, float(case.get("time") or 0), message))
+    return results
+
+def run_tests(path: str = ".", workers: int = None, affected_only: bool = True,
+              timeout: int = 600, extra_args: list = None) -> str:
+    """Run affected tests in parallel pytest shards and summarize the results"""
+    root = Path(path).resolve()
+    if root.is_file():
+        # A single test file: nothing to select, just run it with the summary format
+        test_files, root = [root], root.parent
+        all_tests, reason = test_files, "single file"
+    else:
+        test_files = None
+    state = _load_state(root)
+    started = time.perf_counter()
+
+    graph = DependencyGraph(root, state.get("imports", {}))
+    configs = _config_files(root)
+    hashes = _file_hashes(graph.files + configs + _data_files(root), state.get("hashes", {}))
+    if test_files is None:
+        all_tests = [p for p in graph.files if _is_test_file(p)]
+        previous_hashes = state.get("hashes")
+        changed = set()
+        if previous_hashes:
+            changed = {Path(p) for p, h in hashes.items() if previous_hashes.get(p, [None, None])[1] != h[1]}
+        changed_configs = [p for p in configs if p in changed]
+        if affected_only and previous_hashes and not changed_configs:
+            failed_files = {Path(p) for p in state.get("failed_files", []) if Path(p).exists()}
+            affected = graph.affected_tests(changed & set(graph.files))
+            for path in changed - set(graph.files):
+                scope = _data_scope(path, root)
+                affected.update(t for t in all_tests if scope in t.parents)
+            for path in changed:
+                if path.name == "conftest.py":
+                    affected.update(t for t in all_tests if path.parent in t.parents)
+            test_files = sorted(affected | failed_files)
+            reason = f"{len(changed)} changed files, {len(failed_files)} files with previous failures"
+        elif affected_only and changed_configs:
+            test_files = all_tests
+            reason = f"full run (pytest configuration changed: {', '.join(p.name for p in changed_configs)})"
+        else:
+            test_files = all_tests
+            reason = "full run (no previous run recorded)" if affected_only else "full run"
+
+    if not test_files:
+        _save_state(root, dict(state, hashes=hashes, imports=graph.import_cache))
+        return f"No tests affected by changes since the last run ({reason}); {len(all_tests)} test files skipped."
+
+    durations = state.get("durations", {})
+    failed_first = set(state.get("failed_files", []))
+    workers = workers or min(os.cpu_count() or 2, 4)
+    shards = _shard(test_files, durations, workers)
+
+    with tempfile.TemporaryDirectory(prefix="penelope-tests-") as tmp:
+        processes = []
+        for i, shard in enumerate(shards):
+            shard.sort(key=lambda p: str(p) not in failed_first)  # previously failed first
+            xml_path = Path(tmp) / f"shard_{i}.xml"
+            # --rootdir pins junit classnames to paths relative to root (see _module_name), even when
+            # a pytest.ini/pyproject.toml in a parent directory would move pytest's rootdir up
+            cmd = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", f"--rootdir={root}",
+                   f"--junitxml={xml_path}"] + list(extra_args or []) + [str(p) for p in shard]
+            log = open(Path(tmp) / f"shard_{i}.log", "w+", encoding="utf-8", errors="replace")
+            processes.append((subprocess.Popen(cmd, cwd=str(root), stdout=log, stderr=subprocess.STDOUT), log, xml_path, shard))
+
+        results, crashed, unmatched_failures = [], [], []
+        deadline = time.monotonic() + timeout
+        for process, log, xml_path, shard in processes:
+            try:
+                process.wait(timeout=max(1, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                crashed.append(f"shard timed out after {timeout}s: {', '.join(p.name for p in shard)}")
+            shard_results = _parse_junit(xml_path)
+            if not shard_results and process.returncode not in (0, 5):
+                log.seek(0)
+                tail = "\n".join(log.read().strip().splitlines()[-10:])
+                crashed.append(f"shard exited with {process.returncode}:\n{tail}")
+            log.close()
+            results.extend(shard_results)
+            matched = False
+            for test_file in shard:
+                module = _module_name(test_file, root)
+                mine = [r for r in shard_results if _belongs_to(r[0], module)]
+                matched = matched or any(r[1] in ("failed", "error") for r in mine)
+                durations[str(test_file)] = sum(r[2] for r in mine) or durations.get(str(test_file), 1.0)
+            if process.returncode not in (0, 5) and not matched:
+                # The shard failed but no result maps to one of its files: keep them all for the next run
+                unmatched_failures.extend(shard)
+
+    counts = {"passed": 0, "failed": 0, "error": 0, "skipped": 0}
+    for _, outcome, _, _ in results:
+        counts[outcome] += 1
+    failures = [r for r in results if r[1] in ("failed", "error")]
+
+    failed_files = {str(test_file) for test_file in test_files
+                    if any(_belongs_to(f[0], _module_name(test_file, root)) for f in failures)}
+    failed_files.update(str(p) for p in unmatched_failures)
+    if crashed:
+        # Re-run everything from a crashed shard next time
+        failed_files.update(str(p) for _, _, _, shard in processes for p in shard)
+    _save_state(root, {"hashes": hashes, "imports": graph.import_cache,
+                       "durations": durations, "failed_files": sorted(failed_files)})
+
+    elapsed = time.perf_counter() - started
+    status = "FAILED" if failures or crashed else "PASSED"
+    lines = [
+        f"{status}: {counts['passed']} passed, {counts['failed']} failed, {counts['error']} errors, "
+        f"{counts['skipped']} skipped in {elapsed:.1f}s",
+        f"Ran {len(test_files)}/{len(all_tests)} test files in {len(shards)} shards ({reason})"
+    ]
+    if failures:
+        lines += ["", "Failures:"]
+        lines += [f"  {outcome.upper()} {test_id} ({seconds:.2f}s): {message}" for test_id, outcome, seconds, message in failures[:30]]
+        if len(failures) > 30:
+            lines.append(f"  ... +{len(failures) - 30} more")
+    if crashed:
+        lines += ["", "Shard problems:"] + [f"  {c}" for c in crashed]
+    slowest = sorted(results, key=lambda r: r[2], reverse=True)[:10]
+    if slowest:
+        lines += ["", "Slowest tests:"]
+        lines += [f"  {seconds:7.2f}s  {test_id}" for test_id, _, seconds, _ in slowest]
+    return "\n".join(lines)
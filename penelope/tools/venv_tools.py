@@ -0,0 +1,218 @@
+"""
+Managed Python Environments for Penelope
+Reuses virtual environments by requirements hash: an environment is built
+once per distinct requirements set and every request gets a clone of it
+(hard-linking site-packages) instead of running venv + pip install from
+scratch; the cached environment itself is never handed out, so installing
+into a clone cannot change it. Builds go to a temporary directory that is
+moved into place under a lock file. A local wheelhouse is used as a package
+source, exclusively when offline.
+"""
+import hashlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ENV_CACHE_DIR = Path(os.getenv("PENELOPE_VENV_CACHE", str(Path.home() / ".penelope" / "venvs")))
+WHEELHOUSE = Path(os.getenv("PENELOPE_WHEELHOUSE", str(Path.home() / ".penelope" / "wheelhouse")))
+MARKER_FILE = ".penelope-env.json"
+DEFAULT_TARGET = ".venv"  # next to the requirements file when no target is given
+BUILD_TIMEOUT = 2400  # a lock file older than this is left over from a killed build
+
+def _is_windows() -> bool:
+    return platform.system() == "Windows"
+
+def venv_python(venv: Path) -> Path:
+    return venv / ("Scripts/python.exe" if _is_windows() else "bin/python")
+
+def is_offline(offline=None) -> bool:
+    if offline is not None:
+        return bool(offline)
+    return os.getenv("PENELOPE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+def pip_source_args(offline=None) -> list:
+    """pip arguments that prefer the local wheelhouse and use only it when offline"""
+    args = []
+    if WHEELHOUSE.is_dir():
+        args += ["--find-links", str(WHEELHOUSE)]
+    if is_offline(offline):
+        args.append("--no-index")
+    return args
+
+def requirements_hash(requirements: str) -> str:
+    """Hash of the normalized requirement lines plus interpreter version and platform"""
+    lines = []
+    for line in Path(requirements).read_text(encoding="utf-8").splitlines():
+        line = line.split(" #")[0].strip()
+        if line and not line.startswith("#"):
+            lines.append(line)
+    key = "\n".join(sorted(lines) + [f"python {sys.version_info[0]}.{sys.version_info[1]}", platform.platform(terse=True)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+def _run(cmd: list, timeout: int) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+
+def _tail(text: str, lines: int = 15) -> str:
+    return "\n".join((text or "").strip().splitlines()[-lines:])
+
+def clone_venv(source: Path, target: Path):
+    """Clone a venv by hard-linking its files; scripts that embed the source path are rewritten"""
+    source, target = source.resolve(), target.resolve()
+    scripts_dir = "Scripts" if _is_windows() else "bin"
+    source_text = str(source).encode("utf-8")
+    for current, dirs, files in os.walk(source):
+        rel = Path(current).relative_to(source)
+        (target / rel).mkdir(parents=True, exist_ok=True)
+        for name in list(dirs):
+            src_dir = Path(current) / name
+            if src_dir.is_symlink():
+                dirs.remove(name)
+                link = os.readlink(src_dir)
+                os.symlink(link.replace(str(source), str(target)), target / rel / name)
+        for name in files:
+            src, dst = Path(current) / name, target / rel / name
+            if src.is_symlink():
+                os.symlink(os.readlink(src).replace(str(source), str(target)), dst)
+                continue
+            if rel.parts[:1] == (scripts_dir,) or name == "pyvenv.cfg":
+                data = src.read_bytes()
+                if source_text in data:
+                    # Console-script shebangs and activate scripts point at the source env
+                    dst.write_bytes(data.replace(source_text, str(target).encode("utf-8")))
+                    shutil.copymode(src, dst)
+                    continue
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(src, dst)
+
+def _relocate(env_dir: Path, old: Path):
+    """Point scripts built in old (a temporary build directory) at env_dir"""
+    old_text, new_text = str(old).encode("utf-8"), str(env_dir).encode("utf-8")
+    scripts = env_dir / ("Scripts" if _is_windows() else "bin")
+    for path in list(scripts.iterdir()) + [env_dir / "pyvenv.cfg"]:
+        if path.is_file() and not path.is_symlink():
+            data = path.read_bytes()
+            if old_text in data:
+                path.write_bytes(data.replace(old_text, new_text))
+
+class _BuildLock:
+    """Exclusive lock file for building one cached environment, across processes"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > BUILD_TIMEOUT:
+                        self.path.unlink()
+                        continue
+                except OSError:
+                    continue
+                time.sleep(0.5)
+
+    def __exit__(self, *exc):
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+def _build_env(env_dir: Path, requirements: str, offline, timings: dict) -> str:
+    """Create a venv and install requirements into it; returns an error string or ''"""
+    started = time.perf_counter()
+    result = _run([sys.executable, "-m", "venv", str(env_dir)], 300)
+    timings["venv"] = time.perf_counter() - started
+    if result.returncode != 0:
+        return f"venv creation failed:\n{_tail(result.stderr)}"
+
+    started = time.perf_counter()
+    result = _run([str(venv_python(env_dir)), "-m", "pip", "install", "-q", "-r", requirements]
+                  + pip_source_args(offline), 1800)
+    timings["pip install"] = time.perf_counter() - started
+    if result.returncode != 0:
+        return f"pip install failed:\n{_tail(result.stderr or result.stdout)}"
+    return ""
+
+def ensure_env(requirements: str = "requirements.txt", target: str = None, offline=None) -> str:
+    """Clone the cached environment for a requirements file to target (default .venv beside it), building it once."""
+    if not os.path.exists(requirements):
+        return f"Error: {requirements} not found"
+    timings = {}
+    started = time.perf_counter()
+    digest = requirements_hash(requirements)
+    env_dir = ENV_CACHE_DIR / digest
+    marker = env_dir / MARKER_FILE
+
+    if marker.exists() and venv_python(env_dir).exists():
+        source = "cloned cached environment"
+    else:
+        ENV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with _BuildLock(ENV_CACHE_DIR / f"{digest}.lock"):
+            if marker.exists() and venv_python(env_dir).exists():
+                source = "cloned environment built by a concurrent request"
+            else:
+                if env_dir.exists():
+                    shutil.rmtree(env_dir, ignore_errors=True)  # leftover of an interrupted build
+                build_dir = Path(tempfile.mkdtemp(prefix=f"{digest}.build-", dir=ENV_CACHE_DIR)).resolve()
+                try:
+                    error = _build_env(build_dir, requirements, offline, timings)
+                    if error:
+                        return f"Error: {error}"
+                    (build_dir / MARKER_FILE).write_text(json.dumps({
+                        "hash": digest,
+                        "requirements": str(Path(requirements).resolve()),
+                        "python": sys.version.split()[0],
+                        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                        "offline": is_offline(offline)
+                    }, indent=2), encoding="utf-8")
+                    os.replace(build_dir, env_dir)
+                    _relocate(env_dir.resolve(), build_dir)
+                finally:
+                    shutil.rmtree(build_dir, ignore_errors=True)
+                source = "built new environment" + (" (offline, wheelhouse only)" if is_offline(offline) else "")
+
+    target_dir = Path(target) if target else Path(requirements).resolve().parent / DEFAULT_TARGET
+    if target_dir.exists() and any(target_dir.iterdir()):
+        try:
+            same = json.loads((target_dir / MARKER_FILE).read_text(encoding="utf-8"))["hash"] == digest
+        except (OSError, ValueError, KeyError):
+            same = False
+        if not same:
+            return f"Error: target {target_dir} already exists and is not empty"
+        source = "existing environment already matches"
+    else:
+        clone_started = time.perf_counter()
+        clone_venv(env_dir, target_dir)
+        timings["clone"] = time.perf_counter() - clone_started
+    location = target_dir.resolve()
+
+    timings["total"] = time.perf_counter() - started
+    timing_text = ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+    return (f"Environment ready at {location} ({source}, requirements hash {digest})\n"
+            f"Python: {venv_python(location)}\n"
+            f"Timings: {timing_text}")
+
+def build_wheelhouse(requirements: str = "requirements.txt") -> str:
+    """Download/build wheels for a requirements file into the local wheelhouse."""
+    if not os.path.exists(requirements):
+        return f"Error: {requirements} not found"
+    WHEELHOUSE.mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    result = _run([sys.executable, "-m", "pip", "wheel", "-q", "-r", requirements,
+                   "-w", str(WHEELHOUSE), "--find-links", str(WHEELHOUSE)], 1800)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        return f"Error building wheelhouse:\n{_tail(result.stderr or result.stdout)}"
+    count = len(list(WHEELHOUSE.glob("*.whl")))
+    return f"Wheelhouse {WHEELHOUSE} now has {count} wheels ({elapsed:.1f}s)"
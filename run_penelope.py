@@ -1,17 +1,50 @@
 """
 Penelope Entry Point
 Supports both CLI mode and interactive chat mode
+
+--profile, --profile-mode cprofile|sample, --profile-output PATH and
+--profile-tools NAMES may be given before any command and wrap the whole run.
 """
 import sys
 from pathlib import Path
 
-# Check if CLI command is used
-if len(sys.argv) > 1 and sys.argv[1] in ['ide', 'android', 'dev', 'system', 'tools', 'info', 'chat']:
-    # Use new CLI
-    from penelope.cli import main
-    main()
-else:
-    # Use old interactive mode
-    from penelope.main import main
-    main()
+CLI_COMMANDS = ['ide', 'android', 'dev', 'system', 'tools', 'info', 'chat', 'serve', 'api', 'sessions', 'batch', 'trace', 'cache']
+
+def _dispatch():
+    # Thin daemon client: skip Click/rich and the agent entirely
+    if len(sys.argv) > 1 and sys.argv[1] == 'ask':
+        from penelope.server.client import main
+        sys.exit(main(sys.argv[2:]))
+    # Check if CLI command is used
+    elif len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        # Use new CLI
+        from penelope.cli import main
+        main()
+    else:
+        # Use old interactive mode
+        from penelope.main import main
+        main()
 
+def main():
+    if any(arg.startswith("--profile") for arg in sys.argv[1:]):
+        from penelope.tools.profile_tools import RunProfiler, split_profile_args
+
+        try:
+            options, sys.argv[1:] = split_profile_args(sys.argv[1:])
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        if options["tools"]:
+            from penelope.tools.registry import enable_tool_profiling
+            enable_tool_profiling(options["tools"])
+        profiler = RunProfiler(options["mode"], options["output"]).start() if options["mode"] else None
+        try:
+            _dispatch()
+        finally:
+            if profiler:
+                print(f"\n{profiler.stop()}\n\nProfile written to {profiler.output}", file=sys.stderr)
+    else:
+        _dispatch()
+
+# Guarded: batch worker processes re-import this module
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from penelope.tools import output_tools
+from penelope.tools.file_tools import read_file
+from penelope.tools.output_tools import shape_output
+
+SOURCE = (
+    "import os   \n"
+    + "\n" * 4
+    + "x = 1\n" * 5
+    + "\t\n"
+    + "VALUE = '" + "a" * 1500 + "'\n"
+    + "print('50% [=====>    ] 3/10')\n"
+    + "print('60% [======>   ] 4/10')\n"
+    + "\x1b[31mred\x1b[0m\n"
+)
+
+def test_read_file_round_trip_is_byte_for_byte(tmp_path):
+    path = tmp_path / "s.py"
+    path.write_bytes(SOURCE.encode("utf-8"))
+    shaped = shape_output(read_file(str(path)), "read_file")
+    assert shaped.encode("utf-8") == path.read_bytes()
+
+def test_large_content_is_cut_at_a_line_boundary(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_tools, "OUTPUT_DIR", tmp_path / "outputs")
+    path = tmp_path / "big.py"
+    path.write_text("".join(f"line_{n} = {n}\n" for n in range(2000)), encoding="utf-8")
+    text = read_file(str(path))
+    shaped = shape_output(text, "read_file", max_chars=1000)
+    body, marker = shaped.split("\n\n... [truncated after line ")
+    assert text.startswith(body + "\n")
+    handle = marker.split("handle '")[1].split("'")[0]
+    assert (tmp_path / "outputs" / f"{handle}.log").read_text(encoding="utf-8") == text
+
+def test_command_output_is_still_shaped():
+    shaped = shape_output("ok\n" * 10, "run_command")
+    assert "[previous line repeated 9 more times]" in shaped